@@ -0,0 +1,220 @@
+"""
+Аутентификация по JWT с кешем проверенных токенов и пользователей.
+
+JWTAuthentication проверяет подпись токена и читает пользователя из базы
+на каждый запрос. Здесь проверенные токены хранятся до истечения срока
+действия, а пользователи — AUTH_USER_CACHE_TTL, в ограниченных по размеру
+LRU-кешах процесса. Сохранение и удаление пользователя удаляет его
+из кеша процесса, в котором произошло изменение; в остальных процессах
+изменение станет видно не позже чем через AUTH_USER_CACHE_TTL.
+
+Токены, выданные через RoleAccessToken, содержат подписанные роль,
+признак суперпользователя, имя и версию токенов пользователя. Если версия
+совпадает с текущей, запрос получает ClaimsUser, построенного из токена,
+без чтения пользователя. Текущие версии хранятся в кеше CATALOG_CACHE_ALIAS
+не дольше AUTH_USER_CACHE_TTL и удаляются из него при изменении
+пользователя. Если кеш общий для процессов, смена роли учитывается всеми
+процессами сразу, иначе — не позже чем через AUTH_USER_CACHE_TTL.
+
+Отозванные токены отклоняются и при попадании в кеш, см. api.revocation.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.shortcuts import get_object_or_404
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.cache import get_cache
+from api.revocation import revocations
+
+User = get_user_model()
+
+TOKEN_VERSION_KEY = 'auth:token_version:{}'
+VERSION_CLAIM = 'token_version'
+
+
+class LRUCache:
+    """Словарь с ограниченным числом записей и сроком жизни записи."""
+
+    def __init__(self, get_max_size):
+        self.get_max_size = get_max_size
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at <= time.time():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, expires_at):
+        with self.lock:
+            self.entries[key] = value, expires_at
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.get_max_size():
+                self.entries.popitem(last=False)
+
+    def discard(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+token_cache = LRUCache(lambda: settings.AUTH_CACHE_MAX_TOKENS)
+user_cache = LRUCache(lambda: settings.AUTH_CACHE_MAX_USERS)
+
+
+def forget_user(user_id):
+    """
+    Удаляет пользователя из кеша процесса и его версию токенов
+    из кеша CATALOG_CACHE_ALIAS.
+    """
+    user_cache.discard(user_id)
+    get_cache().delete(TOKEN_VERSION_KEY.format(user_id))
+
+
+def remember_token_version(user_id, version):
+    get_cache().add(
+        TOKEN_VERSION_KEY.format(user_id), version,
+        settings.AUTH_USER_CACHE_TTL.total_seconds(),
+    )
+
+
+def get_token_version(user_id):
+    """
+    Текущая версия токенов пользователя, None — пользователя нет.
+    При отсутствии в кеше читается из базы.
+    """
+    version = get_cache().get(TOKEN_VERSION_KEY.format(user_id))
+    if version is None:
+        version = User.objects.filter(
+            pk=user_id, is_active=True
+        ).values_list('token_version', flat=True).first()
+        if version is not None:
+            remember_token_version(user_id, version)
+    return version
+
+
+class RoleAccessToken(AccessToken):
+    """
+    Токен доступа с ролью и версией токенов пользователя. Время выпуска
+    хранится с долями секунды: токен, выданный сразу после отзыва
+    токенов пользователя, не считается отозванным.
+    """
+
+    def set_iat(self, claim='iat', at_time=None):
+        if at_time is None:
+            at_time = self.current_time
+        self.payload[claim] = at_time.timestamp()
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['role'] = user.role
+        token['is_superuser'] = user.is_superuser
+        token['username'] = user.username
+        token[VERSION_CLAIM] = user.token_version
+        # Первый запрос с новым токеном не читает версию из базы.
+        remember_token_version(user.pk, user.token_version)
+        return token
+
+
+class ClaimsUser(TokenUser):
+    """
+    Пользователь, построенный из подписанных полей токена.
+    Записи в базе не соответствует: для сохранения данных пользователя
+    нужен load_user, для ссылок на автора — user_reference.
+    """
+
+    @property
+    def role(self):
+        return self.token['role']
+
+    @property
+    def is_moderator(self):
+        return self.role == User.MODERATOR
+
+    @property
+    def is_admin(self):
+        return self.role == User.ADMIN
+
+
+def load_user(user):
+    """
+    Свежая запись пользователя запроса для изменения. Пользователь
+    из кеша может устареть до AUTH_USER_CACHE_TTL, и его сохранение
+    вернуло бы изменённые с тех пор поля.
+    """
+    return get_object_or_404(User, pk=user.pk)
+
+
+def user_reference(user):
+    """
+    Пользователь запроса для внешних ключей и фильтров: экземпляр User
+    с первичным ключом и именем, без чтения из базы.
+    """
+    if isinstance(user, User):
+        return user
+    return User(pk=user.pk, username=user.username)
+
+
+def clear_caches():
+    token_cache.clear()
+    user_cache.clear()
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication, не обращающийся к базе, если токен и пользователь
+    есть в кеше или токен содержит актуальную версию полей пользователя.
+    """
+
+    def get_validated_token(self, raw_token):
+        validated_token = token_cache.get(raw_token)
+        if validated_token is None:
+            validated_token = super().get_validated_token(raw_token)
+            token_cache.set(raw_token, validated_token, validated_token['exp'])
+        if revocations.is_revoked(validated_token):
+            raise InvalidToken('Токен отозван.')
+        return validated_token
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if VERSION_CLAIM in validated_token:
+            version = get_token_version(user_id)
+            if version is None:
+                raise AuthenticationFailed(
+                    'Пользователь не найден или неактивен.',
+                    code='user_not_found',
+                )
+            if version == validated_token[VERSION_CLAIM]:
+                return ClaimsUser(validated_token)
+            # Роль или имя изменились после выдачи токена.
+        user = user_cache.get(user_id)
+        if user is None:
+            user = super().get_user(validated_token)
+            user_cache.set(
+                user_id, user,
+                time.time() + settings.AUTH_USER_CACHE_TTL.total_seconds(),
+            )
+        # Запрос получает свою копию: изменения request.user в одном
+        # запросе не видны другим до сохранения пользователя.
+        return copy.copy(user)
@@ -0,0 +1,222 @@
+"""
+Кеширование ответов API на основе версий ресурсов.
+
+Для каждого ресурса (произведения, категории, жанры, отзывы к произведению,
+комментарии к отзыву) в кеше хранится счётчик версий и время последнего
+изменения. При изменении ресурса его версия увеличивается.
+
+Ключ кеша ответов на анонимные GET-запросы к каталогу включает текущие
+версии ресурсов, поэтому старые ключи перестают использоваться без поиска
+и удаления по одному, а устаревшие записи вытесняются по таймауту.
+Из тех же версий без сериализации ответа вычисляются ETag
+и Last-Modified для условных GET-запросов.
+
+Версии хранятся не дольше CATALOG_VERSION_TIMEOUT секунд: если кеш
+не общий для процессов, изменение, сделанное в другом процессе или
+командой управления, станет видно не позже чем через это время.
+Исчезнувшая версия заново начинается с текущего времени и отличается
+от прежних, поэтому ETag меняется.
+"""
+import hashlib
+import threading
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+
+VERSION_KEY = 'catalog:version:{}'
+MODIFIED_KEY = 'catalog:modified:{}'
+RESPONSE_KEY = 'catalog:response:{}'
+
+_stats = {'hits': 0, 'misses': 0}
+_stats_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[settings.CATALOG_CACHE_ALIAS]
+
+
+def _initial_version():
+    # Версия после вытеснения ключа не должна совпасть с одной из прежних,
+    # поэтому отсчёт начинается с текущего времени в миллисекундах.
+    return int(time.time() * 1000)
+
+
+def get_state(resources):
+    """
+    Текущие версии ресурсов в порядке перечисления и время
+    последнего изменения любого из них (timestamp).
+    Отсутствующие в кеше значения инициализируются.
+    """
+    cache = get_cache()
+    version_keys = [VERSION_KEY.format(resource) for resource in resources]
+    modified_keys = [MODIFIED_KEY.format(resource) for resource in resources]
+    values = cache.get_many(version_keys + modified_keys)
+    timeout = settings.CATALOG_VERSION_TIMEOUT
+    for version_key, modified_key in zip(version_keys, modified_keys):
+        if version_key not in values:
+            # Новая версия могла скрыть изменение, время изменения
+            # тоже начинается заново.
+            if cache.add(version_key, _initial_version(), timeout):
+                cache.set(modified_key, int(time.time()), timeout)
+            values[version_key] = cache.get(version_key)
+            values[modified_key] = cache.get(modified_key)
+        if values.get(modified_key) is None:
+            cache.add(modified_key, int(time.time()), timeout)
+            values[modified_key] = cache.get(modified_key)
+    return (
+        [values[key] for key in version_keys],
+        max((values[key] for key in modified_keys), default=0),
+    )
+
+
+def get_versions(resources):
+    """Текущие версии ресурсов в порядке перечисления."""
+    return get_state(resources)[0]
+
+
+def bump_version(resource):
+    """Инвалидирует все закешированные ответы и ETag ресурса."""
+    cache = get_cache()
+    key = VERSION_KEY.format(resource)
+    timeout = settings.CATALOG_VERSION_TIMEOUT
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), timeout)
+    cache.set(MODIFIED_KEY.format(resource), int(time.time()), timeout)
+
+
+def get_view_resources(view):
+    """
+    Ресурсы, от которых зависит ответ вьюсета: метод
+    `get_cache_resources` или атрибут `cache_resources`.
+    """
+    if hasattr(view, 'get_cache_resources'):
+        return view.get_cache_resources()
+    return view.cache_resources
+
+
+def record(event):
+    with _stats_lock:
+        _stats[event] += 1
+
+
+def cache_stats():
+    """Количество попаданий и промахов кеша в текущем процессе."""
+    with _stats_lock:
+        return dict(_stats)
+
+
+def _sorted_params(request):
+    return sorted(
+        (key, value)
+        for key, values in request.query_params.lists()
+        for value in values
+    )
+
+
+def build_response_key(request, resources):
+    """
+    Ключ ответа: хост, путь, отсортированные параметры запроса
+    и версии ресурсов.
+    """
+    raw = '|'.join((
+        request.get_host(),
+        request.path,
+        repr(_sorted_params(request)),
+        repr(get_versions(resources)),
+    ))
+    return RESPONSE_KEY.format(hashlib.sha1(raw.encode()).hexdigest())
+
+
+def build_etag(request, versions):
+    """
+    Сильный ETag: хеш пути, параметров запроса, формата ответа
+    и версий ресурсов.
+    """
+    raw = '|'.join((
+        request.get_host(),
+        request.path,
+        repr(_sorted_params(request)),
+        request.accepted_renderer.format,
+        repr(versions),
+    ))
+    return '"{}"'.format(hashlib.sha1(raw.encode()).hexdigest())
+
+
+def _strip_weak(etag):
+    return etag[2:] if etag.startswith('W/') else etag
+
+
+def is_not_modified(request, etag, last_modified):
+    """
+    Проверяет If-None-Match, а при его отсутствии If-Modified-Since.
+    """
+    if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+    if if_none_match:
+        etags = {_strip_weak(tag) for tag in parse_etags(if_none_match)}
+        return '*' in etags or etag in etags
+    if_modified_since = parse_http_date_safe(
+        request.META.get('HTTP_IF_MODIFIED_SINCE', '')
+    )
+    return (if_modified_since is not None
+            and last_modified <= if_modified_since)
+
+
+def conditional_get(method):
+    """
+    Отвечает 304 без тела и без обращения к базе, если у клиента
+    актуальная версия ответа. Успешные ответы получают ETag
+    и Last-Modified. Вложенные вьюсеты определяют метод
+    `check_cache_parent`: перед ответом 304 он проверяет, что
+    родительский объект из URL существует, иначе поднимает Http404.
+    """
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        versions, last_modified = get_state(get_view_resources(self))
+        etag = build_etag(request, versions)
+        if is_not_modified(request, etag, last_modified):
+            if hasattr(self, 'check_cache_parent'):
+                self.check_cache_parent()
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            response = method(self, request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        return response
+    return wrapper
+
+
+def cache_anonymous_response(method):
+    """
+    Кеширует успешные ответы метода вьюсета для анонимных пользователей.
+    Ресурсы, от которых зависит ответ, определяются
+    через `get_view_resources`.
+    """
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        if (not settings.CATALOG_CACHE_ENABLED
+                or request.user.is_authenticated):
+            return method(self, request, *args, **kwargs)
+        cache = get_cache()
+        key = build_response_key(request, get_view_resources(self))
+        data = cache.get(key)
+        if data is not None:
+            record('hits')
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+        record('misses')
+        response = method(self, request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+        response['X-Cache'] = 'MISS'
+        return response
+    return wrapper
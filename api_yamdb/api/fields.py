@@ -0,0 +1,89 @@
+from django.utils.encoding import smart_str
+from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS, ManyRelatedField
+
+# Ключ контекста сериализатора с заранее загруженными объектами:
+# {модель: {слаг: объект}}. Используется при пакетной обработке,
+# чтобы не обращаться к базе для каждого элемента.
+SLUG_CACHE = 'slug_cache'
+
+
+def preload_slugs(queryset, slug_field, values):
+    """Загружает одним запросом объекты с указанными слагами."""
+    slugs = {
+        smart_str(value) for value in values
+        if isinstance(value, (str, int))
+    }
+    return {
+        smart_str(getattr(obj, slug_field)): obj
+        for obj in queryset.filter(**{f'{slug_field}__in': slugs})
+    }
+
+
+class BulkManyRelatedField(ManyRelatedField):
+    """
+    Список связанных объектов, которые загружаются одним запросом
+    `slug__in` вместо отдельного запроса на каждый элемент.
+    Ошибки для несуществующих слагов такие же, как у SlugRelatedField.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, str) or not hasattr(data, '__iter__'):
+            self.fail('not_a_list', input_type=type(data).__name__)
+        if not self.allow_empty and len(data) == 0:
+            self.fail('empty')
+
+        child = self.child_relation
+        slugs = [
+            smart_str(item) if isinstance(item, (str, int)) else None
+            for item in data
+        ]
+        found = child.resolve_slugs(slugs)
+        errors = []
+        for slug in slugs:
+            if slug is None:
+                errors.append(child.error_messages['invalid'])
+            elif slug not in found:
+                errors.append(child.error_messages['does_not_exist'].format(
+                    slug_name=child.slug_field, value=slug
+                ))
+        if errors:
+            raise serializers.ValidationError(errors)
+        return [found[slug] for slug in slugs]
+
+
+class BulkSlugRelatedField(serializers.SlugRelatedField):
+    """
+    SlugRelatedField, который при many=True загружает объекты пакетно,
+    а при наличии в контексте `slug_cache` не обращается к базе совсем.
+    """
+
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return BulkManyRelatedField(**list_kwargs)
+
+    def get_slug_cache(self):
+        model = self.get_queryset().model
+        return self.context.get(SLUG_CACHE, {}).get(model)
+
+    def resolve_slugs(self, slugs):
+        cache = self.get_slug_cache()
+        if cache is not None:
+            return cache
+        return preload_slugs(self.get_queryset(), self.slug_field, slugs)
+
+    def to_internal_value(self, data):
+        cache = self.get_slug_cache()
+        if cache is None:
+            return super().to_internal_value(data)
+        if not isinstance(data, (str, int)):
+            self.fail('invalid')
+        try:
+            return cache[smart_str(data)]
+        except KeyError:
+            self.fail('does_not_exist', slug_name=self.slug_field,
+                      value=smart_str(data))
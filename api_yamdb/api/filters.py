@@ -1,10 +1,24 @@
 import django_filters
+from django.db import connections
+from django.db.models import Q
 
 from reviews.models import Title
+from reviews.search import (SEARCH_RANK, SEARCH_WHERE, TITLE_SEARCH_TABLE,
+                            build_match_query, is_supported)
 
 
 class TitleFilter(django_filters.FilterSet):
-    """Фильтр для произведений по имени, году, слагу категории и жанра."""
+    """
+    Фильтр для произведений по имени, году, слагу категории и жанра.
+    Параметр search выполняет полнотекстовый поиск по названию и описанию
+    и сортирует результат по релевантности. Параметр ordering сортирует
+    по числу просмотров.
+    """
+    ORDERINGS = {
+        'view_count': ('view_count', 'id'),
+        '-view_count': ('-view_count', '-id'),
+    }
+
     name = django_filters.CharFilter(lookup_expr='contains')
     category = django_filters.CharFilter(field_name='category__slug',
                                          lookup_expr='iexact')
@@ -12,7 +26,31 @@ class TitleFilter(django_filters.FilterSet):
                                       lookup_expr='iexact')
     year = django_filters.NumberFilter(field_name='year',
                                        lookup_expr='iexact')
+    search = django_filters.CharFilter(method='filter_search')
+    ordering = django_filters.ChoiceFilter(
+        choices=[(key, key) for key in ORDERINGS],
+        method='filter_ordering',
+    )
 
     class Meta:
         model = Title
-        fields = ['name', 'category', 'genre', 'year']
+        fields = ['name', 'category', 'genre', 'year', 'search', 'ordering']
+
+    def filter_ordering(self, queryset, name, value):
+        return queryset.order_by(*self.ORDERINGS[value])
+
+    def filter_search(self, queryset, name, value):
+        match = build_match_query(value)
+        if not match:
+            return queryset
+        if not is_supported(connections[queryset.db]):
+            return queryset.filter(
+                Q(name__icontains=value) | Q(description__icontains=value)
+            )
+        return queryset.extra(
+            tables=[TITLE_SEARCH_TABLE],
+            where=list(SEARCH_WHERE),
+            params=[match],
+            select={'search_rank': SEARCH_RANK},
+            order_by=['search_rank'],
+        )
@@ -0,0 +1,89 @@
+"""
+Повторяемые POST-запросы с заголовком Idempotency-Key.
+
+Успешный ответ сохраняется в той же транзакции, что и созданный объект,
+поэтому либо сохранены оба, либо ни один. Повтор запроса с тем же ключом
+в течение IDEMPOTENCY_KEY_TTL получает сохранённый ответ без проверки
+данных и записи в базу. Ответы с ошибками не сохраняются: клиент может
+исправить запрос и повторить его с тем же ключом.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.response import Response
+
+from reviews.models import IdempotencyKey
+
+HEADER = 'HTTP_IDEMPOTENCY_KEY'
+REPLAYED_HEADER = 'Idempotent-Replayed'
+MAX_KEY_LENGTH = IdempotencyKey._meta.get_field('key').max_length
+
+
+class IdempotencyKeyReused(APIException):
+    status_code = status.HTTP_422_UNPROCESSABLE_ENTITY
+    default_detail = (
+        'Ключ Idempotency-Key уже использован для другого запроса.'
+    )
+    default_code = 'idempotency_key_reused'
+
+
+def replay(request, record):
+    if record.path != request.path:
+        raise IdempotencyKeyReused()
+    response = Response(record.response, status=record.status_code)
+    response[REPLAYED_HEADER] = 'true'
+    return response
+
+
+def get_record(user, key):
+    record = IdempotencyKey.objects.filter(user_id=user.id, key=key).first()
+    if record is None:
+        return None
+    if record.created < timezone.now() - settings.IDEMPOTENCY_KEY_TTL:
+        record.delete()
+        return None
+    return record
+
+
+def idempotent(method):
+    """
+    Учитывает заголовок Idempotency-Key в методе create вьюсета.
+    Ключи принадлежат пользователю: одинаковые ключи разных
+    пользователей не пересекаются.
+    """
+    @wraps(method)
+    def wrapper(self, request, *args, **kwargs):
+        key = request.META.get(HEADER)
+        if key is None or not request.user.is_authenticated:
+            return method(self, request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise ValidationError({'Idempotency-Key': [
+                f'Ключ должен содержать от 1 до {MAX_KEY_LENGTH} символов.'
+            ]})
+        record = get_record(request.user, key)
+        if record is not None:
+            return replay(request, record)
+        try:
+            with transaction.atomic():
+                response = method(self, request, *args, **kwargs)
+                if status.is_success(response.status_code):
+                    IdempotencyKey.objects.create(
+                        user_id=request.user.id,
+                        key=key,
+                        path=request.path,
+                        status_code=response.status_code,
+                        response=response.data,
+                    )
+        except IntegrityError:
+            # Параллельный запрос с тем же ключом успел сохранить ответ,
+            # созданный здесь объект откачен вместе с транзакцией.
+            record = get_record(request.user, key)
+            if record is None:
+                raise
+            return replay(request, record)
+        return response
+    return wrapper
@@ -0,0 +1,43 @@
+from rest_framework.pagination import CursorPagination, LimitOffsetPagination
+
+
+class KeysetCursorPagination(CursorPagination):
+    """
+    Курсорная пагинация с порядком, заданным во вьюсете
+    атрибутом `cursor_ordering`.
+    Не выполняет COUNT(*) и не использует OFFSET,
+    поэтому время получения страницы не зависит от её номера.
+    """
+    ordering = 'id'
+    page_size_query_param = 'limit'
+    max_page_size = 100
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', self.ordering)
+        if isinstance(ordering, str):
+            return (ordering,)
+        return tuple(ordering)
+
+
+class LimitOffsetOrCursorPagination(LimitOffsetPagination):
+    """
+    Пагинация limit/offset, как и для остальных эндпоинтов.
+    Если в запросе передан параметр `cursor` (в том числе пустой
+    для первой страницы), используется курсорная пагинация.
+    """
+    cursor_query_param = 'cursor'
+    cursor_pagination_class = KeysetCursorPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param in request.query_params:
+            self.cursor_paginator = self.cursor_pagination_class()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        self.cursor_paginator = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,154 @@
+"""
+Проверка отзыва токенов доступа без запросов к базе.
+
+Отзывы хранятся в таблице RevokedToken, а каждый процесс держит их копию:
+фильтр Блума по jti и точные множества jti и времён отзыва токенов
+пользователей. Фильтр отвечает «точно не отозван» для почти всех токенов,
+точное множество проверяется только при срабатывании фильтра.
+
+Ревизия отзывов — наибольший id в таблице — хранится в кеше
+CATALOG_CACHE_ALIAS не дольше REVOKED_TOKENS_REFRESH_INTERVAL секунд
+и удаляется из него при каждом изменении таблицы. Процесс сверяет свою
+ревизию с кешем не чаще раза в REVOKED_TOKENS_REFRESH_INTERVAL секунд
+и при расхождении загружает действующие отзывы заново. Отзыв,
+сделанный в процессе, учитывается в нём сразу после фиксации транзакции,
+в остальных процессах — не позже чем через два интервала, даже если кеш
+у каждого процесса свой.
+"""
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from rest_framework_simplejwt.settings import api_settings
+
+from api.cache import get_cache
+from users.models import RevokedToken
+
+REVISION_KEY = 'auth:revocation_revision'
+# Наименьший размер фильтра, чтобы не пересоздавать его при каждом отзыве.
+MIN_CAPACITY = 64
+
+
+class BloomFilter:
+    """Фильтр Блума для строк: ложноположительные ответы возможны."""
+
+    def __init__(self, capacity, error_rate):
+        self.size = max(8, math.ceil(
+            -capacity * math.log(error_rate) / math.log(2) ** 2
+        ))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def positions(self, item):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        for index in range(self.hash_count):
+            yield (first + index * second) % self.size
+
+    def add(self, item):
+        for position in self.positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self.positions(item)
+        )
+
+
+def get_revision():
+    """Текущая ревизия отзывов, при отсутствии в кеше — из базы."""
+    cache = get_cache()
+    revision = cache.get(REVISION_KEY)
+    if revision is None:
+        revision = RevokedToken.objects.aggregate(
+            revision=Max('id')
+        )['revision'] or 0
+        cache.add(
+            REVISION_KEY, revision, settings.REVOKED_TOKENS_REFRESH_INTERVAL
+        )
+    return revision
+
+
+class RevocationList:
+    """Копия действующих отзывов в памяти процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.revision = None
+            self.checked_at = None
+            # Фильтр, jti и времена отзыва по пользователям заменяются
+            # вместе, чтобы проверка не видела их из разных ревизий.
+            self.state = (
+                BloomFilter(
+                    MIN_CAPACITY, settings.REVOKED_TOKENS_FALSE_POSITIVE_RATE
+                ),
+                frozenset(),
+                {},
+            )
+
+    def refresh(self, force=False):
+        """Загружает отзывы заново, если ревизия в кеше изменилась."""
+        now = time.monotonic()
+        if not force and self.checked_at is not None and (
+            now - self.checked_at < settings.REVOKED_TOKENS_REFRESH_INTERVAL
+        ):
+            return
+        self.checked_at = now
+        revision = get_revision()
+        if revision == self.revision:
+            return
+        rows = list(RevokedToken.objects.active().values_list(
+            'jti', 'user_id', 'revoked_before'
+        ))
+        jtis = {jti for jti, _, _ in rows if jti}
+        bloom = BloomFilter(
+            max(MIN_CAPACITY, len(jtis)),
+            settings.REVOKED_TOKENS_FALSE_POSITIVE_RATE,
+        )
+        for jti in jtis:
+            bloom.add(jti)
+        user_cutoffs = {}
+        for _, user_id, revoked_before in rows:
+            if user_id is not None:
+                user_cutoffs[user_id] = max(
+                    revoked_before.timestamp(),
+                    user_cutoffs.get(user_id, 0),
+                )
+        with self.lock:
+            self.state = bloom, frozenset(jtis), user_cutoffs
+            self.revision = revision
+
+    def is_revoked(self, token):
+        self.refresh()
+        bloom, jtis, user_cutoffs = self.state
+        jti = token.get(api_settings.JTI_CLAIM)
+        if jti is not None and jti in bloom and jti in jtis:
+            return True
+        # Токены с iat в целых секундах, выданные в секунду отзыва,
+        # считаются отозванными.
+        cutoff = user_cutoffs.get(token.get(api_settings.USER_ID_CLAIM))
+        return cutoff is not None and token.get('iat', 0) < cutoff
+
+
+revocations = RevocationList()
+
+
+def revocations_changed():
+    """
+    Сообщает процессам об изменении таблицы отзывов после фиксации
+    транзакции и сразу применяет изменение в текущем процессе.
+    """
+    def publish():
+        get_cache().delete(REVISION_KEY)
+        revocations.refresh(force=True)
+    transaction.on_commit(publish)
@@ -2,9 +2,11 @@ from datetime import datetime
 
 from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
-from django.shortcuts import get_object_or_404
+from django.db import IntegrityError
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 
+from api.fields import SLUG_CACHE, BulkSlugRelatedField, preload_slugs
 from reviews.models import Category, Genre, Title, Comment, Review
 
 User = get_user_model()
@@ -60,6 +62,41 @@ class EmailSerializer(serializers.Serializer):
     email = serializers.EmailField()
 
 
+class RevokeTokenSerializer(serializers.Serializer):
+    """
+    Отзыв токена доступа по идентификатору jti
+    или всех выданных токенов пользователя.
+    """
+    jti = serializers.CharField(required=False, max_length=255)
+    username = serializers.SlugRelatedField(
+        slug_field='username',
+        queryset=User.objects.all(),
+        required=False,
+    )
+
+    def validate(self, data):
+        if ('jti' in data) == ('username' in data):
+            raise serializers.ValidationError(
+                'Укажите либо jti токена, либо username пользователя.'
+            )
+        return data
+
+
+class ExportFilterSerializer(serializers.Serializer):
+    """Параметры выгрузки отзывов и комментариев."""
+    title_id = serializers.IntegerField(required=False, min_value=1)
+    since = serializers.DateTimeField(required=False)
+    until = serializers.DateTimeField(required=False)
+
+    def validate(self, data):
+        since, until = data.get('since'), data.get('until')
+        if since and until and since >= until:
+            raise serializers.ValidationError(
+                'Начало периода должно быть раньше его конца.'
+            )
+        return data
+
+
 class CategorySerializer(serializers.ModelSerializer):
     """Сериализатор для категорий произведений."""
 
@@ -80,18 +117,85 @@ class TitleListRetrieveSerializer(serializers.ModelSerializer):
     """
     Сериализатор для GET-запроса произведений.
     Категория и жанр в виде встроенного сериализатора с name и slug.
-    Рейтинг рассчитывается среднее арифметическое всех оценок произведения.
+    Рейтинг (среднее арифметическое всех оценок произведения) берётся
+    из сохранённого в произведении значения. Просмотры переносятся
+    в произведение с задержкой до VIEW_COUNTER_FLUSH_INTERVAL секунд;
+    в закешированных списках без сортировки по просмотрам они обновляются
+    вместе с остальными данными произведений.
     """
     category = CategorySerializer()
     genre = GenreSerializer(many=True)
-    rating = serializers.IntegerField(default=1)
 
     class Meta:
         model = Title
         fields = ('id', 'name', 'year', 'rating', 'description', 'genre',
-                  'category')
+                  'category', 'view_count')
         read_only_fields = ('id', 'name', 'year', 'rating', 'description',
-                            'genre', 'category')
+                            'genre', 'category', 'view_count')
+
+
+class EmbeddedReviewSerializer(serializers.ModelSerializer):
+    """Отзыв в составе ответа о произведении."""
+    author = serializers.CharField(source='author_username', read_only=True)
+
+    class Meta:
+        model = Review
+        fields = ('id', 'text', 'author', 'score', 'pub_date')
+        read_only_fields = fields
+
+
+class TitleExpandedSerializer(TitleListRetrieveSerializer):
+    """
+    Произведение вместе с новейшими отзывами (`?expand=reviews`).
+    Отзывы заранее загружаются во вьюсете в атрибут latest_reviews.
+    """
+    reviews = EmbeddedReviewSerializer(
+        source='latest_reviews', many=True, read_only=True
+    )
+
+    class Meta(TitleListRetrieveSerializer.Meta):
+        fields = TitleListRetrieveSerializer.Meta.fields + ('reviews',)
+
+
+class ScoreBucketSerializer(serializers.Serializer):
+    """Количество отзывов с определённой оценкой."""
+    score = serializers.IntegerField()
+    count = serializers.IntegerField()
+
+
+class TitleBulkCreateSerializer(serializers.ListSerializer):
+    """
+    Пакетная загрузка произведений.
+    Слаги категорий и жанров всех элементов загружаются заранее двумя
+    запросами, произведения и связи с жанрами создаются bulk_create
+    в одной транзакции.
+    """
+
+    def to_internal_value(self, data):
+        if isinstance(data, list):
+            items = [item for item in data if isinstance(item, dict)]
+            genres = [item.get('genre') for item in items]
+            self._context[SLUG_CACHE] = {
+                Category: preload_slugs(
+                    Category.objects.all(), 'slug',
+                    [item.get('category') for item in items]
+                ),
+                Genre: preload_slugs(
+                    Genre.objects.all(), 'slug',
+                    [slug for slugs in genres if isinstance(slugs, list)
+                     for slug in slugs]
+                ),
+            }
+        return super().to_internal_value(data)
+
+    def create(self, validated_data):
+        titles = []
+        genres = []
+        for data in validated_data:
+            data = dict(data)
+            genres.append(data.pop('genre', []))
+            titles.append(Title(**data))
+        return Title.objects.bulk_create_with_genres(titles, genres)
 
 
 class TitleCreateSerializer(serializers.ModelSerializer):
@@ -99,12 +203,14 @@ class TitleCreateSerializer(serializers.ModelSerializer):
     Сериализатор для POST, PATCH-, DELETE-запроса произведений.
     Год выхода не может быть больше дальше текущего года.
     Категорию и жанр надо указывать как slug из тех, что уже есть в базе.
+    Все жанры загружаются одним запросом.
+    Ответ строится из уже загруженных объектов без дополнительных запросов.
     """
-    category = serializers.SlugRelatedField(
+    category = BulkSlugRelatedField(
         slug_field='slug',
         queryset=Category.objects.all()
     )
-    genre = serializers.SlugRelatedField(
+    genre = BulkSlugRelatedField(
         slug_field='slug',
         many=True,
         queryset=Genre.objects.all()
@@ -113,6 +219,7 @@ class TitleCreateSerializer(serializers.ModelSerializer):
     class Meta:
         model = Title
         fields = ('id', 'name', 'year', 'description', 'genre', 'category')
+        list_serializer_class = TitleBulkCreateSerializer
 
     def validate_year(self, value):
         if value > datetime.now().year:
@@ -122,20 +229,66 @@ class TitleCreateSerializer(serializers.ModelSerializer):
             )
         return value
 
+    @staticmethod
+    def cache_genres(instance, genres):
+        """
+        Сохраняет жанры в кеш prefetch_related произведения так же,
+        как это делает Django, чтобы представление не запрашивало их заново.
+        """
+        genres = list(dict.fromkeys(genres))
+        queryset = Genre.objects.filter(pk__in=[genre.pk for genre in genres])
+        queryset._result_cache = genres
+        queryset._prefetch_done = True
+        if not hasattr(instance, '_prefetched_objects_cache'):
+            instance._prefetched_objects_cache = {}
+        instance._prefetched_objects_cache['genre'] = queryset
+
+    def create(self, validated_data):
+        genres = validated_data.get('genre', [])
+        instance = super().create(validated_data)
+        self.cache_genres(instance, genres)
+        return instance
+
+    def update(self, instance, validated_data):
+        genres = validated_data.get('genre')
+        instance = super().update(instance, validated_data)
+        if genres is not None:
+            self.cache_genres(instance, genres)
+        return instance
+
     def to_representation(self, instance):
         return TitleListRetrieveSerializer(instance).data
 
 
+class CommentSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор для комментариев.
+    """
+    author = serializers.SlugRelatedField(
+        slug_field='username',
+        read_only=True
+    )
+
+    class Meta:
+        fields = ('id', 'text', 'author', 'pub_date')
+        read_only_fields = ('id', 'author', 'pub_date')
+        model = Comment
+
+
 class ReviewSerializer(serializers.ModelSerializer):
     """
     Сериализатор для отзывов.
     Оценка может быть в пределах от 1 до 10.
     Пользователь может оставить только один отзыв на произведение.
+    Количество комментариев и последний комментарий хранятся в отзыве.
+    Количество отметок «полезно» обновляется при периодическом сжатии
+    счётчиков.
     """
     author = serializers.SlugRelatedField(
         slug_field='username',
         read_only=True
     )
+    latest_comment = CommentSerializer(read_only=True)
     score = serializers.IntegerField(
         validators=[
             MinValueValidator(
@@ -146,38 +299,51 @@ class ReviewSerializer(serializers.ModelSerializer):
     )
 
     class Meta:
-        fields = ('id', 'text', 'author', 'score', 'pub_date')
-        read_only_fields = ('id', 'author', 'pub_date')
+        fields = ('id', 'text', 'author', 'score', 'pub_date',
+                  'comments_count', 'latest_comment', 'helpful_count')
+        read_only_fields = ('id', 'author', 'pub_date', 'comments_count',
+                            'helpful_count')
         model = Review
 
-    def validate(self, data):
+    def create(self, validated_data):
         """
-        Проверка на наличие в БД отзыва пользователя.
         Пользователь может оставить только один отзыв на произведение.
+        Отзыв сохраняется без предварительной проверки, повторный отзыв
+        отклоняет ограничение `unique_author_title` в базе.
         """
-        request = self.context['request']
-        if request.method == 'POST':
-            author = request.user
-            view = self.context['view']
-            title_id = view.kwargs.get('title_id')
-            title = get_object_or_404(Title, id=title_id)
-            if Review.objects.filter(title=title, author=author).exists():
-                raise serializers.ValidationError(
-                    'Можно оставить только один отзыв на произведение.'
-                )
-        return data
+        try:
+            return super().create(validated_data)
+        except IntegrityError:
+            if not Review.objects.filter(
+                title=validated_data['title'],
+                author=validated_data['author'],
+            ).exists():
+                raise
+        raise serializers.ValidationError({
+            api_settings.NON_FIELD_ERRORS_KEY: [
+                'Можно оставить только один отзыв на произведение.'
+            ]
+        })
+
+
+class EmbeddedCommentSerializer(serializers.ModelSerializer):
+    """Комментарий в составе ответа об отзыве."""
+    author = serializers.CharField(source='author_username', read_only=True)
 
+    class Meta:
+        model = Comment
+        fields = ('id', 'text', 'author', 'pub_date')
+        read_only_fields = fields
 
-class CommentSerializer(serializers.ModelSerializer):
+
+class DiscussionReviewSerializer(ReviewSerializer):
     """
-    Сериализатор для комментариев.
+    Отзыв вместе с первыми комментариями к нему.
+    Комментарии заранее загружаются во вьюсете в атрибут first_comments.
     """
-    author = serializers.SlugRelatedField(
-        slug_field='username',
-        read_only=True
+    comments = EmbeddedCommentSerializer(
+        source='first_comments', many=True, read_only=True
     )
 
-    class Meta:
-        fields = ('id', 'text', 'author', 'pub_date')
-        read_only_fields = ('id', 'author', 'pub_date')
-        model = Comment
+    class Meta(ReviewSerializer.Meta):
+        fields = ReviewSerializer.Meta.fields + ('comments',)
@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from api.authentication import forget_user
+from api.cache import bump_version
+from reviews.models import Category, Comment, Genre, Review, Title
+from reviews.purge import purged
+
+User = get_user_model()
+
+
+def comment_resources(comment):
+    """
+    Комментарии отзыва и отзывы произведения: отзыв показывает число
+    комментариев и последний комментарий. Если отзыв уже удалён, версию
+    отзывов произведения увеличивает удаление отзыва.
+    """
+    if Comment.review.is_cached(comment):
+        title_id = comment.review.title_id
+    else:
+        title_id = Review.objects.filter(pk=comment.review_id).values_list(
+            'title_id', flat=True
+        ).first()
+    if title_id is None:
+        return (f'comments:{comment.review_id}',)
+    return (f'comments:{comment.review_id}', f'reviews:{title_id}')
+
+
+def user_resources(user):
+    """
+    Список пользователей, а при смене имени — ответы, в которых оно
+    показано: отзывы произведений с отзывами и комментариями
+    пользователя, комментарии отзывов с его комментариями и произведения,
+    встраивающие его отзывы. Отзывы и комментарии удалённого пользователя
+    удаляются вместе с ним и сами увеличивают версии своих ресурсов.
+    """
+    if 'username' not in getattr(user, 'changed_token_claims', ()):
+        return ('users',)
+    title_ids = set(
+        Review.objects.filter(author=user).values_list('title_id', flat=True)
+    )
+    resources = ['users', 'titles'] if title_ids else ['users']
+    commented = set(Comment.objects.filter(author=user).values_list(
+        'review_id', 'review__title_id'
+    ))
+    title_ids.update(title_id for _, title_id in commented)
+    resources.extend(f'reviews:{title_id}' for title_id in title_ids)
+    resources.extend(f'comments:{review_id}' for review_id, _ in commented)
+    return resources
+
+
+# Ресурсы кеша, версии которых меняются при записи модели.
+# Отзывы меняют рейтинг, поэтому инвалидируют и произведения.
+CACHE_RESOURCES = {
+    Title: lambda instance: ('titles',),
+    Category: lambda instance: ('categories',),
+    Genre: lambda instance: ('genres',),
+    Review: lambda instance: ('titles', f'reviews:{instance.title_id}'),
+    Comment: comment_resources,
+    User: user_resources,
+}
+
+
+def bump_versions(resources):
+    """Увеличивает версии ресурсов после фиксации транзакции."""
+    def bump():
+        for resource in resources:
+            bump_version(resource)
+    transaction.on_commit(bump)
+
+
+def bump_model_versions(sender, instance, **kwargs):
+    bump_versions(CACHE_RESOURCES[sender](instance))
+
+
+def bump_purged_versions(sender, instances, **kwargs):
+    resources = dict.fromkeys(
+        resource
+        for instance in instances
+        for resource in CACHE_RESOURCES[sender](instance)
+    )
+    bump_versions(resources)
+
+
+def forget_cached_user(sender, instance, **kwargs):
+    """
+    Удаляет пользователя из кеша аутентификации сразу и после фиксации
+    транзакции: запрос, прочитавший строку до фиксации, мог успеть
+    положить её в кеш.
+    """
+    user_id = instance.pk
+    forget_user(user_id)
+    transaction.on_commit(lambda: forget_user(user_id))
+
+
+def bump_titles_version(sender, action, **kwargs):
+    if action.startswith('post_'):
+        bump_versions(('titles',))
+
+
+for model in CACHE_RESOURCES:
+    post_save.connect(bump_model_versions, sender=model)
+    post_delete.connect(bump_model_versions, sender=model)
+post_save.connect(forget_cached_user, sender=User)
+post_delete.connect(forget_cached_user, sender=User)
+m2m_changed.connect(bump_titles_version, sender=Title.genre.through)
+purged.connect(bump_purged_versions)
@@ -3,7 +3,8 @@ from rest_framework.routers import DefaultRouter
 
 from api.views import (CategoryViewSet, CommentViewSet, GenreViewSet,
                        ReviewViewSet, UserViewSet, get_jwt_token,
-                       register, TitleViewSet)
+                       register, TitleViewSet, export_reviews,
+                       revoke_tokens)
 
 
 app_name = 'api'
@@ -23,7 +24,9 @@ router_v1.register(
 router_v1.register(r"titles", TitleViewSet)
 
 urlpatterns = [
+    path('v1/reviews/export/', export_reviews, name='export_reviews'),
     path('v1/', include(router_v1.urls)),
     path('v1/auth/signup/', register, name='register'),
-    path('v1/auth/token/', get_jwt_token, name='token')
+    path('v1/auth/token/', get_jwt_token, name='token'),
+    path('v1/auth/revoke/', revoke_tokens, name='revoke_tokens'),
 ]
@@ -1,57 +1,108 @@
 from django.contrib.auth import get_user_model
 from django.contrib.auth.tokens import default_token_generator
 from django.conf import settings
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
-from rest_framework import filters, permissions, status, viewsets
+from rest_framework import (filters, permissions, serializers, status,
+                            viewsets)
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.parsers import JSONParser
 from rest_framework.response import Response
-from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework.settings import api_settings
 
+from api.authentication import RoleAccessToken, load_user, user_reference
+from api.cache import cache_anonymous_response, conditional_get
 from api.filters import TitleFilter
+from api.idempotency import idempotent
 from api.mixins import CreateDestroyListViewSet
+from api.pagination import (KeysetCursorPagination,
+                            LimitOffsetOrCursorPagination)
+from api.parsers import NDJSONParser
 from api.permissions import (IsAdmin, IsAdminOrReadOnly,
                              IsAuthorModeratorAdminOrReadOnly)
+from api.revocation import revocations_changed
 from api.serializers import (RegisterSerializer, EmailSerializer,
                              TokenSerializer, NoAdminUserSerializer,
                              UserSerializer, CategorySerializer,
                              GenreSerializer, TitleListRetrieveSerializer,
                              TitleCreateSerializer, ReviewSerializer,
-                             CommentSerializer)
-from reviews.models import Category, Genre, Title, Review
+                             CommentSerializer, ScoreBucketSerializer,
+                             TitleExpandedSerializer,
+                             DiscussionReviewSerializer,
+                             ExportFilterSerializer, RevokeTokenSerializer)
+from api.signals import bump_versions
+from reviews import export, leaderboards
+from reviews.purge import purge_in_background, purge_title, purge_user
+from reviews.view_counter import view_counter
+from reviews.models import (Category, Comment, Genre, HelpfulVote, Review,
+                            ScoreBucket, Title)
+from users.models import OutboxEmail, RevokedToken
 
 User = get_user_model()
 
+DEFAULT_REVIEWS_LIMIT = 3
+MAX_REVIEWS_LIMIT = 20
+DEFAULT_COMMENTS_LIMIT = 5
+MAX_COMMENTS_LIMIT = 50
+
+
+def purge_response(request, instance, purge):
+    """
+    Удаляет объект функцией purge. С параметром `async=true` удаление
+    выполняется в фоне, а ответ со статусом 202 возвращается сразу;
+    при остановке процесса фоновое удаление прерывается, см.
+    purge_in_background.
+    """
+    if request.query_params.get('async', '').lower() in ('1', 'true'):
+        purge_in_background(purge, instance)
+        return Response(status=status.HTTP_202_ACCEPTED)
+    purge(instance)
+    return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+def get_limit(request, param, default, maximum):
+    """
+    Число объектов из параметра запроса param, от 1 до maximum;
+    default, если параметр не задан или не является числом.
+    """
+    try:
+        limit = int(request.query_params[param])
+    except (KeyError, ValueError):
+        return default
+    return min(max(limit, 1), maximum)
+
 
 @api_view(['POST'])
 @permission_classes([permissions.AllowAny])
 def register(request):
     """
     Отправка кода верификации на email.
+    Письмо ставится в очередь в одной транзакции с созданием
+    пользователя и отправляется командой send_outbox.
     """
     serializer = EmailSerializer(data=request.data)
     serializer.is_valid(raise_exception=True)
     username = serializer.validated_data.get('username')
     email = serializer.validated_data.get('email')
-    if not User.objects.filter(username=username, email=email).exists():
-        serializer = RegisterSerializer(data=request.data)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
+    with transaction.atomic():
+        if not User.objects.filter(username=username, email=email).exists():
+            serializer = RegisterSerializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
 
-    user = get_object_or_404(
-        User,
-        username=serializer.validated_data['username']
-    )
-    confirmation_code = default_token_generator.make_token(user)
-    send_mail(
-        subject=f'Registration code for {username}',
-        message=f'Ваш код подтверждения для доступа: {confirmation_code}',
-        from_email=None,
-        recipient_list=[email],
-    )
+        user = get_object_or_404(
+            User,
+            username=serializer.validated_data['username']
+        )
+        confirmation_code = default_token_generator.make_token(user)
+        OutboxEmail.objects.enqueue(
+            subject=f'Registration code for {username}',
+            message=f'Ваш код подтверждения для доступа: {confirmation_code}',
+            recipient_list=[email],
+        )
 
     return Response(serializer.data, status=status.HTTP_200_OK)
 
@@ -72,15 +123,53 @@ def get_jwt_token(request):
     if default_token_generator.check_token(
         user, serializer.validated_data['confirmation_code']
     ):
-        token = AccessToken.for_user(user)
+        token = RoleAccessToken.for_user(user)
         return Response({'token': str(token)}, status=status.HTTP_200_OK)
 
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAdmin])
+def revoke_tokens(request):
+    """
+    Отзыв токена доступа по jti или всех выданных токенов пользователя
+    по username. Доступен только администратору.
+    """
+    serializer = RevokeTokenSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    with transaction.atomic():
+        if 'jti' in serializer.validated_data:
+            RevokedToken.objects.revoke_jti(serializer.validated_data['jti'])
+        else:
+            RevokedToken.objects.revoke_user(
+                serializer.validated_data['username']
+            )
+        revocations_changed()
+    return Response(serializer.data, status=status.HTTP_201_CREATED)
+
+
+@api_view(['GET'])
+@permission_classes([IsAdmin])
+def export_reviews(request):
+    """
+    Потоковая выгрузка отзывов и комментариев в NDJSON.
+    Доступна только администратору, фильтры: title_id, since, until.
+    """
+    serializer = ExportFilterSerializer(data=request.query_params)
+    serializer.is_valid(raise_exception=True)
+    response = StreamingHttpResponse(
+        export.iter_lines(**serializer.validated_data),
+        content_type='application/x-ndjson; charset=utf-8',
+    )
+    response['Content-Disposition'] = 'attachment; filename="reviews.ndjson"'
+    return response
+
+
 class UserViewSet(viewsets.ModelViewSet):
     """
     Создание и редактирование пользователя.
+    Поддерживаются условные GET-запросы (ETag, Last-Modified).
     """
     lookup_field = 'username'
     queryset = User.objects.all()
@@ -90,6 +179,19 @@ class UserViewSet(viewsets.ModelViewSet):
     permission_classes = (IsAdmin,)
     filter_backends = (filters.SearchFilter,)
     search_fields = ('username',)
+    cache_resources = ('users',)
+
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        """Отзывы и комментарии пользователя удаляются порциями."""
+        return purge_response(request, self.get_object(), purge_user)
 
     @action(
         methods=[
@@ -105,16 +207,19 @@ class UserViewSet(viewsets.ModelViewSet):
         В зависимости от роли используем нужный сериализатор,
         и изменяем данные пользователя.
         """
-        serializer = UserSerializer(request.user)
+        if request.method == 'GET' and isinstance(request.user, User):
+            return Response(UserSerializer(request.user).data)
+        user = load_user(request.user)
+        serializer = UserSerializer(user)
         if request.method == 'PATCH':
-            if request.user.is_admin:
+            if user.is_admin:
                 serializer = UserSerializer(
-                    request.user,
+                    user,
                     data=request.data,
                     partial=True)
             else:
                 serializer = NoAdminUserSerializer(
-                    request.user,
+                    user,
                     data=request.data,
                     partial=True)
             serializer.is_valid(raise_exception=True)
@@ -131,6 +236,8 @@ class CategoryViewSet(CreateDestroyListViewSet):
     указании slug.
     Остальные действия запрещены.
     Поиск по названию категории.
+    Ответы анонимным пользователям кешируются,
+    поддерживаются условные GET-запросы (ETag, Last-Modified).
     """
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
@@ -138,6 +245,12 @@ class CategoryViewSet(CreateDestroyListViewSet):
     lookup_field = 'slug'
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
+    cache_resources = ('categories',)
+
+    @conditional_get
+    @cache_anonymous_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
 
 class GenreViewSet(CreateDestroyListViewSet):
@@ -148,6 +261,8 @@ class GenreViewSet(CreateDestroyListViewSet):
     указании slug.
     Остальные действия запрещены.
     Поиск по названию жанра.
+    Ответы анонимным пользователям кешируются,
+    поддерживаются условные GET-запросы (ETag, Last-Modified).
     """
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
@@ -155,25 +270,240 @@ class GenreViewSet(CreateDestroyListViewSet):
     lookup_field = 'slug'
     filter_backends = (filters.SearchFilter,)
     search_fields = ('name',)
+    cache_resources = ('genres',)
+
+    @conditional_get
+    @cache_anonymous_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
 
 
 class TitleViewSet(viewsets.ModelViewSet):
-    """Вьюсет для произведений."""
+    """
+    Вьюсет для произведений.
+    Помимо limit/offset поддерживается курсорная пагинация по id
+    (параметр `cursor`).
+    Ответы анонимным пользователям кешируются,
+    поддерживаются условные GET-запросы (ETag, Last-Modified).
+    С параметром `expand=reviews` в список и в произведение встраиваются
+    `reviews_limit` новейших отзывов.
+    Просмотры произведений копятся в буфере и записываются пакетами.
+    """
     serializer_class = TitleListRetrieveSerializer
     queryset = (Title.objects.select_related('category')
-                .prefetch_related('genre')
-                .annotate(rating=Avg('reviews__score'))
-                )
+                .prefetch_related('genre'))
     http_method_names = ["get", "post", "delete", "patch"]
     permission_classes = (IsAdminOrReadOnly,)
     filter_backends = (DjangoFilterBackend,)
     filterset_class = TitleFilter
+    pagination_class = LimitOffsetOrCursorPagination
+    cursor_ordering = ('id',)
+    lookup_value_regex = r'\d+'
+    cache_resources = ('titles', 'categories', 'genres')
+
+    def expand_reviews(self):
+        if self.action not in ('list', 'retrieve'):
+            return False
+        expand = self.request.query_params.get('expand', '')
+        return 'reviews' in expand.split(',')
+
+    def get_cache_resources(self):
+        resources = self.cache_resources
+        # Просмотры переносятся в базу часто, поэтому от них зависят
+        # только произведение и список, отсортированный по просмотрам.
+        if self.action == 'retrieve':
+            resources += (f'views:{self.kwargs["pk"]}',)
+        elif self.request.query_params.get('ordering', '').lstrip('-') == (
+            'view_count'
+        ):
+            resources += ('views',)
+        return resources
 
     def get_serializer_class(self):
-        if self.action in ('list', 'retrieve'):
+        if self.expand_reviews():
+            return TitleExpandedSerializer
+        if self.action in ('list', 'retrieve', 'top', 'trending'):
             return TitleListRetrieveSerializer
         return TitleCreateSerializer
 
+    def attach_latest_reviews(self, titles):
+        """Загружает новейшие отзывы всех произведений одним запросом."""
+        latest = Review.objects.latest_for_titles(
+            [title.id for title in titles],
+            get_limit(self.request, 'reviews_limit',
+                      DEFAULT_REVIEWS_LIMIT, MAX_REVIEWS_LIMIT),
+        )
+        for title in titles:
+            title.latest_reviews = latest[title.id]
+        return titles
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        if page is not None and self.expand_reviews():
+            self.attach_latest_reviews(page)
+        return page
+
+    def get_object(self):
+        title = super().get_object()
+        if self.expand_reviews():
+            self.attach_latest_reviews([title])
+        return title
+
+    @conditional_get
+    @cache_anonymous_response
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get
+    @cache_anonymous_response
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        # Просмотр учитывается и для ответов из кеша, и для 304.
+        counted = (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED)
+        if (getattr(self, 'action', None) == 'retrieve'
+                and response.status_code in counted):
+            view_counter.record(int(kwargs['pk']))
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def destroy(self, request, *args, **kwargs):
+        """Отзывы и комментарии произведения удаляются порциями."""
+        return purge_response(request, self.get_object(), purge_title)
+
+    def update(self, request, *args, **kwargs):
+        """
+        То же, что UpdateModelMixin.update, но без сброса кеша
+        prefetch_related: сериализатор сам кладёт в него новые жанры,
+        поэтому ответ строится без повторного запроса.
+        """
+        partial = kwargs.pop('partial', False)
+        instance = self.get_object()
+        serializer = self.get_serializer(
+            instance, data=request.data, partial=partial
+        )
+        serializer.is_valid(raise_exception=True)
+        self.perform_update(serializer)
+        return Response(serializer.data)
+
+    @action(
+        methods=['post'],
+        detail=False,
+        url_path='bulk',
+        permission_classes=(IsAdmin,),
+        parser_classes=(JSONParser, NDJSONParser),
+    )
+    def bulk_create(self, request):
+        """
+        Пакетная загрузка произведений администратором.
+        Принимает JSON-массив или NDJSON с элементами в формате
+        POST-запроса произведения. Если хотя бы один элемент некорректен,
+        ничего не создаётся, а ошибки возвращаются с индексом элемента.
+        """
+        serializer = TitleCreateSerializer(
+            data=request.data,
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        if not serializer.is_valid():
+            errors = serializer.errors
+            if isinstance(errors, list):
+                errors = [
+                    {'index': index, 'errors': item_errors}
+                    for index, item_errors in enumerate(errors)
+                    if item_errors
+                ]
+            return Response(
+                {'errors': errors}, status=status.HTTP_400_BAD_REQUEST
+            )
+        titles = serializer.save()
+        bump_versions(('titles',))
+        return Response(
+            {'created': len(titles), 'ids': [title.id for title in titles]},
+            status=status.HTTP_201_CREATED,
+        )
+
+    @action(
+        methods=['get'],
+        detail=True,
+        url_path='score-histogram',
+        pagination_class=None,
+    )
+    def score_histogram(self, request, pk=None):
+        """
+        Распределение оценок произведения от 1 до 10.
+        Читается из предрассчитанной гистограммы, отзывы не сканируются.
+        """
+        counts = dict(
+            ScoreBucket.objects.filter(title_id=pk)
+            .values_list('score', 'count')
+        )
+        if not counts:
+            get_object_or_404(Title.objects.only('id'), pk=pk)
+        histogram = [
+            {'score': score, 'count': counts.get(score, 0)}
+            for score in range(1, 11)
+        ]
+        return Response(ScoreBucketSerializer(histogram, many=True).data)
+
+    @action(
+        methods=['get'],
+        detail=True,
+        pagination_class=KeysetCursorPagination,
+        cursor_ordering=('pub_date', 'id'),
+    )
+    def discussion(self, request, pk=None):
+        """
+        Отзывы о произведении вместе с первыми `comments_limit`
+        комментариями к каждому. Отзывы разбиты на страницы курсором,
+        страница загружается двумя запросами: отзывы с авторами
+        и комментарии всех отзывов страницы.
+        """
+        reviews = Review.objects.filter(title_id=pk).select_related(
+            'author', 'latest_comment__author'
+        )
+        page = self.paginate_queryset(reviews)
+        if not page:
+            get_object_or_404(Title.objects.only('id'), pk=pk)
+        comments = Comment.objects.first_for_reviews(
+            [review.id for review in page],
+            get_limit(request, 'comments_limit',
+                      DEFAULT_COMMENTS_LIMIT, MAX_COMMENTS_LIMIT),
+        )
+        for review in page:
+            review.first_comments = comments[review.id]
+        serializer = DiscussionReviewSerializer(
+            page, many=True, context=self.get_serializer_context()
+        )
+        return self.get_paginated_response(serializer.data)
+
+    @action(methods=['get'], detail=False, pagination_class=None)
+    @conditional_get
+    @cache_anonymous_response
+    def top(self, request):
+        """
+        Лучшие произведения по байесовскому рейтингу (параметр `limit`).
+        Произведения без отзывов не попадают в подборку.
+        """
+        titles = self.get_queryset().top_rated(get_limit(
+            request, 'limit', leaderboards.DEFAULT_SIZE, leaderboards.MAX_SIZE
+        ))
+        return Response(self.get_serializer(titles, many=True).data)
+
+    @action(methods=['get'], detail=False, pagination_class=None)
+    @conditional_get
+    @cache_anonymous_response
+    def trending(self, request):
+        """
+        Произведения, о которых больше всего писали за последнее время
+        (параметр `limit`). Вклад отзыва убывает вдвое
+        за TRENDING_HALF_LIFE.
+        """
+        titles = self.get_queryset().trending(get_limit(
+            request, 'limit', leaderboards.DEFAULT_SIZE, leaderboards.MAX_SIZE
+        ))
+        return Response(self.get_serializer(titles, many=True).data)
+
 
 class ReviewViewSet(viewsets.ModelViewSet):
     """
@@ -183,18 +513,82 @@ class ReviewViewSet(viewsets.ModelViewSet):
     Авторизованный пользователь может создавать свои отзывы.
     Автор отзыва может редактировать и удалять свои отзывы.
     Модератор или администратор могут редактировать и удалять любые отзывы.
+    Помимо limit/offset поддерживается курсорная пагинация
+    по (pub_date, id) (параметр `cursor`).
+    Поддерживаются условные GET-запросы (ETag, Last-Modified)
+    и повторяемые POST-запросы (заголовок Idempotency-Key).
     """
     serializer_class = ReviewSerializer
     permission_classes = (IsAuthorModeratorAdminOrReadOnly,)
+    pagination_class = LimitOffsetOrCursorPagination
+    cursor_ordering = ('pub_date', 'id')
 
     def get_title(self):
-        return get_object_or_404(Title, pk=self.kwargs.get('title_id'))
+        """Произведение из URL, загружается один раз за запрос."""
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title, pk=self.kwargs.get('title_id')
+            )
+        return self._title
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        # Автор загружается в том же запросе, иначе поле `author`
+        # обращается к базе для каждого отзыва на странице.
+        return self.get_title().reviews.select_related(
+            'author', 'latest_comment__author'
+        )
+
+    def get_cache_resources(self):
+        return (f'reviews:{self.kwargs.get("title_id")}',)
+
+    def check_cache_parent(self):
+        self.get_title()
+
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @action(
+        methods=['post', 'delete'],
+        detail=True,
+        permission_classes=(permissions.IsAuthenticated,),
+    )
+    def helpful(self, request, title_id=None, pk=None):
+        """
+        Отметка «отзыв полезен»: POST ставит, DELETE снимает.
+        Пользователь может отметить отзыв только один раз.
+        """
+        review = self.get_object()
+        if request.method == 'DELETE':
+            if not HelpfulVote.objects.remove(
+                user_reference(request.user), review
+            ):
+                return Response(status=status.HTTP_404_NOT_FOUND)
+            return Response(status=status.HTTP_204_NO_CONTENT)
+        try:
+            HelpfulVote.objects.add(user_reference(request.user), review)
+        except IntegrityError:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [
+                    'Вы уже отметили этот отзыв как полезный.'
+                ]
+            })
+        return Response(status=status.HTTP_201_CREATED)
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        # Несуществующее произведение — 404 до проверки данных отзыва.
+        self.get_title()
+        return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, title=self.get_title())
+        serializer.save(
+            author=user_reference(self.request.user), title=self.get_title()
+        )
 
 
 class CommentViewSet(viewsets.ModelViewSet):
@@ -206,9 +600,15 @@ class CommentViewSet(viewsets.ModelViewSet):
     Автор комментария может редактировать и удалять свои комментарии.
     Модератор или администратор могут редактировать и удалять любые
     комментарии.
+    Помимо limit/offset поддерживается курсорная пагинация
+    по (pub_date, id) (параметр `cursor`).
+    Поддерживаются условные GET-запросы (ETag, Last-Modified)
+    и повторяемые POST-запросы (заголовок Idempotency-Key).
     """
     serializer_class = CommentSerializer
     permission_classes = (IsAuthorModeratorAdminOrReadOnly,)
+    pagination_class = LimitOffsetOrCursorPagination
+    cursor_ordering = ('pub_date', 'id')
 
     def get_review(self):
         return get_object_or_404(
@@ -218,7 +618,27 @@ class CommentViewSet(viewsets.ModelViewSet):
         )
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        return self.get_review().comments.select_related('author')
+
+    def get_cache_resources(self):
+        return (f'comments:{self.kwargs.get("review_id")}',)
+
+    def check_cache_parent(self):
+        self.get_review()
+
+    @conditional_get
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
+    @conditional_get
+    def retrieve(self, request, *args, **kwargs):
+        return super().retrieve(request, *args, **kwargs)
+
+    @idempotent
+    def create(self, request, *args, **kwargs):
+        return super().create(request, *args, **kwargs)
 
     def perform_create(self, serializer):
-        serializer.save(author=self.request.user, review=self.get_review())
+        serializer.save(
+            author=user_reference(self.request.user), review=self.get_review()
+        )
@@ -112,15 +112,30 @@ STATICFILES_DIRS = ((BASE_DIR / 'static/'),)
 
 AUTH_USER_MODEL = 'users.User'
 
-EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
+EMAIL_BACKEND = 'users.backends.SegmentEmailBackend'
 
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
+# Письма дописываются в сегменты EMAIL_FILE_PATH порциями.
+EMAIL_FLUSH_INTERVAL = 1
+EMAIL_MAX_PENDING = 100
+EMAIL_SEGMENT_MAX_BYTES = 64 * 1024 * 1024
+EMAIL_SEGMENT_MAX_AGE = timedelta(hours=1)
+
 DEFAULT_FROM_EMAIL = 'author@yamdb.com'
 
+# Очередь писем: письма отправляет команда send_outbox.
+OUTBOX_BATCH_SIZE = 100
+OUTBOX_MAX_ATTEMPTS = 5
+# Задержка перед повтором удваивается с каждой неудачной попыткой.
+OUTBOX_RETRY_DELAY = timedelta(seconds=30)
+OUTBOX_MAX_RETRY_DELAY = timedelta(hours=1)
+# Время, на которое письма резервируются за отправляющим процессом.
+OUTBOX_LEASE = timedelta(minutes=5)
+
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -135,4 +150,51 @@ SIMPLE_JWT = {
     "AUTH_HEADER_TYPES": ("Bearer",),
 }
 
+# Кеш проверенных токенов и пользователей в памяти процесса.
+AUTH_CACHE_MAX_TOKENS = 10000
+AUTH_CACHE_MAX_USERS = 10000
+AUTH_USER_CACHE_TTL = timedelta(seconds=30)
+
+# Отозванные токены: процесс сверяет свою копию отзывов с ревизией в кеше
+# не чаще раза в REVOKED_TOKENS_REFRESH_INTERVAL секунд, ревизия хранится
+# в кеше столько же.
+REVOKED_TOKENS_REFRESH_INTERVAL = 1
+REVOKED_TOKENS_FALSE_POSITIVE_RATE = 0.001
+
 PROFILE_URL = 'me'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Кеш ответов анонимным пользователям для произведений, категорий и жанров.
+CATALOG_CACHE_ENABLED = True
+CATALOG_CACHE_ALIAS = 'default'
+CATALOG_CACHE_TIMEOUT = 300
+# Версии ресурсов для ключей кеша и ETag. С кешем процесса (LocMemCache)
+# изменения из других процессов и команд управления видны не позже чем
+# через CATALOG_VERSION_TIMEOUT секунд.
+CATALOG_VERSION_TIMEOUT = 60
+
+# Подборки лучших и популярных произведений.
+LEADERBOARD_MIN_REVIEWS = 5
+TRENDING_HALF_LIFE = timedelta(days=2)
+TRENDING_WINDOW = timedelta(days=7)
+
+# Количество строк, удаляемых одним запросом при удалении произведений
+# и пользователей.
+PURGE_CHUNK_SIZE = 500
+
+# Количество строк счётчика отметок «полезно» на один отзыв.
+HELPFUL_SHARDS = 8
+
+# Просмотры произведений копятся в памяти процесса и записываются
+# не реже раза в VIEW_COUNTER_FLUSH_INTERVAL секунд (допустимое окно
+# потерь) или при накоплении VIEW_COUNTER_MAX_PENDING просмотров.
+VIEW_COUNTER_FLUSH_INTERVAL = 5
+VIEW_COUNTER_MAX_PENDING = 1000
+
+# Сколько хранится ответ на POST-запрос с заголовком Idempotency-Key.
+IDEMPOTENCY_KEY_TTL = timedelta(hours=24)
@@ -0,0 +1,57 @@
+"""
+Потоковая выгрузка отзывов и комментариев в формате NDJSON.
+
+Записи читаются через QuerySet.iterator(chunk_size) в виде словарей
+с уже присоединённым именем автора, поэтому в памяти одновременно
+находится не больше одной порции строк независимо от объёма данных.
+Сначала выгружаются все отзывы, затем все комментарии.
+"""
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from reviews.models import Comment, Review
+
+DEFAULT_CHUNK_SIZE = 2000
+
+REVIEW_FIELDS = ('id', 'title_id', 'text', 'score', 'pub_date')
+COMMENT_FIELDS = ('id', 'review_id', 'text', 'pub_date')
+
+
+def filter_by_date(queryset, since=None, until=None):
+    if since is not None:
+        queryset = queryset.filter(pub_date__gte=since)
+    if until is not None:
+        queryset = queryset.filter(pub_date__lt=until)
+    return queryset
+
+
+def iter_records(title_id=None, since=None, until=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Словари отзывов и комментариев с полями type и author.
+    Отзывы и комментарии отбираются по своей дате публикации
+    в полуинтервале [since, until).
+    """
+    reviews = filter_by_date(Review.objects.all(), since, until)
+    comments = filter_by_date(Comment.objects.all(), since, until)
+    if title_id is not None:
+        reviews = reviews.filter(title_id=title_id)
+        comments = comments.filter(review__title_id=title_id)
+    querysets = (
+        ('review', reviews, REVIEW_FIELDS),
+        ('comment', comments, COMMENT_FIELDS),
+    )
+    for record_type, queryset, fields in querysets:
+        rows = queryset.order_by('id').values(*fields, 'author__username')
+        for row in rows.iterator(chunk_size=chunk_size):
+            row['author'] = row.pop('author__username')
+            yield {'type': record_type, **row}
+
+
+def iter_lines(*args, **kwargs):
+    """Строки NDJSON для записей iter_records."""
+    for record in iter_records(*args, **kwargs):
+        yield json.dumps(
+            record, cls=DjangoJSONEncoder, ensure_ascii=False
+        ) + '\n'
@@ -0,0 +1,65 @@
+"""
+Расчёт значений для подборок «Лучшие» и «Популярное на этой неделе».
+
+Лучшие произведения упорядочены по байесовскому рейтингу
+(rating_sum + m * C) / (review_count + m), где C — средняя оценка
+по всем отзывам, m — LEADERBOARD_MIN_REVIEWS. Произведение с одним
+отзывом получает рейтинг, близкий к среднему, а не к своей оценке.
+C хранится в базе (LeaderboardStats) и пересчитывается командой
+refresh_leaderboards, поэтому все процессы считают рейтинг с одним C.
+
+Популярность — сумма вкладов отзывов, убывающих вдвое за
+TRENDING_HALF_LIFE. Вклад отзыва хранится относительно фиксированной
+эпохи (2 ** ((pub_date - эпоха) / half_life)), поэтому значения не нужно
+пересчитывать с течением времени: порядок произведений сохраняется.
+Чтобы число не переполнялось, в базе хранится log2 суммы вкладов.
+"""
+import math
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+TRENDING_EPOCH = datetime(2023, 1, 1, tzinfo=timezone.utc)
+# Средняя оценка, пока нет ни одного отзыва.
+DEFAULT_MEAN_SCORE = 5.5
+DEFAULT_SIZE = 10
+MAX_SIZE = 100
+
+
+def mean_score(rating_sum, review_count):
+    """Средняя оценка по сумме оценок и числу отзывов."""
+    return rating_sum / review_count if review_count else DEFAULT_MEAN_SCORE
+
+
+def trending_point(pub_date):
+    """log2 вклада отзыва, опубликованного в pub_date."""
+    half_life = settings.TRENDING_HALF_LIFE.total_seconds()
+    return (pub_date - TRENDING_EPOCH).total_seconds() / half_life
+
+
+def log2_add(total, point):
+    """log2(2 ** total + 2 ** point), total может быть None."""
+    if total is None:
+        return point
+    top = max(total, point)
+    return top + math.log2(2 ** (total - top) + 2 ** (point - top))
+
+
+def log2_sub(total, point):
+    """
+    log2(2 ** total - 2 ** point). None, если вкладов не осталось
+    или разность неотличима от нуля.
+    """
+    if total is None or point >= total:
+        return None
+    rest = 1 - 2 ** (point - total)
+    if rest < 1e-9:
+        return None
+    return total + math.log2(rest)
+
+
+def log2_sum(points):
+    total = None
+    for point in points:
+        total = log2_add(total, point)
+    return total
@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import bump_version
+from reviews.models import HelpfulShard
+
+
+class Command(BaseCommand):
+    """
+    Переносит счётчики отметок «полезно» в отзывы. Запускается
+    периодически: до переноса новые отметки не видны в ответах API.
+    Если кеш не общий для процессов, веб-процессы увидят перенос
+    не позже чем через CATALOG_VERSION_TIMEOUT секунд.
+    Запуск команды: python3 manage.py compact_helpful_votes
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of counter rows folded per transaction'
+        )
+
+    def handle(self, *args, **kwargs):
+        title_ids = HelpfulShard.objects.compact(
+            batch_size=kwargs['batch_size']
+        )
+        for title_id in title_ids:
+            bump_version(f'reviews:{title_id}')
+        self.stdout.write(
+            f'Обновлены отзывы произведений: {len(title_ids)}'
+        )
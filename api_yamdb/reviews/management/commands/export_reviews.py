@@ -0,0 +1,58 @@
+from datetime import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from reviews import export
+
+
+def parse_date_option(value):
+    if value is None:
+        return None
+    parsed = parse_datetime(value)
+    if parsed is None:
+        date = parse_date(value)
+        if date is None:
+            raise CommandError(f'Некорректная дата: {value}')
+        parsed = datetime.combine(date, datetime.min.time())
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+class Command(BaseCommand):
+    """
+    Выгружает отзывы и комментарии в формате NDJSON.
+    Запуск команды: python3 manage.py export_reviews --output reviews.ndjson
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', help='File path, stdout by default')
+        parser.add_argument('--title-id', type=int)
+        parser.add_argument(
+            '--since', help='ISO 8601 date or datetime, inclusive'
+        )
+        parser.add_argument(
+            '--until', help='ISO 8601 date or datetime, exclusive'
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=export.DEFAULT_CHUNK_SIZE,
+            help='Number of rows fetched from the database at a time'
+        )
+
+    def handle(self, *args, **kwargs):
+        lines = export.iter_lines(
+            title_id=kwargs['title_id'],
+            since=parse_date_option(kwargs['since']),
+            until=parse_date_option(kwargs['until']),
+            chunk_size=kwargs['chunk_size'],
+        )
+        if kwargs['output'] is None:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+        with open(kwargs['output'], 'w', encoding='utf-8') as output:
+            output.writelines(lines)
@@ -4,7 +4,7 @@ from django.conf import settings
 from django.contrib.auth import get_user_model
 
 
-from reviews.models import Title, Review
+from reviews.models import ScoreBucket, Title, Review
 
 User = get_user_model()
 
@@ -14,6 +14,8 @@ class Command(BaseCommand):
     1. Очищает таблицу отзывов в базе данных от всех строк.
     2. Импортирует данные из указанного csv-файла, подставляет их в поля
     модели и заполняет базу новыми объектами.
+    3. Пересчитывает рейтинг и гистограммы оценок произведений
+    по загруженным отзывам.
     Запуск команды: python3 manage.py import_6_review
     """
 
@@ -40,3 +42,6 @@ class Command(BaseCommand):
 
                 reviews.append(new_object)
         Review.objects.bulk_create(reviews)
+        Title.objects.recompute_ratings()
+        Title.objects.refresh_trending()
+        ScoreBucket.objects.rebuild()
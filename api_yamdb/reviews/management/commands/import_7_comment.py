@@ -39,3 +39,4 @@ class Command(BaseCommand):
 
                 comments.append(new_object)
         Comment.objects.bulk_create(comments)
+        Review.objects.recount_comments()
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import ScoreBucket
+
+
+class Command(BaseCommand):
+    """
+    Пересобирает гистограммы оценок всех произведений по таблице отзывов.
+    Используется для заполнения гистограмм после импорта данных.
+    Запуск команды: python3 manage.py rebuild_score_histograms
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of rows inserted per query'
+        )
+
+    def handle(self, *args, **kwargs):
+        created = ScoreBucket.objects.rebuild(
+            batch_size=kwargs['batch_size']
+        )
+        self.stdout.write(f'Создано строк гистограмм: {created}')
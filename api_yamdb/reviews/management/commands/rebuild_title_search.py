@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from reviews.search import (ensure_title_search_index, is_supported,
+                            rebuild_title_search_index)
+
+
+class Command(BaseCommand):
+    """
+    Заново заполняет полнотекстовый индекс произведений по их таблице.
+    Нужна, если записи в таблицу произведений вносились в обход триггеров
+    (например, при восстановлении базы из дампа).
+    Запуск команды: python3 manage.py rebuild_title_search
+    """
+
+    def handle(self, *args, **kwargs):
+        if not is_supported(connection):
+            self.stdout.write(
+                'Полнотекстовый индекс доступен только для SQLite'
+            )
+            return
+        ensure_title_search_index(connection)
+        rebuild_title_search_index(connection)
+        self.stdout.write('Полнотекстовый индекс произведений пересобран')
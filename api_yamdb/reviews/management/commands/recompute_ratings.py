@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает сумму оценок, количество отзывов и рейтинг всех
+    произведений по таблице отзывов. Исправляет расхождения после
+    импорта данных или ручных правок базы.
+    Запуск команды: python3 manage.py recompute_ratings
+    """
+
+    def handle(self, *args, **kwargs):
+        updated = Title.objects.recompute_ratings()
+        self.stdout.write(f'Пересчитан рейтинг произведений: {updated}')
@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import Review
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает количество комментариев и последний комментарий
+    всех отзывов по таблице комментариев. Исправляет расхождения после
+    импорта данных или ручных правок базы.
+    Запуск команды: python3 manage.py recount_comments
+    """
+
+    def handle(self, *args, **kwargs):
+        updated = Review.objects.recount_comments()
+        self.stdout.write(f'Пересчитаны комментарии отзывов: {updated}')
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from api.cache import bump_version
+from reviews.models import Title
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает среднюю оценку, байесовский рейтинг и популярность
+    произведений. Запускается периодически: убирает из популярного
+    отзывы старше TRENDING_WINDOW и обновляет среднюю оценку в базе.
+    Если кеш не общий для процессов, веб-процессы увидят новые подборки
+    не позже чем через CATALOG_VERSION_TIMEOUT секунд.
+    Запуск команды: python3 manage.py refresh_leaderboards
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of rows updated per query'
+        )
+
+    def handle(self, *args, **kwargs):
+        rated = Title.objects.refresh_weighted_ratings()
+        trending = Title.objects.refresh_trending(
+            batch_size=kwargs['batch_size']
+        )
+        bump_version('titles')
+        self.stdout.write(
+            f'Обновлено произведений: {rated}, популярных: {trending}'
+        )
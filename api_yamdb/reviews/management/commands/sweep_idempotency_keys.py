@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+
+from reviews.models import IdempotencyKey
+
+
+class Command(BaseCommand):
+    """
+    Удаляет ключи Idempotency-Key старше IDEMPOTENCY_KEY_TTL.
+    Запускается периодически, например раз в час.
+    Запуск команды: python3 manage.py sweep_idempotency_keys
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of rows deleted per query'
+        )
+
+    def handle(self, *args, **kwargs):
+        deleted = IdempotencyKey.objects.sweep(
+            batch_size=kwargs['batch_size']
+        )
+        self.stdout.write(f'Удалено просроченных ключей: {deleted}')
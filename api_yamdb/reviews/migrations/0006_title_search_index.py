@@ -0,0 +1,22 @@
+from django.db import migrations
+
+from reviews.search import drop_title_search_index, ensure_title_search_index
+
+
+def create_index(apps, schema_editor):
+    ensure_title_search_index(schema_editor.connection)
+
+
+def drop_index(apps, schema_editor):
+    drop_title_search_index(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0005_scorebucket'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 3.2 on 2026-10-18 19:47
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from reviews import leaderboards
+
+
+def fill_leaderboards(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    Review = apps.get_model('reviews', 'Review')
+    totals = Title.objects.aggregate(
+        rating_sum=Sum('rating_sum'), review_count=Sum('review_count')
+    )
+    mean = leaderboards.mean_score(
+        totals['rating_sum'] or 0, totals['review_count'] or 0
+    )
+    min_reviews = settings.LEADERBOARD_MIN_REVIEWS
+    Title.objects.filter(review_count__gt=0).update(
+        weighted_rating=(F('rating_sum') + min_reviews * mean)
+        / (F('review_count') + min_reviews)
+    )
+    points = {}
+    since = timezone.now() - settings.TRENDING_WINDOW
+    reviews = (Review.objects.filter(pub_date__gte=since)
+               .values_list('title_id', 'pub_date'))
+    for title_id, pub_date in reviews.iterator():
+        points.setdefault(title_id, []).append(
+            leaderboards.trending_point(pub_date)
+        )
+    Title.objects.bulk_update(
+        [Title(id=title_id, trending_score=leaderboards.log2_sum(values))
+         for title_id, values in points.items()],
+        ['trending_score'], batch_size=500,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0006_title_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='trending_score',
+            field=models.FloatField(editable=False, null=True, verbose_name='Популярность'),
+        ),
+        migrations.AddField(
+            model_name='title',
+            name='weighted_rating',
+            field=models.FloatField(editable=False, null=True, verbose_name='Байесовский рейтинг'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['weighted_rating', 'id'], name='title_weighted_rating_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['trending_score', 'id'], name='title_trending_score_idx'),
+        ),
+        migrations.RunPython(fill_leaderboards, migrations.RunPython.noop),
+    ]
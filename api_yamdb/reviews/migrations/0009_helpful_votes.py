@@ -0,0 +1,55 @@
+# Generated by Django 3.2 on 2026-10-18 19:59
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('reviews', '0008_review_comment_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='helpful_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Отметки «полезно»'),
+        ),
+        migrations.CreateModel(
+            name='HelpfulVote',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата отметки')),
+                ('review', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='helpful_votes', to='reviews.review', verbose_name='Отзыв')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='helpful_votes', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Отметка «полезно»',
+                'verbose_name_plural': 'Отметки «полезно»',
+            },
+        ),
+        migrations.CreateModel(
+            name='HelpfulShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('shard', models.PositiveSmallIntegerField(verbose_name='Номер строки')),
+                ('count', models.IntegerField(default=0, verbose_name='Отметки')),
+                ('review', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='helpful_shards', to='reviews.review', verbose_name='Отзыв')),
+            ],
+            options={
+                'verbose_name': 'Счётчик отметок «полезно»',
+                'verbose_name_plural': 'Счётчики отметок «полезно»',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='helpfulvote',
+            constraint=models.UniqueConstraint(fields=('user', 'review'), name='unique_user_review'),
+        ),
+        migrations.AddConstraint(
+            model_name='helpfulshard',
+            constraint=models.UniqueConstraint(fields=('review', 'shard'), name='unique_review_shard'),
+        ),
+    ]
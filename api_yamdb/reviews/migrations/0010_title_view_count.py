@@ -0,0 +1,22 @@
+# Generated by Django 3.2 on 2026-10-18 20:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0009_helpful_votes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='title',
+            name='view_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Просмотры'),
+        ),
+        migrations.AddIndex(
+            model_name='title',
+            index=models.Index(fields=['view_count', 'id'], name='title_view_count_idx'),
+        ),
+    ]
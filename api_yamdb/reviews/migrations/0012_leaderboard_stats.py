@@ -0,0 +1,39 @@
+# Generated by Django 3.2 on 2026-10-18 21:17
+
+from django.db import migrations, models
+from django.db.models import Sum
+
+from reviews import leaderboards
+
+
+def fill_mean_score(apps, schema_editor):
+    Title = apps.get_model('reviews', 'Title')
+    LeaderboardStats = apps.get_model('reviews', 'LeaderboardStats')
+    totals = Title.objects.aggregate(
+        rating_sum=Sum('rating_sum'), review_count=Sum('review_count')
+    )
+    LeaderboardStats.objects.create(pk=1, mean_score=leaderboards.mean_score(
+        totals['rating_sum'] or 0, totals['review_count'] or 0
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reviews', '0011_idempotency_keys'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LeaderboardStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mean_score', models.FloatField(verbose_name='Средняя оценка')),
+            ],
+            options={
+                'verbose_name': 'Статистика подборок',
+                'verbose_name_plural': 'Статистика подборок',
+            },
+        ),
+        migrations.RunPython(fill_mean_score, migrations.RunPython.noop),
+    ]
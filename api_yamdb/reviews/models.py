@@ -1,5 +1,15 @@
+import random
+
+from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, models, transaction
+from django.db.models import (Case, Count, F, FloatField, Max, OuterRef,
+                              Subquery, Sum, Value, When, Window)
+from django.db.models.functions import Coalesce, NullIf, RowNumber
+from django.utils import timezone
+
+from reviews import leaderboards
 
 User = get_user_model()
 
@@ -22,9 +32,203 @@ class Genre(models.Model):
         return self.name
 
 
+class LeaderboardStats(models.Model):
+    """
+    Средняя оценка C для байесовского рейтинга, одна строка. Хранится
+    в базе, чтобы рейтинг во всех процессах считался с одним C.
+    """
+    mean_score = models.FloatField(verbose_name='Средняя оценка')
+
+    class Meta:
+        verbose_name = 'Статистика подборок'
+        verbose_name_plural = 'Статистика подборок'
+
+    def __str__(self):
+        return f'C = {self.mean_score}'
+
+
+class TitleQuerySet(models.QuerySet):
+    """Операции над денормализованным рейтингом произведений."""
+
+    def weighted_rating_expression(self, score_delta=0, count_delta=0):
+        """
+        Байесовский рейтинг из суммы оценок и числа отзывов,
+        изменённых на score_delta и count_delta. None без отзывов.
+        """
+        min_reviews = settings.LEADERBOARD_MIN_REVIEWS
+        # C читается в том же запросе: до первого расчёта — значение
+        # по умолчанию.
+        mean = Coalesce(
+            Subquery(LeaderboardStats.objects.values('mean_score')[:1]),
+            Value(leaderboards.DEFAULT_MEAN_SCORE),
+        )
+        return Case(
+            When(review_count__lte=-count_delta, then=Value(None)),
+            default=(
+                (F('rating_sum') + score_delta + min_reviews * mean)
+                / (F('review_count') + count_delta + min_reviews)
+            ),
+            output_field=FloatField(),
+        )
+
+    def apply_review_delta(self, title_id, score_delta, count_delta):
+        """
+        Изменяет сумму оценок и число отзывов произведения одним UPDATE.
+        Рейтинг и байесовский рейтинг пересчитываются из новых значений
+        в том же запросе, при отсутствии отзывов они равны None.
+        """
+        return self.filter(pk=title_id).update(
+            rating_sum=F('rating_sum') + score_delta,
+            review_count=F('review_count') + count_delta,
+            rating=(F('rating_sum') + score_delta)
+            / NullIf(F('review_count') + count_delta, 0),
+            weighted_rating=self.weighted_rating_expression(
+                score_delta, count_delta
+            ),
+        )
+
+    def apply_trending_delta(self, title_id, pub_date, sign):
+        """
+        Добавляет (sign=1) или вычитает (sign=-1) вклад отзыва
+        в популярность произведения. Отзывы старше TRENDING_WINDOW
+        не учитываются.
+        """
+        if pub_date < timezone.now() - settings.TRENDING_WINDOW:
+            return
+        point = leaderboards.trending_point(pub_date)
+        with transaction.atomic(using=self.db, savepoint=False):
+            title = (self.select_for_update().filter(pk=title_id)
+                     .values('trending_score').first())
+            if title is None:
+                return
+            if sign > 0:
+                score = leaderboards.log2_add(title['trending_score'], point)
+            else:
+                score = leaderboards.log2_sub(title['trending_score'], point)
+            self.filter(pk=title_id).update(trending_score=score)
+
+    def refresh_mean_score(self):
+        """Пересчитывает и сохраняет среднюю оценку по всем отзывам."""
+        totals = Title.objects.aggregate(
+            rating_sum=Sum('rating_sum'), review_count=Sum('review_count')
+        )
+        mean = leaderboards.mean_score(
+            totals['rating_sum'] or 0, totals['review_count'] or 0
+        )
+        LeaderboardStats.objects.update_or_create(
+            pk=1, defaults={'mean_score': mean}
+        )
+        return mean
+
+    def recompute_ratings(self):
+        """
+        Пересчитывает сумму оценок, число отзывов, рейтинг и байесовский
+        рейтинг по таблице отзывов. Возвращает количество обновлённых
+        произведений.
+        """
+        reviews = (Review.objects.filter(title=OuterRef('pk'))
+                   .order_by().values('title'))
+        with transaction.atomic():
+            updated = self.update(
+                rating_sum=Coalesce(
+                    Subquery(reviews.annotate(total=Sum('score'))
+                             .values('total')), 0),
+                review_count=Coalesce(
+                    Subquery(reviews.annotate(total=Count('id'))
+                             .values('total')), 0),
+            )
+            self.update(
+                rating=F('rating_sum') / NullIf(F('review_count'), 0)
+            )
+            self.refresh_weighted_ratings()
+        return updated
+
+    def refresh_weighted_ratings(self):
+        """Пересчитывает байесовский рейтинг с новой средней оценкой."""
+        self.refresh_mean_score()
+        return self.update(weighted_rating=self.weighted_rating_expression())
+
+    def refresh_trending(self, batch_size=500):
+        """
+        Пересчитывает популярность по отзывам за TRENDING_WINDOW.
+        Возвращает количество популярных произведений.
+        """
+        since = timezone.now() - settings.TRENDING_WINDOW
+        points = {}
+        reviews = (Review.objects.filter(pub_date__gte=since)
+                   .values_list('title_id', 'pub_date'))
+        for title_id, pub_date in reviews.iterator():
+            points.setdefault(title_id, []).append(
+                leaderboards.trending_point(pub_date)
+            )
+        titles = [
+            Title(id=title_id, trending_score=leaderboards.log2_sum(values))
+            for title_id, values in points.items()
+        ]
+        with transaction.atomic():
+            self.exclude(trending_score=None).update(trending_score=None)
+            self.bulk_update(titles, ['trending_score'], batch_size=batch_size)
+        return len(titles)
+
+    def top_rated(self, size):
+        return (self.exclude(weighted_rating=None)
+                .order_by('-weighted_rating', '-id')[:size])
+
+    def trending(self, size):
+        return (self.exclude(trending_score=None)
+                .order_by('-trending_score', '-id')[:size])
+
+    def reserve_ids(self, connection):
+        """
+        Первый свободный id для явной вставки, вызывается в транзакции.
+        В SQLite пустой UPDATE sqlite_sequence сразу берёт блокировку
+        записи: параллельная вставка дождётся конца транзакции и не займёт
+        те же id. Отсчёт идёт от счётчика AUTOINCREMENT, а не от MAX(id),
+        поэтому id недавно удалённых произведений не используются повторно.
+        """
+        if connection.vendor != 'sqlite':
+            return (self.aggregate(max_id=Max('id'))['max_id'] or 0) + 1
+        table = self.model._meta.db_table
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE sqlite_sequence SET seq = seq WHERE name = %s',
+                [table],
+            )
+            cursor.execute(
+                'SELECT seq FROM sqlite_sequence WHERE name = %s', [table]
+            )
+            row = cursor.fetchone()
+        return (row[0] if row else 0) + 1
+
+    def bulk_create_with_genres(self, titles, genres, batch_size=500):
+        """
+        Создаёт произведения и их связи с жанрами пакетными INSERT
+        в одной транзакции. genres — списки жанров в порядке titles.
+        Если база не возвращает id из пакетной вставки (SQLite
+        в Django 3.2), id назначаются явно, см. reserve_ids.
+        """
+        connection = transaction.get_connection(self.db)
+        through = self.model.genre.through
+        with transaction.atomic(using=self.db):
+            if not connection.features.can_return_rows_from_bulk_insert:
+                start = self.reserve_ids(connection)
+                for offset, title in enumerate(titles):
+                    title.id = start + offset
+            self.bulk_create(titles, batch_size=batch_size)
+            through.objects.using(self.db).bulk_create(
+                (through(title_id=title.id, genre_id=genre.id)
+                 for title, title_genres in zip(titles, genres)
+                 for genre in dict.fromkeys(title_genres)),
+                batch_size=batch_size,
+            )
+        return titles
+
+
 class Title(models.Model):
     """
     Произведения, к которым пишут отзывы (определённый фильм, книга и т.д.)
+    Сумма оценок, число отзывов и рейтинг хранятся в самом произведении
+    и обновляются при создании, изменении и удалении отзывов.
     """
     name = models.CharField(max_length=200)
     year = models.IntegerField(verbose_name='Год выпуска',)
@@ -45,10 +249,144 @@ class Title(models.Model):
         verbose_name='Жанр',
         help_text='Жанр произведения',
     )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0,
+        editable=False,
+    )
+    review_count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+        editable=False,
+    )
+    rating = models.PositiveSmallIntegerField(
+        verbose_name='Рейтинг',
+        null=True,
+        editable=False,
+    )
+    weighted_rating = models.FloatField(
+        verbose_name='Байесовский рейтинг',
+        null=True,
+        editable=False,
+    )
+    trending_score = models.FloatField(
+        verbose_name='Популярность',
+        null=True,
+        editable=False,
+    )
+    view_count = models.PositiveIntegerField(
+        verbose_name='Просмотры',
+        default=0,
+        editable=False,
+    )
+
+    objects = TitleQuerySet.as_manager()
+
+    # Изменяются только атомарными UPDATE при записи отзывов
+    # и переносе просмотров.
+    DENORMALIZED_FIELDS = ('rating_sum', 'review_count', 'rating',
+                           'weighted_rating', 'trending_score',
+                           'view_count')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['weighted_rating', 'id'],
+                         name='title_weighted_rating_idx'),
+            models.Index(fields=['trending_score', 'id'],
+                         name='title_trending_score_idx'),
+            models.Index(fields=['view_count', 'id'],
+                         name='title_view_count_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
+    def save(self, *args, **kwargs):
+        """
+        При изменении существующего произведения не перезаписывает
+        рейтинг значениями, загруженными до конкурирующих записей отзывов.
+        """
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.DENORMALIZED_FIELDS
+            ]
+        super().save(*args, **kwargs)
+
+
+def first_in_groups(queryset, group_field, group_ids, ordering, limit):
+    """
+    Первые limit объектов каждой группы в порядке ordering одним запросом
+    с ROW_NUMBER() OVER (PARTITION BY group_field). Django 3.2 не умеет
+    фильтровать по оконным функциям, поэтому запрос оборачивается
+    во внешний SELECT. У объектов заполнен атрибут author_username.
+    Возвращает словарь {id группы: [объекты]}.
+    """
+    if not group_ids:
+        return {}
+    ranked = queryset.filter(**{f'{group_field}__in': group_ids}).annotate(
+        author_username=F('author__username'),
+        position=Window(
+            RowNumber(),
+            partition_by=[F(group_field)],
+            order_by=list(ordering),
+        ),
+    ).order_by()
+    sql, params = ranked.query.sql_with_params()
+    objects = queryset.model._default_manager.db_manager(queryset.db).raw(
+        f'SELECT * FROM ({sql}) ranked WHERE position <= %s '
+        f'ORDER BY {group_field}, position',
+        (*params, limit),
+    )
+    groups = {group_id: [] for group_id in group_ids}
+    for obj in objects:
+        groups[getattr(obj, group_field)].append(obj)
+    return groups
+
+
+class ReviewQuerySet(models.QuerySet):
+    """Выборки отзывов и операции над их счётчиками комментариев."""
+
+    def apply_comment_delta(self, review_id, count_delta):
+        """
+        Изменяет число комментариев отзыва и заново выбирает последний
+        комментарий одним UPDATE.
+        """
+        latest = (Comment.objects.filter(review=OuterRef('pk'))
+                  .order_by('-pub_date', '-id').values('id')[:1])
+        return self.filter(pk=review_id).update(
+            comments_count=F('comments_count') + count_delta,
+            latest_comment=Subquery(latest),
+        )
+
+    def recount_comments(self):
+        """
+        Пересчитывает число комментариев и последний комментарий
+        по таблице комментариев. Возвращает количество отзывов.
+        """
+        comments = (Comment.objects.filter(review=OuterRef('pk'))
+                    .order_by())
+        return self.update(
+            comments_count=Coalesce(
+                Subquery(comments.values('review')
+                         .annotate(total=Count('id')).values('total')), 0),
+            latest_comment=Subquery(
+                comments.order_by('-pub_date', '-id').values('id')[:1]
+            ),
+        )
+
+    def latest_for_titles(self, title_ids, limit):
+        """
+        Не более limit новейших отзывов каждого из произведений одним
+        запросом. У отзывов заполнен атрибут author_username.
+        Возвращает словарь {title_id: [отзывы]}.
+        """
+        return first_in_groups(
+            self, 'title_id', title_ids,
+            (F('pub_date').desc(), F('id').desc()), limit,
+        )
+
 
 class Review(models.Model):
     """Модель для отзывов."""
@@ -74,6 +412,31 @@ class Review(models.Model):
         verbose_name='Оценка',
         default=1,
     )
+    comments_count = models.PositiveIntegerField(
+        verbose_name='Количество комментариев',
+        default=0,
+        editable=False,
+    )
+    latest_comment = models.ForeignKey(
+        'Comment',
+        verbose_name='Последний комментарий',
+        on_delete=models.SET_NULL,
+        null=True,
+        editable=False,
+        related_name='+',
+    )
+    helpful_count = models.PositiveIntegerField(
+        verbose_name='Отметки «полезно»',
+        default=0,
+        editable=False,
+    )
+
+    objects = ReviewQuerySet.as_manager()
+
+    # Изменяются только атомарными UPDATE при записи комментариев
+    # и при сжатии счётчиков отметок «полезно».
+    DENORMALIZED_FIELDS = ('comments_count', 'latest_comment',
+                           'helpful_count')
 
     class Meta:
         verbose_name = 'Отзыв'
@@ -89,6 +452,58 @@ class Review(models.Model):
     def __str__(self):
         return self.text
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = instance.__dict__.get('score')
+        return instance
+
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет отзыв и в той же транзакции обновляет
+        рейтинг, популярность и гистограмму оценок произведения.
+        Счётчик комментариев существующего отзыва не перезаписывается.
+        """
+        adding = self._state.adding
+        if not adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.DENORMALIZED_FIELDS
+            ]
+        loaded_score = getattr(self, '_loaded_score', None)
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                Title.objects.apply_review_delta(self.title_id, self.score, 1)
+                Title.objects.apply_trending_delta(
+                    self.title_id, self.pub_date, 1
+                )
+                ScoreBucket.objects.apply_delta(self.title_id, self.score, 1)
+            elif loaded_score is not None and self.score != loaded_score:
+                Title.objects.apply_review_delta(
+                    self.title_id, self.score - loaded_score, 0
+                )
+                ScoreBucket.objects.apply_delta(
+                    self.title_id, loaded_score, -1
+                )
+                ScoreBucket.objects.apply_delta(self.title_id, self.score, 1)
+        self._loaded_score = self.score
+
+
+class CommentQuerySet(models.QuerySet):
+    """Выборки комментариев для встраивания в ответы об отзывах."""
+
+    def first_for_reviews(self, review_ids, limit):
+        """
+        Не более limit первых комментариев каждого из отзывов одним
+        запросом. У комментариев заполнен атрибут author_username.
+        Возвращает словарь {review_id: [комментарии]}.
+        """
+        return first_in_groups(
+            self, 'review_id', review_ids, (F('pub_date'), F('id')), limit
+        )
+
 
 class Comment(models.Model):
     """Модель для комментариев."""
@@ -111,6 +526,8 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
     )
 
+    objects = CommentQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
@@ -118,3 +535,300 @@ class Comment(models.Model):
 
     def __str__(self):
         return self.text
+
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет комментарий и в той же транзакции обновляет счётчик
+        комментариев и последний комментарий отзыва.
+        """
+        adding = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if adding:
+                Review.objects.filter(pk=self.review_id).update(
+                    comments_count=F('comments_count') + 1,
+                    latest_comment=self,
+                )
+
+
+class ScoreBucketQuerySet(models.QuerySet):
+    """Операции над гистограммами оценок произведений."""
+
+    def apply_delta(self, title_id, score, delta):
+        """
+        Изменяет счётчик оценки произведения на delta.
+        Строка для оценки создаётся при первом отзыве с такой оценкой.
+        """
+        updated = self.filter(title_id=title_id, score=score).update(
+            count=F('count') + delta
+        )
+        if updated or delta <= 0:
+            return
+        try:
+            with transaction.atomic():
+                self.create(title_id=title_id, score=score, count=delta)
+        except IntegrityError:
+            self.filter(title_id=title_id, score=score).update(
+                count=F('count') + delta
+            )
+
+    def rebuild(self, batch_size=1000):
+        """
+        Пересобирает гистограммы всех произведений по таблице отзывов.
+        Возвращает количество созданных строк.
+        """
+        counts = (Review.objects.order_by().values('title_id', 'score')
+                  .annotate(total=Count('id')).values_list(
+                      'title_id', 'score', 'total'))
+        created = 0
+        with transaction.atomic():
+            self.all().delete()
+            buckets = []
+            for title_id, score, total in counts.iterator():
+                buckets.append(
+                    self.model(title_id=title_id, score=score, count=total)
+                )
+                if len(buckets) >= batch_size:
+                    created += len(self.bulk_create(buckets))
+                    buckets = []
+            created += len(self.bulk_create(buckets))
+        return created
+
+
+class ScoreBucket(models.Model):
+    """Количество отзывов с определённой оценкой для произведения."""
+    title = models.ForeignKey(
+        Title,
+        verbose_name='Произведение',
+        on_delete=models.CASCADE,
+        related_name='score_buckets',
+    )
+    score = models.PositiveSmallIntegerField(verbose_name='Оценка')
+    count = models.PositiveIntegerField(
+        verbose_name='Количество отзывов',
+        default=0,
+    )
+
+    objects = ScoreBucketQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Гистограмма оценок'
+        verbose_name_plural = 'Гистограммы оценок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['title', 'score'],
+                name='unique_title_score'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.title_id}: {self.score} x {self.count}'
+
+
+class HelpfulShardQuerySet(models.QuerySet):
+    """
+    Счётчик отметок «полезно», разбитый на HELPFUL_SHARDS строк на отзыв.
+    Запись увеличивает случайную строку, поэтому одновременные отметки
+    популярного отзыва не конкурируют за одну строку. Значение строки
+    может быть отрицательным, если отметки снимались.
+    """
+
+    def apply_delta(self, review_id, delta):
+        shard = random.randrange(settings.HELPFUL_SHARDS)
+        updated = self.filter(review_id=review_id, shard=shard).update(
+            count=F('count') + delta
+        )
+        if updated:
+            return
+        try:
+            with transaction.atomic():
+                self.create(review_id=review_id, shard=shard, count=delta)
+        except IntegrityError:
+            self.filter(review_id=review_id, shard=shard).update(
+                count=F('count') + delta
+            )
+
+    def compact(self, batch_size=500):
+        """
+        Переносит значения строк счётчика в Review.helpful_count
+        и удаляет опустевшие строки. Значения вычитаются, а не
+        обнуляются, поэтому отметки, сделанные во время переноса,
+        не теряются. Возвращает id произведений изменённых отзывов.
+        """
+        title_ids = set()
+        last_id = 0
+        while True:
+            with transaction.atomic():
+                shards = list(
+                    self.filter(id__gt=last_id).order_by('id')
+                    .values('id', 'review_id', 'review__title_id', 'count')
+                    [:batch_size]
+                )
+                totals = {}
+                for shard in shards:
+                    totals[shard['review_id']] = (
+                        totals.get(shard['review_id'], 0) + shard['count']
+                    )
+                    self.filter(pk=shard['id']).update(
+                        count=F('count') - shard['count']
+                    )
+                    title_ids.add(shard['review__title_id'])
+                for review_id, total in totals.items():
+                    Review.objects.filter(pk=review_id).update(
+                        helpful_count=F('helpful_count') + total
+                    )
+                self.filter(
+                    id__in=[shard['id'] for shard in shards], count=0
+                ).delete()
+            if shards:
+                last_id = shards[-1]['id']
+            if len(shards) < batch_size:
+                return title_ids
+
+
+class HelpfulShard(models.Model):
+    """Одна из строк счётчика отметок «полезно» отзыва."""
+    review = models.ForeignKey(
+        Review,
+        verbose_name='Отзыв',
+        on_delete=models.CASCADE,
+        related_name='helpful_shards',
+    )
+    shard = models.PositiveSmallIntegerField(verbose_name='Номер строки')
+    count = models.IntegerField(verbose_name='Отметки', default=0)
+
+    objects = HelpfulShardQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Счётчик отметок «полезно»'
+        verbose_name_plural = 'Счётчики отметок «полезно»'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['review', 'shard'],
+                name='unique_review_shard'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.review_id}[{self.shard}]: {self.count}'
+
+
+class HelpfulVoteQuerySet(models.QuerySet):
+    """Отметки «полезно», не больше одной от пользователя на отзыв."""
+
+    def add(self, user, review):
+        """
+        Сохраняет отметку и увеличивает счётчик. Повторная отметка
+        отклоняется ограничением unique_user_review: IntegrityError.
+        """
+        with transaction.atomic():
+            self.create(user=user, review=review)
+            HelpfulShard.objects.apply_delta(review.id, 1)
+
+    def remove(self, user, review):
+        """
+        Снимает отметку, счётчик уменьшает сигнал post_delete.
+        Возвращает False, если отметки не было.
+        """
+        deleted, _ = self.filter(user=user, review=review).delete()
+        return bool(deleted)
+
+
+class HelpfulVote(models.Model):
+    """Отметка пользователя «отзыв полезен»."""
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='helpful_votes',
+    )
+    review = models.ForeignKey(
+        Review,
+        verbose_name='Отзыв',
+        on_delete=models.CASCADE,
+        related_name='helpful_votes',
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата отметки',
+        auto_now_add=True,
+    )
+
+    objects = HelpfulVoteQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Отметка «полезно»'
+        verbose_name_plural = 'Отметки «полезно»'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'review'],
+                name='unique_user_review'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user_id} -> {self.review_id}'
+
+
+class IdempotencyKeyQuerySet(models.QuerySet):
+    """Сохранённые ответы на повторяемые POST-запросы."""
+
+    def expired(self):
+        return self.filter(
+            created__lt=timezone.now() - settings.IDEMPOTENCY_KEY_TTL
+        )
+
+    def sweep(self, batch_size=1000):
+        """
+        Удаляет просроченные ключи порциями по batch_size строк.
+        Возвращает количество удалённых ключей.
+        """
+        deleted = 0
+        while True:
+            ids = list(self.expired().order_by('id')
+                       .values_list('id', flat=True)[:batch_size])
+            if ids:
+                deleted += self.filter(id__in=ids).delete()[0]
+            if len(ids) < batch_size:
+                return deleted
+
+
+class IdempotencyKey(models.Model):
+    """
+    Ответ на POST-запрос с заголовком Idempotency-Key. Повтор запроса
+    с тем же ключом получает сохранённый ответ без повторной записи.
+    """
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        related_name='+',
+    )
+    key = models.CharField(verbose_name='Ключ', max_length=255)
+    path = models.CharField(verbose_name='Путь запроса', max_length=255)
+    status_code = models.PositiveSmallIntegerField(
+        verbose_name='Статус ответа'
+    )
+    response = models.JSONField(
+        verbose_name='Тело ответа',
+        encoder=DjangoJSONEncoder,
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата запроса',
+        auto_now_add=True,
+        db_index=True,
+    )
+
+    objects = IdempotencyKeyQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Ключ идемпотентности'
+        verbose_name_plural = 'Ключи идемпотентности'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'key'],
+                name='unique_user_idempotency_key'
+            )
+        ]
+
+    def __str__(self):
+        return f'{self.user_id}: {self.key}'
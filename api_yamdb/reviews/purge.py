@@ -0,0 +1,220 @@
+"""
+Удаление произведений и пользователей порциями.
+
+Коллектор Django перед каскадным удалением загружает в память все
+связанные отзывы и комментарии и удаляет их в одной транзакции.
+Здесь зависимые строки удаляются от листьев к корню запросами
+DELETE ... WHERE id IN (...) не больше PURGE_CHUNK_SIZE строк за раз,
+каждая порция — в отдельной короткой транзакции. Сигналы post_delete
+для удалённых порциями строк не отправляются, поэтому рейтинги,
+гистограммы и счётчики комментариев и отметок «полезно»
+корректируются здесь же, а вместо сигналов отправляется `purged`.
+Сам корневой объект удаляется обычным delete(), когда у него остаются
+только небольшие связи.
+"""
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import connections, transaction
+from django.dispatch import Signal
+
+from reviews.models import (Comment, HelpfulShard, HelpfulVote, Review,
+                            ScoreBucket, Title)
+
+logger = logging.getLogger(__name__)
+
+# Отправляется после удаления порции отзывов или комментариев,
+# instances — несохранённые объекты с id и родительским id
+# (у комментариев — с отзывом, содержащим id произведения).
+purged = Signal()
+
+
+def get_chunk_size():
+    return settings.PURGE_CHUNK_SIZE
+
+
+def raw_delete(model, field, values, using='default'):
+    """DELETE FROM таблица WHERE field IN (values) без коллектора."""
+    if not values:
+        return 0
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    column = model._meta.get_field(field).column
+    placeholders = ', '.join(['%s'] * len(values))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} '
+            f'WHERE {quote(column)} IN ({placeholders})',
+            list(values),
+        )
+        return cursor.rowcount
+
+
+def send_purged(model, instances):
+    transaction.on_commit(
+        lambda: purged.send(sender=model, instances=instances)
+    )
+
+
+def purge_review_children(model, review_ids, chunk_size):
+    """Удаляет порциями строки model, ссылающиеся на отзывы review_ids."""
+    while True:
+        with transaction.atomic():
+            ids = list(
+                model.objects.filter(review_id__in=review_ids)
+                .order_by('id').values_list('id', flat=True)[:chunk_size]
+            )
+            raw_delete(model, 'id', ids)
+        if len(ids) < chunk_size:
+            return
+
+
+def purge_review_dependents(review_ids, chunk_size):
+    """Удаляет комментарии и отметки «полезно» отзывов review_ids."""
+    Review.objects.filter(id__in=review_ids).update(latest_comment=None)
+    for model in (Comment, HelpfulVote, HelpfulShard):
+        purge_review_children(model, review_ids, chunk_size)
+
+
+def subtract_reviews(rows):
+    """Вычитает удалённые отзывы из рейтингов и гистограмм произведений."""
+    totals = Counter()
+    counts = Counter()
+    buckets = Counter()
+    for row in rows:
+        totals[row['title_id']] += row['score']
+        counts[row['title_id']] += 1
+        buckets[row['title_id'], row['score']] += 1
+        Title.objects.apply_trending_delta(
+            row['title_id'], row['pub_date'], -1
+        )
+    for title_id, count in counts.items():
+        Title.objects.apply_review_delta(title_id, -totals[title_id], -count)
+    for (title_id, score), count in buckets.items():
+        ScoreBucket.objects.apply_delta(title_id, score, -count)
+
+
+def purge_reviews(reviews, chunk_size, keep_ratings=True):
+    """
+    Удаляет порциями отзывы из queryset reviews вместе с комментариями.
+    При keep_ratings рейтинги и гистограммы произведений уменьшаются
+    на удалённые оценки.
+    """
+    deleted = 0
+    while True:
+        rows = list(
+            reviews.order_by('id')
+            .values('id', 'title_id', 'score', 'pub_date')[:chunk_size]
+        )
+        ids = [row['id'] for row in rows]
+        purge_review_dependents(ids, chunk_size)
+        with transaction.atomic():
+            # Строки, добавленные после удаления зависимых порций.
+            for model in (Comment, HelpfulVote, HelpfulShard):
+                raw_delete(model, 'review', ids)
+            deleted += raw_delete(Review, 'id', ids)
+            if keep_ratings:
+                subtract_reviews(rows)
+            send_purged(Review, [
+                Review(id=row['id'], title_id=row['title_id'])
+                for row in rows
+            ])
+        if len(rows) < chunk_size:
+            return deleted
+
+
+def purge_comments(comments, chunk_size):
+    """
+    Удаляет порциями комментарии из queryset comments и пересчитывает
+    счётчики комментариев затронутых отзывов.
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                comments.order_by('id')
+                .values('id', 'review_id', 'review__title_id')[:chunk_size]
+            )
+            deleted += raw_delete(Comment, 'id', [row['id'] for row in rows])
+            Review.objects.filter(
+                id__in={row['review_id'] for row in rows}
+            ).recount_comments()
+            send_purged(Comment, [
+                Comment(id=row['id'], review=Review(
+                    id=row['review_id'], title_id=row['review__title_id']
+                ))
+                for row in rows
+            ])
+        if len(rows) < chunk_size:
+            return deleted
+
+
+def purge_votes(votes, chunk_size):
+    """
+    Удаляет порциями отметки «полезно» из queryset votes и уменьшает
+    счётчики отмеченных отзывов.
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            rows = list(
+                votes.order_by('id').values('id', 'review_id')[:chunk_size]
+            )
+            deleted += raw_delete(
+                HelpfulVote, 'id', [row['id'] for row in rows]
+            )
+            counts = Counter(row['review_id'] for row in rows)
+            for review_id, count in counts.items():
+                HelpfulShard.objects.apply_delta(review_id, -count)
+        if len(rows) < chunk_size:
+            return deleted
+
+
+def purge_title(title, chunk_size=None):
+    """Удаляет произведение с отзывами и комментариями порциями."""
+    chunk_size = chunk_size or get_chunk_size()
+    purge_reviews(
+        Review.objects.filter(title_id=title.id), chunk_size,
+        keep_ratings=False,
+    )
+    title.delete()
+
+
+def purge_user(user, chunk_size=None):
+    """
+    Удаляет пользователя порциями: сначала его отметки «полезно»
+    и комментарии, затем его отзывы с комментариями к ним, затем самого
+    пользователя.
+    """
+    chunk_size = chunk_size or get_chunk_size()
+    purge_votes(HelpfulVote.objects.filter(user_id=user.id), chunk_size)
+    purge_comments(Comment.objects.filter(author_id=user.id), chunk_size)
+    purge_reviews(Review.objects.filter(author_id=user.id), chunk_size)
+    user.delete()
+
+
+def purge_in_background(purge, instance):
+    """
+    Запускает удаление в фоновом потоке со своим соединением с базой.
+    Поток не переживает процесс: при остановке процесса удаление
+    прерывается после последней зафиксированной порции, и объект
+    остаётся удалённым частично. Его можно удалить повторно.
+    Ошибка удаления записывается в журнал, клиент уже получил ответ 202.
+    """
+    def run():
+        try:
+            purge(instance)
+        except Exception:
+            logger.exception(
+                'Фоновое удаление %s %s не завершено.',
+                instance._meta.verbose_name, instance.pk,
+            )
+        finally:
+            for connection in connections.all():
+                connection.close()
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
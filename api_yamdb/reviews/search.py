@@ -0,0 +1,130 @@
+"""
+Полнотекстовый поиск произведений на основе виртуальной таблицы SQLite FTS5.
+
+Индекс хранит только токены названия и описания (external content),
+сами данные берутся из таблицы произведений. Синхронизацию выполняют
+триггеры, поэтому индекс обновляется при любой записи в таблицу,
+включая bulk_create и удаление в командах импорта.
+"""
+import re
+
+TITLE_TABLE = 'reviews_title'
+TITLE_SEARCH_TABLE = 'reviews_title_fts'
+
+# Вес совпадения в названии и в описании для ранжирования bm25.
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+CREATE_INDEX_SQL = (
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {TITLE_SEARCH_TABLE}
+    USING fts5(
+        name, description,
+        content='{TITLE_TABLE}', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TITLE_SEARCH_TABLE}_ai
+    AFTER INSERT ON {TITLE_TABLE} BEGIN
+        INSERT INTO {TITLE_SEARCH_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TITLE_SEARCH_TABLE}_ad
+    AFTER DELETE ON {TITLE_TABLE} BEGIN
+        INSERT INTO {TITLE_SEARCH_TABLE}(
+            {TITLE_SEARCH_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {TITLE_SEARCH_TABLE}_au
+    AFTER UPDATE OF name, description ON {TITLE_TABLE} BEGIN
+        INSERT INTO {TITLE_SEARCH_TABLE}(
+            {TITLE_SEARCH_TABLE}, rowid, name, description)
+        VALUES ('delete', old.id, old.name, old.description);
+        INSERT INTO {TITLE_SEARCH_TABLE}(rowid, name, description)
+        VALUES (new.id, new.name, new.description);
+    END
+    """,
+)
+
+DROP_INDEX_SQL = (
+    f'DROP TRIGGER IF EXISTS {TITLE_SEARCH_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {TITLE_SEARCH_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {TITLE_SEARCH_TABLE}_au',
+    f'DROP TABLE IF EXISTS {TITLE_SEARCH_TABLE}',
+)
+
+SEARCH_WHERE = (
+    f'{TITLE_SEARCH_TABLE}.rowid = {TITLE_TABLE}.id',
+    f'{TITLE_SEARCH_TABLE} MATCH %s',
+)
+SEARCH_RANK = (
+    f'bm25({TITLE_SEARCH_TABLE}, {NAME_WEIGHT}, {DESCRIPTION_WEIGHT})'
+)
+
+
+def is_supported(connection):
+    """Поиск через FTS5 доступен только для SQLite."""
+    return connection.vendor == 'sqlite'
+
+
+def _index_objects(cursor):
+    cursor.execute(
+        "SELECT name FROM sqlite_master WHERE name LIKE %s",
+        [f'{TITLE_SEARCH_TABLE}%'],
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def ensure_title_search_index(connection):
+    """
+    Создаёт виртуальную таблицу и триггеры, если их нет.
+    SQLite удаляет триггеры при пересоздании таблицы в миграциях,
+    поэтому в этом случае индекс заново заполняется целиком.
+    """
+    if (not is_supported(connection)
+            or TITLE_TABLE not in connection.introspection.table_names()):
+        return
+    expected = {TITLE_SEARCH_TABLE} | {
+        f'{TITLE_SEARCH_TABLE}_{suffix}' for suffix in ('ai', 'ad', 'au')
+    }
+    with connection.cursor() as cursor:
+        missing = expected - _index_objects(cursor)
+        if not missing:
+            return
+        for sql in CREATE_INDEX_SQL:
+            cursor.execute(sql)
+    rebuild_title_search_index(connection)
+
+
+def drop_title_search_index(connection):
+    if not is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        for sql in DROP_INDEX_SQL:
+            cursor.execute(sql)
+
+
+def rebuild_title_search_index(connection):
+    """Заполняет индекс заново по таблице произведений."""
+    if not is_supported(connection):
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {TITLE_SEARCH_TABLE}({TITLE_SEARCH_TABLE}) "
+            f"VALUES ('rebuild')"
+        )
+
+
+def build_match_query(text):
+    """
+    Превращает пользовательский ввод в запрос FTS5: каждое слово
+    ищется как префикс, все слова должны встретиться в произведении.
+    Спецсимволы синтаксиса FTS5 во вводе не интерпретируются.
+    """
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{word}"*' for word in words)
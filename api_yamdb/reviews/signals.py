@@ -0,0 +1,51 @@
+from django.db import connections
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from reviews.models import (Comment, HelpfulShard, HelpfulVote, Review,
+                            ScoreBucket, Title)
+from reviews.search import ensure_title_search_index
+
+
+@receiver(post_delete, sender=Review)
+def review_deleted(sender, instance, **kwargs):
+    """
+    Вычитает оценку удалённого отзыва из рейтинга, популярности
+    и гистограммы оценок произведения. Сигнал срабатывает и при каскадном
+    удалении, внутри транзакции удаления.
+    """
+    Title.objects.apply_review_delta(instance.title_id, -instance.score, -1)
+    Title.objects.apply_trending_delta(
+        instance.title_id, instance.pub_date, -1
+    )
+    ScoreBucket.objects.apply_delta(instance.title_id, instance.score, -1)
+    # Строки счётчика, созданные helpful_vote_deleted при каскадном
+    # удалении отметок этого отзыва.
+    HelpfulShard.objects.filter(review_id=instance.id).delete()
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    """
+    Уменьшает счётчик комментариев отзыва и выбирает новый последний
+    комментарий. При каскадном удалении отзыва обновление его строки
+    ничего не меняет.
+    """
+    Review.objects.apply_comment_delta(instance.review_id, -1)
+
+
+@receiver(post_delete, sender=HelpfulVote)
+def helpful_vote_deleted(sender, instance, **kwargs):
+    """
+    Уменьшает счётчик отметок «полезно» отзыва, в том числе при
+    каскадном удалении пользователя.
+    """
+    HelpfulShard.objects.apply_delta(instance.review_id, -1)
+
+
+def restore_title_search_index(sender, using, **kwargs):
+    """
+    Восстанавливает триггеры поискового индекса после миграций:
+    SQLite теряет их, когда миграция пересоздаёт таблицу произведений.
+    """
+    ensure_title_search_index(connections[using])
@@ -0,0 +1,119 @@
+"""
+Буфер счётчиков просмотров произведений.
+
+Просмотр не записывается в базу сразу: увеличения копятся в памяти
+процесса и переносятся одним UPDATE ... CASE для всех накопленных
+произведений. Перенос выполняется фоновым потоком раз в
+VIEW_COUNTER_FLUSH_INTERVAL секунд, при накоплении VIEW_COUNTER_MAX_PENDING
+просмотров и при завершении процесса. При аварийном завершении теряются
+просмотры не более чем за VIEW_COUNTER_FLUSH_INTERVAL секунд.
+Перенос увеличивает версии ресурса просмотров `views` и ресурсов
+`views:{id}` перенесённых произведений. От них зависят только ответы,
+где просмотры важны: произведение и список, отсортированный по просмотрам.
+Остальные закешированные списки показывают прежние значения `view_count`
+до следующего изменения произведений.
+"""
+import atexit
+import logging
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, F, IntegerField, Value, When
+
+from api.cache import bump_version
+from reviews.models import Title
+
+# Каждое условие CASE занимает два параметра запроса,
+# SQLite ограничивает их число 999.
+FLUSH_BATCH_SIZE = 400
+
+logger = logging.getLogger(__name__)
+
+
+class ViewCounterBuffer:
+    """Накопитель просмотров, общий для всех потоков процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.pending = Counter()
+        self.total = 0
+        self.timer = None
+
+    def record(self, title_id):
+        """
+        Учитывает просмотр произведения. Вызывается при ответе на запрос,
+        поэтому ошибка переноса при заполненном буфере только
+        записывается в журнал: просмотры остаются в буфере.
+        """
+        with self.lock:
+            self.pending[title_id] += 1
+            self.total += 1
+            full = self.total >= settings.VIEW_COUNTER_MAX_PENDING
+            if self.timer is None and not full:
+                self.start_timer()
+        if full:
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('Просмотры не перенесены в базу.')
+
+    def start_timer(self):
+        self.timer = threading.Timer(
+            settings.VIEW_COUNTER_FLUSH_INTERVAL, self.flush_on_timer
+        )
+        self.timer.daemon = True
+        self.timer.start()
+
+    def flush_on_timer(self):
+        try:
+            self.flush()
+        finally:
+            # У потока таймера своё соединение с базой.
+            connection.close()
+
+    def take(self):
+        with self.lock:
+            pending, self.pending, self.total = self.pending, Counter(), 0
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        return pending
+
+    def flush(self):
+        """
+        Переносит накопленные просмотры в базу. При ошибке просмотры
+        возвращаются в буфер. Возвращает количество перенесённых
+        просмотров.
+        """
+        pending = self.take()
+        if not pending:
+            return 0
+        items = list(pending.items())
+        updated = 0
+        try:
+            with transaction.atomic():
+                for start in range(0, len(items), FLUSH_BATCH_SIZE):
+                    batch = items[start:start + FLUSH_BATCH_SIZE]
+                    updated += Title.objects.filter(
+                        id__in=[title_id for title_id, _ in batch]
+                    ).update(view_count=F('view_count') + Case(
+                        *(When(id=title_id, then=Value(count))
+                          for title_id, count in batch),
+                        output_field=IntegerField(),
+                    ))
+        except Exception:
+            with self.lock:
+                self.pending.update(pending)
+                self.total += sum(pending.values())
+            raise
+        if updated:
+            bump_version('views')
+            for title_id in pending:
+                bump_version(f'views:{title_id}')
+        return sum(pending.values())
+
+
+view_counter = ViewCounterBuffer()
+atexit.register(view_counter.flush)
@@ -1,6 +1,15 @@
 from django.contrib import admin
 from django.contrib.auth import get_user_model
 
+from users.models import OutboxEmail
+
 User = get_user_model()
 
 admin.site.register(User)
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ('to', 'subject', 'created', 'attempts', 'sent_at')
+    list_filter = ('sent_at',)
+    search_fields = ('to',)
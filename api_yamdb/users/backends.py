@@ -0,0 +1,219 @@
+"""
+Почтовый бэкенд, дописывающий письма в файлы-сегменты NDJSON.
+
+Файловый бэкенд Django создаёт отдельный файл на каждое письмо. Здесь
+письма копятся в буфере процесса и дописываются в текущий сегмент
+в EMAIL_FILE_PATH одной записью: раз в EMAIL_FLUSH_INTERVAL секунд,
+при накоплении EMAIL_MAX_PENDING писем, при закрытии явно открытого
+соединения и при завершении процесса. Сегмент сменяется, когда его
+размер достигает EMAIL_SEGMENT_MAX_BYTES или он старше
+EMAIL_SEGMENT_MAX_AGE. Каждый процесс пишет в свои сегменты, имя
+сегмента начинается со времени его создания.
+"""
+import atexit
+import json
+import os
+import threading
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.serializers.json import DjangoJSONEncoder
+
+SEGMENT_SUFFIX = '.ndjson'
+SEGMENT_TIME_FORMAT = '%Y%m%d-%H%M%S-%f'
+
+
+def get_segment_paths(directory):
+    """Сегменты каталога directory от старых к новым."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    return [
+        os.path.join(directory, name) for name in sorted(names)
+        if name.endswith(SEGMENT_SUFFIX)
+    ]
+
+
+def get_segment_opened(path):
+    """Время создания сегмента из его имени."""
+    stamp = os.path.basename(path).rsplit('-', 1)[0]
+    return datetime.strptime(stamp, SEGMENT_TIME_FORMAT).replace(
+        tzinfo=timezone.utc
+    )
+
+
+class SegmentWriter:
+    """Буфер писем одного каталога, общий для всех потоков процесса."""
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.lock = threading.Lock()
+        # Запись в файл не должна идти параллельно из таймера и close().
+        self.write_lock = threading.Lock()
+        self.pending = []
+        self.timer = None
+        self.segment = None
+        self.segment_size = 0
+        self.segment_opened = None
+
+    def write(self, records):
+        """Добавляет записи в буфер."""
+        lines = [
+            json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False)
+            + '\n'
+            for record in records
+        ]
+        with self.lock:
+            self.pending.extend(lines)
+            full = len(self.pending) >= settings.EMAIL_MAX_PENDING
+            if self.timer is None and not full:
+                self.start_timer()
+        if full:
+            self.flush()
+
+    def start_timer(self):
+        self.timer = threading.Timer(
+            settings.EMAIL_FLUSH_INTERVAL, self.flush
+        )
+        self.timer.daemon = True
+        self.timer.start()
+
+    def take(self):
+        with self.lock:
+            pending, self.pending = self.pending, []
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        return pending
+
+    def get_segment(self):
+        """Текущий сегмент; новый, если текущий заполнен или устарел."""
+        now = datetime.now(timezone.utc)
+        if (
+            self.segment is None
+            or self.segment_size >= settings.EMAIL_SEGMENT_MAX_BYTES
+            or now - self.segment_opened >= settings.EMAIL_SEGMENT_MAX_AGE
+        ):
+            name = (
+                f'{now.strftime(SEGMENT_TIME_FORMAT)}-{os.getpid()}'
+                f'{SEGMENT_SUFFIX}'
+            )
+            self.segment = os.path.join(self.directory, name)
+            self.segment_size = 0
+            self.segment_opened = now
+        return self.segment
+
+    def next_chunk(self, lines):
+        """
+        Первые строки lines, помещающиеся в текущий сегмент,
+        но не меньше одной.
+        """
+        limit = settings.EMAIL_SEGMENT_MAX_BYTES - self.segment_size
+        chunk = []
+        size = 0
+        for line in lines:
+            if chunk and size + len(line) > limit:
+                break
+            chunk.append(line)
+            size += len(line)
+        return chunk, size
+
+    def flush(self):
+        """
+        Дописывает накопленные письма в сегменты. При ошибке незаписанные
+        письма возвращаются в буфер. Возвращает количество записанных писем.
+        """
+        with self.write_lock:
+            pending = [line.encode() for line in self.take()]
+            written = 0
+            try:
+                os.makedirs(self.directory, exist_ok=True)
+                while written < len(pending):
+                    segment = self.get_segment()
+                    chunk, size = self.next_chunk(pending[written:])
+                    with open(segment, 'ab') as stream:
+                        stream.write(b''.join(chunk))
+                    self.segment_size += size
+                    written += len(chunk)
+            except Exception:
+                with self.lock:
+                    self.pending[:0] = [
+                        line.decode() for line in pending[written:]
+                    ]
+                raise
+            return written
+
+
+writers = {}
+writers_lock = threading.Lock()
+
+
+def get_writer(directory):
+    directory = os.path.abspath(directory)
+    with writers_lock:
+        if directory not in writers:
+            writers[directory] = SegmentWriter(directory)
+        return writers[directory]
+
+
+def flush_all():
+    for writer in list(writers.values()):
+        writer.flush()
+
+
+atexit.register(flush_all)
+
+
+class SegmentEmailBackend(BaseEmailBackend):
+    """
+    Сохраняет письма в сегменты NDJSON, по одной строке на письмо.
+    Письма, отправленные через явно открытое соединение, записываются
+    при его закрытии: так порция писем команды send_outbox сохраняется
+    одной записью до того, как письма будут отмечены отправленными.
+    """
+
+    def __init__(self, file_path=None, **kwargs):
+        super().__init__(**kwargs)
+        self.writer = get_writer(file_path or settings.EMAIL_FILE_PATH)
+        self.opened = False
+
+    def open(self):
+        if self.opened:
+            return False
+        self.opened = True
+        return True
+
+    def close(self):
+        if not self.opened:
+            return
+        self.opened = False
+        try:
+            self.writer.flush()
+        except Exception:
+            if not self.fail_silently:
+                raise
+
+    def send_messages(self, email_messages):
+        if not email_messages:
+            return 0
+        now = datetime.now(timezone.utc)
+        records = [
+            {
+                'date': now,
+                'from': message.from_email,
+                'to': message.recipients(),
+                'subject': message.subject,
+                'body': message.body,
+                'message': message.message().as_string(),
+            }
+            for message in email_messages
+        ]
+        try:
+            self.writer.write(records)
+        except Exception:
+            if not self.fail_silently:
+                raise
+            return 0
+        return len(records)
@@ -0,0 +1,76 @@
+import json
+import re
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_datetime
+
+from users.backends import get_segment_opened, get_segment_paths
+
+CODE_PATTERN = re.compile(r'Ваш код подтверждения для доступа: (\S+)')
+
+
+def read_codes(path, email):
+    """Пары (дата, код) писем сегмента path, отправленных на email."""
+    with open(path, encoding='utf-8') as stream:
+        for line in stream:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # Недописанная строка при аварийном завершении процесса.
+                continue
+            if email not in (address.lower() for address in record['to']):
+                continue
+            match = CODE_PATTERN.search(record['body'])
+            if match:
+                yield parse_datetime(record['date']), match.group(1)
+
+
+def find_latest_code(directory, email):
+    """
+    Последний код подтверждения, отправленный на email. Сегменты
+    просматриваются от новых к старым, пока сегмент может содержать
+    письма новее найденного: процессы пишут в свои сегменты
+    одновременно, и в сегмент пишут до EMAIL_SEGMENT_MAX_AGE после
+    его создания.
+    """
+    email = email.lower()
+    latest = None
+    for path in reversed(get_segment_paths(directory)):
+        opened = get_segment_opened(path)
+        if (
+            latest is not None
+            and opened + settings.EMAIL_SEGMENT_MAX_AGE < latest[0]
+        ):
+            break
+        for found in read_codes(path, email):
+            if latest is None or found[0] >= latest[0]:
+                latest = found
+    return latest and latest[1]
+
+
+class Command(BaseCommand):
+    """
+    Выводит последний код подтверждения, отправленный на адрес,
+    из писем, сохранённых бэкендом SegmentEmailBackend.
+    Запуск команды:
+    python3 manage.py latest_confirmation_code user@example.com
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument('email', help='Recipient address')
+        parser.add_argument(
+            '--path',
+            default=None,
+            help='Directory with email segments, EMAIL_FILE_PATH by default'
+        )
+
+    def handle(self, *args, **kwargs):
+        code = find_latest_code(
+            kwargs['path'] or settings.EMAIL_FILE_PATH, kwargs['email']
+        )
+        if code is None:
+            raise CommandError(
+                f'Код подтверждения для {kwargs["email"]} не найден.'
+            )
+        self.stdout.write(code)
@@ -0,0 +1,54 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from users.outbox import send_batch
+
+
+class Command(BaseCommand):
+    """
+    Отправляет письма из очереди: коды подтверждения и другие письма,
+    поставленные в очередь при обработке запросов.
+    Запуск команды: python3 manage.py send_outbox
+    Постоянная отправка: python3 manage.py send_outbox --loop
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Number of emails sent over one connection'
+        )
+        parser.add_argument(
+            '--loop',
+            action='store_true',
+            help='Keep polling the outbox instead of exiting when it is empty'
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=1.0,
+            help='Seconds to wait between polls of an empty outbox'
+        )
+
+    def handle(self, *args, **kwargs):
+        total_sent = total_failed = 0
+        while True:
+            sent, failed = send_batch(kwargs['batch_size'])
+            total_sent += sent
+            total_failed += failed
+            if sent or failed:
+                if kwargs['loop']:
+                    self.stdout.write(
+                        f'Отправлено писем: {sent}, не отправлено: {failed}'
+                    )
+                continue
+            if not kwargs['loop']:
+                break
+            connection.close()
+            time.sleep(kwargs['interval'])
+        self.stdout.write(
+            f'Отправлено писем: {total_sent}, не отправлено: {total_failed}'
+        )
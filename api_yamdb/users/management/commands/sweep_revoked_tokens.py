@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from users.models import RevokedToken
+
+
+class Command(BaseCommand):
+    """
+    Удаляет отзывы токенов, срок действия которых уже истёк.
+    Запускается периодически, например раз в день.
+    Запуск команды: python3 manage.py sweep_revoked_tokens
+    """
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of rows deleted per query'
+        )
+
+    def handle(self, *args, **kwargs):
+        deleted = RevokedToken.objects.sweep(batch_size=kwargs['batch_size'])
+        self.stdout.write(f'Удалено просроченных отзывов: {deleted}')
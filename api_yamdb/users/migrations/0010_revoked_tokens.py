@@ -0,0 +1,35 @@
+# Generated by Django 3.2 on 2026-10-18 20:24
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0009_user_token_version'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(blank=True, db_index=True, max_length=255, verbose_name='Идентификатор токена')),
+                ('revoked_before', models.DateTimeField(blank=True, null=True, verbose_name='Отозваны токены, выданные до')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата отзыва')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Срок хранения')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Отозванный токен',
+                'verbose_name_plural': 'Отозванные токены',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='revokedtoken',
+            constraint=models.CheckConstraint(check=models.Q(models.Q(_negated=True, jti=''), models.Q(('revoked_before__isnull', False), ('user__isnull', False)), _connector='OR'), name='revoked_token_jti_or_user'),
+        ),
+    ]
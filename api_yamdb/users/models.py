@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 from .validators import validate_username
 
@@ -39,6 +41,42 @@ class User(AbstractUser):
         verbose_name='О себе',
         blank=True
     )
+    token_version = models.PositiveIntegerField(
+        verbose_name='Версия токенов',
+        default=0,
+    )
+
+    # Поля, копии которых передаются в токене доступа. Их изменение
+    # увеличивает token_version, и выданные токены перестают
+    # использоваться вместо записи пользователя.
+    TOKEN_CLAIM_FIELDS = ('role', 'is_superuser', 'username', 'is_active')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._token_claims = instance.get_token_claims()
+        return instance
+
+    def get_token_claims(self):
+        return {
+            field: getattr(self, field) for field in self.TOKEN_CLAIM_FIELDS
+            if field in self.__dict__
+        }
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_token_claims', {})
+        # Изменённые поля нужны обработчикам post_save.
+        self.changed_token_claims = {
+            field for field, value in loaded.items()
+            if getattr(self, field) != value
+        }
+        if self.changed_token_claims:
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+        super().save(*args, **kwargs)
+        self._token_claims = self.get_token_claims()
 
     @property
     def is_moderator(self):
@@ -55,3 +93,169 @@ class User(AbstractUser):
         ordering = ['id']
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
+
+
+class OutboxEmailQuerySet(models.QuerySet):
+    """Очередь писем, отправляемых командой send_outbox."""
+
+    def enqueue(self, subject, message, recipient_list, from_email=None):
+        """
+        Ставит письмо в очередь. Вызывается в транзакции, создающей
+        данные для письма: при её откате письмо не будет отправлено.
+        """
+        return self.create(
+            subject=subject,
+            body=message,
+            from_email=from_email or '',
+            to='\n'.join(recipient_list),
+        )
+
+    def due(self):
+        """Неотправленные письма, время отправки которых наступило."""
+        return self.filter(
+            sent_at=None,
+            next_attempt_at__lte=timezone.now(),
+            attempts__lt=settings.OUTBOX_MAX_ATTEMPTS,
+        )
+
+
+class OutboxEmail(models.Model):
+    """Письмо в очереди на отправку."""
+    subject = models.CharField(verbose_name='Тема', max_length=255)
+    body = models.TextField(verbose_name='Текст')
+    from_email = models.CharField(
+        verbose_name='Отправитель',
+        max_length=254,
+        blank=True,
+    )
+    to = models.TextField(verbose_name='Получатели')
+    created = models.DateTimeField(
+        verbose_name='Дата постановки в очередь',
+        auto_now_add=True,
+    )
+    next_attempt_at = models.DateTimeField(
+        verbose_name='Время следующей попытки',
+        default=timezone.now,
+        db_index=True,
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Неудачные попытки',
+        default=0,
+    )
+    last_error = models.TextField(verbose_name='Последняя ошибка', blank=True)
+    sent_at = models.DateTimeField(
+        verbose_name='Дата отправки',
+        null=True,
+        blank=True,
+    )
+
+    objects = OutboxEmailQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Письмо в очереди'
+        verbose_name_plural = 'Письма в очереди'
+
+    def __str__(self):
+        return f'{self.to}: {self.subject}'
+
+    @property
+    def recipients(self):
+        return self.to.split('\n')
+
+
+class RevokedTokenQuerySet(models.QuerySet):
+    """Отозванные токены доступа."""
+
+    def get_expires_at(self):
+        # Отозванный токен выдан не раньше текущего момента минус
+        # срок жизни токена, после этого запись не нужна.
+        return timezone.now() + settings.SIMPLE_JWT['ACCESS_TOKEN_LIFETIME']
+
+    def revoke_jti(self, jti):
+        """Отзывает токен с идентификатором jti."""
+        return self.create(jti=jti, expires_at=self.get_expires_at())
+
+    def revoke_user(self, user):
+        """Отзывает все токены пользователя, выданные до текущего момента."""
+        return self.create(
+            user=user,
+            revoked_before=timezone.now(),
+            expires_at=self.get_expires_at(),
+        )
+
+    def active(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+    def sweep(self, batch_size=1000):
+        """
+        Удаляет просроченные отзывы порциями по batch_size строк.
+        Копии отзывов в процессах их уже не учитывают.
+        Возвращает количество удалённых записей.
+        """
+        deleted = 0
+        while True:
+            ids = list(self.expired().order_by('id')
+                       .values_list('id', flat=True)[:batch_size])
+            if ids:
+                deleted += self.filter(id__in=ids).delete()[0]
+            if len(ids) < batch_size:
+                return deleted
+
+
+class RevokedToken(models.Model):
+    """
+    Отзыв токена доступа: по идентификатору jti или всех токенов
+    пользователя, выданных до revoked_before.
+    """
+    jti = models.CharField(
+        verbose_name='Идентификатор токена',
+        max_length=255,
+        blank=True,
+        db_index=True,
+    )
+    user = models.ForeignKey(
+        User,
+        verbose_name='Пользователь',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='+',
+    )
+    revoked_before = models.DateTimeField(
+        verbose_name='Отозваны токены, выданные до',
+        null=True,
+        blank=True,
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата отзыва',
+        auto_now_add=True,
+    )
+    expires_at = models.DateTimeField(
+        verbose_name='Срок хранения',
+        db_index=True,
+    )
+
+    objects = RevokedTokenQuerySet.as_manager()
+
+    class Meta:
+        ordering = ['id']
+        verbose_name = 'Отозванный токен'
+        verbose_name_plural = 'Отозванные токены'
+        constraints = [
+            models.CheckConstraint(
+                check=(
+                    ~models.Q(jti='')
+                    | models.Q(
+                        user__isnull=False, revoked_before__isnull=False
+                    )
+                ),
+                name='revoked_token_jti_or_user',
+            ),
+        ]
+
+    def __str__(self):
+        return self.jti or f'{self.user_id} до {self.revoked_before}'
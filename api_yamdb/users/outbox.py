@@ -0,0 +1,99 @@
+"""
+Отправка писем из очереди OutboxEmail.
+
+Письмо ставится в очередь в той же транзакции, что и данные, о которых
+оно сообщает, и отправляется командой send_outbox вне запроса. Команда
+резервирует порцию писем, сдвигая next_attempt_at на OUTBOX_LEASE, и
+отправляет её через одно соединение с почтовым сервером. Письмо, которое
+не удалось отправить, получает следующую попытку через OUTBOX_RETRY_DELAY,
+удваиваемую с каждой неудачей; после OUTBOX_MAX_ATTEMPTS попыток письмо
+остаётся в таблице с последней ошибкой.
+"""
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.utils import timezone
+
+from users.models import OutboxEmail
+
+RESULT_FIELDS = ['attempts', 'next_attempt_at', 'last_error', 'sent_at']
+
+
+def get_retry_delay(attempts):
+    """Задержка перед следующей попыткой после attempts неудач."""
+    delay = settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1)
+    return min(delay, settings.OUTBOX_MAX_RETRY_DELAY)
+
+
+def record_failure(email, error):
+    """Записывает неудачную попытку и время следующей."""
+    email.attempts += 1
+    email.next_attempt_at = timezone.now() + get_retry_delay(email.attempts)
+    email.sent_at = None
+    email.last_error = repr(error)
+
+
+def lease_batch(batch_size):
+    """
+    Резервирует до batch_size писем, время отправки которых наступило.
+    Письма, зарезервированные другим процессом, пропускаются.
+    """
+    now = timezone.now()
+    lease_until = now + settings.OUTBOX_LEASE
+    ids = list(
+        OutboxEmail.objects.due().order_by('next_attempt_at', 'id')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+    OutboxEmail.objects.filter(
+        id__in=ids, sent_at=None, next_attempt_at__lte=now
+    ).update(next_attempt_at=lease_until)
+    return list(
+        OutboxEmail.objects.filter(id__in=ids, next_attempt_at=lease_until)
+    )
+
+
+def send_batch(batch_size=None):
+    """
+    Отправляет порцию писем из очереди.
+    Возвращает количество отправленных и неотправленных писем.
+    """
+    emails = lease_batch(batch_size or settings.OUTBOX_BATCH_SIZE)
+    if not emails:
+        return 0, 0
+    sent = []
+    failed = 0
+    connection = get_connection()
+    try:
+        connection.open()
+        for email in emails:
+            message = EmailMessage(
+                subject=email.subject,
+                body=email.body,
+                from_email=email.from_email or None,
+                to=email.recipients,
+                connection=connection,
+            )
+            try:
+                message.send()
+            except Exception as error:
+                record_failure(email, error)
+                failed += 1
+            else:
+                email.sent_at = timezone.now()
+                email.last_error = ''
+                sent.append(email)
+    finally:
+        try:
+            connection.close()
+        except Exception as error:
+            # Письма, переданные соединению, могли не дойти до сервера.
+            for email in sent:
+                record_failure(email, error)
+            failed += len(sent)
+            sent = []
+        finally:
+            # Результаты записываются и при обрыве соединения: письма без
+            # результата будут повторены по истечении резерва.
+            OutboxEmail.objects.bulk_update(emails, RESULT_FIELDS)
+    return len(sent), failed
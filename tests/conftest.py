@@ -1,6 +1,8 @@
 import os
 import sys
 
+import pytest
+from django.core.cache import caches
 from django.utils.version import get_version
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
@@ -33,3 +35,23 @@ assert get_version() < '4.0.0', 'Пожалуйста, используйте в
 pytest_plugins = [
     'tests.fixtures.fixture_user',
 ]
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """База очищается между тестами, поэтому кеш ответов тоже."""
+    from api.authentication import clear_caches
+    from api.revocation import revocations
+    for cache in caches.all():
+        cache.clear()
+    clear_caches()
+    revocations.reset()
+
+
+@pytest.fixture(autouse=True)
+def empty_view_counter():
+    """Просмотры из теста не переносятся в базу следующего теста."""
+    from reviews.view_counter import view_counter
+    view_counter.take()
+    yield
+    view_counter.take()
@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from reviews.models import Title
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test08TitleRating:
+
+    def get_title(self, client, title_id):
+        response = client.get(f'/api/v1/titles/{title_id}/')
+        assert response.status_code == HTTPStatus.OK
+        return response.json()
+
+    def test_01_rating_follows_review_changes(self, admin_client, user_client,
+                                              moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+
+        review = create_single_review(user_client, title_id, 'text', 3).json()
+        create_single_review(moderator_client, title_id, 'text', 8)
+        assert self.get_title(admin_client, title_id)['rating'] == 5, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'создании отзыва.'
+        )
+
+        response = user_client.patch(
+            f'{url}{review["id"]}/', data={'score': 10}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.get_title(admin_client, title_id)['rating'] == 9, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'изменении оценки отзыва.'
+        )
+
+        response = user_client.delete(f'{url}{review["id"]}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert self.get_title(admin_client, title_id)['rating'] == 8, (
+            'Проверьте, что рейтинг произведения пересчитывается при '
+            'удалении отзыва.'
+        )
+
+    def test_02_recompute_ratings(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        create_single_review(user_client, title_id, 'text', 7)
+        Title.objects.filter(pk=title_id).update(
+            rating_sum=0, review_count=0, rating=None
+        )
+
+        call_command('recompute_ratings')
+
+        title = Title.objects.get(pk=title_id)
+        assert (title.rating_sum, title.review_count, title.rating) == (
+            7, 1, 7
+        ), (
+            'Проверьте, что команда `recompute_ratings` восстанавливает '
+            'рейтинг произведения по таблице отзывов.'
+        )
+        assert Title.objects.get(pk=titles[1]['id']).rating is None
@@ -0,0 +1,63 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test09CursorPagination:
+
+    def walk(self, client, url):
+        ids = []
+        response = client.get(url)
+        while True:
+            assert response.status_code == HTTPStatus.OK
+            data = response.json()
+            assert 'count' not in data, (
+                f'Проверьте, что курсорная пагинация `{url}` не '
+                'возвращает ключ `count`.'
+            )
+            ids.extend(obj['id'] for obj in data['results'])
+            if not data['next']:
+                return ids
+            response = client.get(data['next'])
+
+    def test_01_titles_cursor(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        ids = self.walk(client, '/api/v1/titles/?cursor=&limit=1')
+        assert ids == sorted(title['id'] for title in titles), (
+            'Проверьте, что курсорная пагинация `/api/v1/titles/` '
+            'возвращает все произведения в порядке id.'
+        )
+
+        response = client.get('/api/v1/titles/')
+        assert 'count' in response.json(), (
+            'Проверьте, что без параметра `cursor` для `/api/v1/titles/` '
+            'сохраняется пагинация limit/offset.'
+        )
+
+    def test_02_reviews_and_comments_cursor(self, client, admin_client,
+                                            admin, user_client, user,
+                                            moderator_client, moderator):
+        author_map = {
+            admin: admin_client,
+            user: user_client,
+            moderator: moderator_client
+        }
+        comments, reviews, titles = create_comments(admin_client, author_map)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+
+        ids = self.walk(client, f'{url}?cursor=&limit=2')
+        assert ids == [review['id'] for review in reviews], (
+            'Проверьте, что курсорная пагинация отзывов возвращает все '
+            'отзывы в порядке публикации.'
+        )
+
+        ids = self.walk(
+            client, f'{url}{reviews[0]["id"]}/comments/?cursor=&limit=2'
+        )
+        assert ids == [comment['id'] for comment in comments], (
+            'Проверьте, что курсорная пагинация комментариев возвращает все '
+            'комментарии в порядке публикации.'
+        )
@@ -0,0 +1,67 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from reviews.models import ScoreBucket
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test10ScoreHistogram:
+
+    def get_histogram(self, client, title_id):
+        url = f'/api/v1/titles/{title_id}/score-histogram/'
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+            'статусом 200.'
+        )
+        return {row['score']: row['count'] for row in response.json()}
+
+    def test_01_histogram(self, client, admin_client, user_client,
+                          moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review = create_single_review(user_client, title_id, 'text', 3)
+        create_single_review(moderator_client, title_id, 'text', 3)
+
+        histogram = self.get_histogram(client, title_id)
+        assert sorted(histogram) == list(range(1, 11))
+        assert histogram[3] == 2 and sum(histogram.values()) == 2, (
+            'Проверьте, что гистограмма оценок обновляется при создании '
+            'отзыва.'
+        )
+
+        url = f'/api/v1/titles/{title_id}/reviews/{review.json()["id"]}/'
+        user_client.patch(url, data={'score': 9})
+        histogram = self.get_histogram(client, title_id)
+        assert (histogram[3], histogram[9]) == (1, 1), (
+            'Проверьте, что гистограмма оценок обновляется при изменении '
+            'оценки отзыва.'
+        )
+
+        user_client.delete(url)
+        histogram = self.get_histogram(client, title_id)
+        assert (histogram[3], histogram[9]) == (1, 0), (
+            'Проверьте, что гистограмма оценок обновляется при удалении '
+            'отзыва.'
+        )
+
+        assert sum(self.get_histogram(client, titles[1]['id']).values()) == 0
+        response = client.get('/api/v1/titles/0/score-histogram/')
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_02_rebuild_command(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        create_single_review(user_client, titles[0]['id'], 'text', 4)
+        ScoreBucket.objects.all().delete()
+
+        call_command('rebuild_score_histograms')
+
+        assert list(
+            ScoreBucket.objects.values_list('title_id', 'score', 'count')
+        ) == [(titles[0]['id'], 4, 1)], (
+            'Проверьте, что команда `rebuild_score_histograms` '
+            'восстанавливает гистограммы по таблице отзывов.'
+        )
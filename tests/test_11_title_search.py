@@ -0,0 +1,48 @@
+from http import HTTPStatus
+
+import pytest
+from reviews.models import Title
+
+from tests.utils import create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test11TitleSearch:
+
+    def search(self, client, query):
+        response = client.get('/api/v1/titles/', {'search': query})
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что GET-запрос к `/api/v1/titles/?search=` '
+            'возвращает ответ со статусом 200.'
+        )
+        return [title['id'] for title in response.json()['results']]
+
+    def test_01_search(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        terminator, die_hard = titles[0]['id'], titles[1]['id']
+
+        assert self.search(client, 'термин') == [terminator], (
+            'Проверьте, что поиск находит произведение по префиксу слова '
+            'из названия.'
+        )
+        assert self.search(client, 'yippie') == [die_hard], (
+            'Проверьте, что поиск находит произведение по описанию.'
+        )
+        assert self.search(client, 'back" (*') == [terminator], (
+            'Проверьте, что спецсимволы запроса не ломают поиск.'
+        )
+
+        response = admin_client.patch(
+            f'/api/v1/titles/{die_hard}/',
+            data={'description': 'Терминатор здесь ни при чём'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        assert self.search(client, 'терминатор') == [terminator, die_hard], (
+            'Проверьте, что поиск учитывает изменения произведений и '
+            'ранжирует совпадения в названии выше совпадений в описании.'
+        )
+
+        Title.objects.filter(pk=terminator).delete()
+        assert self.search(client, 'терминатор') == [die_hard], (
+            'Проверьте, что удалённые произведения не находятся поиском.'
+        )
@@ -0,0 +1,90 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from api.cache import cache_stats
+from django.core.cache.backends.locmem import LocMemCache
+from reviews.models import Category
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test12CatalogCache:
+
+    def test_01_anonymous_cache(self, client, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        stats = cache_stats()
+
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        response = client.get(url)
+        assert response['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный анонимный GET-запрос к `{url}` '
+            'отдаётся из кеша.'
+        )
+        assert cache_stats()['hits'] == stats['hits'] + 1
+        assert cache_stats()['misses'] == stats['misses'] + 1
+
+        create_single_review(user_client, titles[0]['id'], 'text', 6)
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['rating'] == 6, (
+            'Проверьте, что новый отзыв инвалидирует кеш произведения.'
+        )
+
+        response = user_client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        assert 'X-Cache' not in response, (
+            'Проверьте, что ответы авторизованным пользователям '
+            'не кешируются.'
+        )
+
+    def test_02_invalidation_by_resource(self, client, admin_client):
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/categories/?search=a&limit=5')
+        assert client.get(
+            '/api/v1/categories/?limit=5&search=a'
+        )['X-Cache'] == 'HIT', (
+            'Проверьте, что порядок параметров запроса не влияет на ключ кеша.'
+        )
+
+        admin_client.post(
+            '/api/v1/genres/', data={'name': 'Ужасы', 'slug': 'horror'}
+        )
+        response = client.get('/api/v1/genres/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['count'] == 1
+        assert client.get(
+            '/api/v1/categories/?search=a&limit=5'
+        )['X-Cache'] == 'HIT', (
+            'Проверьте, что изменение жанров не инвалидирует кеш категорий.'
+        )
+
+    def test_03_cache_disabled(self, client, settings):
+        settings.CATALOG_CACHE_ENABLED = False
+        client.get('/api/v1/genres/')
+        assert 'X-Cache' not in client.get('/api/v1/genres/')
+
+    def test_04_change_in_other_process(self, client, settings, monkeypatch):
+        url = '/api/v1/categories/'
+        etag = client.get(url)['ETag']
+        # Другой процесс со своим кешем: его версии здесь не видны.
+        with monkeypatch.context() as patch:
+            patch.setattr(
+                'api.cache.get_cache', lambda: LocMemCache('other', {})
+            )
+            Category.objects.create(name='Новая', slug='new')
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == (
+            HTTPStatus.NOT_MODIFIED
+        )
+
+        now = time.time() + settings.CATALOG_VERSION_TIMEOUT + 1
+        monkeypatch.setattr('time.time', lambda: now)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что версии ресурсов хранятся в кеше не дольше '
+            '`CATALOG_VERSION_TIMEOUT`.'
+        )
+        assert response.json()['results'][0]['slug'] == 'new'
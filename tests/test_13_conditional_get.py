@@ -0,0 +1,151 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_comments, create_reviews
+
+
+@pytest.mark.django_db(transaction=True)
+class Test13ConditionalGet:
+
+    def check_etag(self, client, url):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        etag = response.get('ETag')
+        assert etag and response.get('Last-Modified'), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` содержит '
+            'заголовки ETag и Last-Modified.'
+        )
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            f'Проверьте, что GET-запрос к `{url}` с актуальным '
+            'If-None-Match возвращает ответ со статусом 304.'
+        )
+        assert not response.content
+        return etag
+
+    def test_01_etag_for_read_endpoints(self, client, admin_client, admin,
+                                        user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        title_id = titles[0]['id']
+        for url in (
+            '/api/v1/categories/',
+            '/api/v1/genres/',
+            '/api/v1/titles/',
+            f'/api/v1/titles/{title_id}/',
+            f'/api/v1/titles/{title_id}/reviews/',
+            f'/api/v1/titles/{title_id}/reviews/{reviews[0]["id"]}/',
+            f'/api/v1/titles/{title_id}/reviews/{reviews[0]["id"]}'
+            '/comments/',
+        ):
+            self.check_etag(client, url)
+        self.check_etag(admin_client, '/api/v1/users/')
+
+    def test_02_etag_changes_on_write(self, client, admin_client, admin,
+                                      user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        other_url = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        etag = self.check_etag(client, url)
+        other_etag = self.check_etag(client, other_url)
+
+        user_client.patch(f'{url}{reviews[1]["id"]}/', data={'text': 'new'})
+
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после изменения отзыва ETag списка отзывов '
+            'меняется.'
+        )
+        assert response['ETag'] != etag
+        response = client.get(other_url, HTTP_IF_NONE_MATCH=other_etag)
+        assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что изменение отзыва не меняет ETag отзывов '
+            'к другим произведениям.'
+        )
+
+    def test_03_missing_parent_is_not_modified(self, client, admin_client,
+                                               admin, user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        comments_url = f'{url}{reviews[0]["id"]}/comments/'
+        etag = self.check_etag(client, url)
+        comments_etag = self.check_etag(client, comments_url)
+
+        admin_client.delete(f'{url}{reviews[0]["id"]}/')
+        response = client.get(comments_url, HTTP_IF_NONE_MATCH=comments_etag)
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что условный GET-запрос к комментариям удалённого '
+            'отзыва возвращает ответ со статусом 404.'
+        )
+        admin_client.delete(f'/api/v1/titles/{titles[0]["id"]}/')
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что условный GET-запрос к отзывам удалённого '
+            'произведения возвращает ответ со статусом 404.'
+        )
+        response = client.get(
+            '/api/v1/titles/9999/reviews/', HTTP_IF_NONE_MATCH='*'
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND
+
+    def test_04_etag_changes_on_author_rename(self, client, admin_client,
+                                              admin, user_client, user):
+        reviews, titles = create_reviews(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        etag = self.check_etag(client, url)
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'username': 'renamed'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что после переименования автора ETag списка '
+            'отзывов меняется.'
+        )
+
+    def test_05_user_changes_keep_unrelated_etags(self, client, admin_client,
+                                                  admin, user_client, user):
+        _, reviews, titles = create_comments(
+            admin_client, {admin: admin_client, user: user_client}
+        )
+        reviews_url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        urls = (
+            reviews_url,
+            f'{reviews_url}{reviews[0]["id"]}/comments/',
+            f'/api/v1/titles/{titles[0]["id"]}/?expand=reviews',
+        )
+        etags = [self.check_etag(client, url) for url in urls]
+
+        response = client.post('/api/v1/auth/signup/', data={
+            'email': 'new@yamdb.fake', 'username': 'newcomer'
+        })
+        assert response.status_code == HTTPStatus.OK
+        response = user_client.patch(
+            '/api/v1/users/me/', data={'bio': 'О себе'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        for url, etag in zip(urls, etags):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+                'Проверьте, что регистрация и изменение профиля без смены '
+                f'имени не меняют ETag `{url}`.'
+            )
+
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'username': 'renamed'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        for url, etag in zip(urls, etags):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == HTTPStatus.OK, (
+                'Проверьте, что после переименования автора меняется ETag '
+                f'`{url}`.'
+            )
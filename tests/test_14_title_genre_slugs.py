@@ -0,0 +1,64 @@
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from tests.utils import create_categories, create_genre
+
+
+def genre_slug_lookups(queries):
+    return [
+        query['sql'] for query in queries
+        if 'FROM "reviews_genre" WHERE "reviews_genre"."slug"' in query['sql']
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test14TitleGenreSlugs:
+
+    def test_01_genres_resolved_in_one_query(self, admin_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        data = {
+            'name': 'Чудо-женщина',
+            'year': 1984,
+            'genre': [genre['slug'] for genre in genres],
+            'category': categories[0]['slug'],
+            'description': 'Ура!'
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        assert len(genre_slug_lookups(context.captured_queries)) == 1, (
+            'Проверьте, что жанры произведения загружаются одним запросом.'
+        )
+        assert [genre['slug'] for genre in response.json()['genre']] == (
+            data['genre']
+        )
+
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.patch(
+                f'/api/v1/titles/{response.json()["id"]}/',
+                data={'genre': data['genre'][:2]}
+            )
+        assert response.status_code == HTTPStatus.OK
+        assert len(genre_slug_lookups(context.captured_queries)) == 1
+
+    def test_02_unknown_slugs(self, admin_client):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        data = {
+            'name': 'Чудо-женщина',
+            'year': 1984,
+            'genre': [genres[0]['slug'], 'unknown', 'missing'],
+            'category': categories[0]['slug'],
+            'description': 'Ура!'
+        }
+        response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        errors = response.json()['genre']
+        assert len(errors) == 2 and 'unknown' in errors[0], (
+            'Проверьте, что для каждого несуществующего жанра '
+            'возвращается ошибка валидации.'
+        )
@@ -0,0 +1,106 @@
+import json
+from http import HTTPStatus
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from reviews.models import Title
+
+from tests.utils import create_categories, create_genre
+
+URL = '/api/v1/titles/bulk/'
+
+
+def make_items(count, genres, categories):
+    return [
+        {
+            'name': f'Произведение {number}',
+            'year': 2000 + number % 20,
+            'genre': [genre['slug'] for genre in genres],
+            'category': categories[number % 2]['slug'],
+            'description': f'Описание {number}',
+        }
+        for number in range(count)
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test15TitleBulk:
+
+    def test_01_bulk_json(self, admin_client):
+        items = make_items(
+            50, create_genre(admin_client), create_categories(admin_client)
+        )
+        with CaptureQueriesContext(connection) as context:
+            response = admin_client.post(URL, data=items, format='json')
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Проверьте, что корректный POST-запрос администратора к `{URL}` '
+            'возвращает ответ со статусом 201.'
+        )
+        assert response.json()['created'] == 50
+        assert len(context.captured_queries) < 15, (
+            'Проверьте, что число запросов к базе при пакетной загрузке '
+            'не зависит от количества произведений.'
+        )
+        title = Title.objects.get(pk=response.json()['ids'][-1])
+        assert title.name == 'Произведение 49'
+        assert title.genre.count() == 3
+
+        response = admin_client.get('/api/v1/titles/', {'search': '49'})
+        assert [item['id'] for item in response.json()['results']] == [
+            title.id
+        ]
+
+    def test_02_bulk_ndjson(self, admin_client):
+        items = make_items(
+            3, create_genre(admin_client), create_categories(admin_client)
+        )
+        body = '\n'.join(json.dumps(item) for item in items) + '\n'
+        response = admin_client.post(
+            URL, data=body, content_type='application/x-ndjson'
+        )
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Проверьте, что `{URL}` принимает данные в формате NDJSON.'
+        )
+        assert Title.objects.count() == 3
+
+    def test_03_bulk_errors(self, admin_client, user_client):
+        items = make_items(
+            3, create_genre(admin_client), create_categories(admin_client)
+        )
+        items[1]['genre'] = ['unknown']
+        items[2]['year'] = 3000
+        response = admin_client.post(URL, data=items, format='json')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        errors = response.json()['errors']
+        assert [error['index'] for error in errors] == [1, 2], (
+            'Проверьте, что ошибки пакетной загрузки возвращаются '
+            'для каждого некорректного элемента.'
+        )
+        assert 'genre' in errors[0]['errors']
+        assert 'year' in errors[1]['errors']
+        assert Title.objects.count() == 0
+
+        response = user_client.post(URL, data=items[:1], format='json')
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+    def test_04_bulk_does_not_reuse_deleted_ids(self, admin_client):
+        items = make_items(
+            3, create_genre(admin_client), create_categories(admin_client)
+        )
+        response = admin_client.post(URL, data=items, format='json')
+        last_id = response.json()['ids'][-1]
+        Title.objects.filter(pk=last_id).delete()
+
+        response = admin_client.post(URL, data=items[:2], format='json')
+        assert response.status_code == HTTPStatus.CREATED
+        assert min(response.json()['ids']) > last_id, (
+            'Проверьте, что пакетная загрузка не использует повторно id '
+            'удалённых произведений.'
+        )
+        response = admin_client.post(
+            '/api/v1/titles/', data=items[0], format='json'
+        )
+        assert response.json()['id'] > max(Title.objects.exclude(
+            pk=response.json()['id']
+        ).values_list('id', flat=True))
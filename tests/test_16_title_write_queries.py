@@ -0,0 +1,51 @@
+from http import HTTPStatus
+
+import pytest
+
+from tests.utils import create_categories, create_genre, create_single_review
+
+
+@pytest.mark.django_db(transaction=True)
+class Test16TitleWriteQueries:
+
+    def test_01_create_and_update_representation(
+            self, admin_client, user_client, django_assert_num_queries):
+        genres = create_genre(admin_client)
+        categories = create_categories(admin_client)
+        data = {
+            'name': 'Чудо-женщина',
+            'year': 1984,
+            'genre': [genres[0]['slug'], genres[1]['slug']],
+            'category': categories[0]['slug'],
+            'description': 'Ура!'
+        }
+        # Жанры, категория, INSERT и четыре запроса на запись связей
+        # с жанрами; пользователь берётся из кеша аутентификации,
+        # ответ строится без запросов.
+        with django_assert_num_queries(7):
+            response = admin_client.post('/api/v1/titles/', data=data)
+        assert response.status_code == HTTPStatus.CREATED
+        title = response.json()
+        assert title['rating'] is None
+        assert [genre['slug'] for genre in title['genre']] == data['genre']
+        assert title['category'] == categories[0]
+
+        create_single_review(user_client, title['id'], 'text', 7)
+        url = f'/api/v1/titles/{title["id"]}/'
+
+        # Произведение с категорией, жанры, новые жанры, UPDATE
+        # и пять запросов на замену связей с жанрами.
+        with django_assert_num_queries(9):
+            response = admin_client.patch(url, data={'genre': ['drama']})
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['rating'] == 7, (
+            'Проверьте, что ответ на PATCH-запрос к `/api/v1/titles/{id}/` '
+            'содержит актуальный рейтинг произведения.'
+        )
+        assert response.json()['genre'] == [genres[2]]
+
+        with django_assert_num_queries(3):
+            response = admin_client.patch(url, data={'name': 'Новое имя'})
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['genre'] == [genres[2]]
+        assert response.json()['rating'] == 7
@@ -0,0 +1,128 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.management import call_command
+from django.utils import timezone
+from reviews.models import Review, Title
+
+from tests.utils import create_titles
+
+User = get_user_model()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test17Leaderboards:
+
+    def create_reviews(self, title_id, scores):
+        for score in scores:
+            author = User.objects.create(
+                username=f'author_{User.objects.count()}',
+                email=f'author_{User.objects.count()}@yamdb.fake',
+            )
+            Review.objects.create(
+                title_id=title_id, author=author, text='text', score=score
+            )
+
+    def get_ids(self, client, url):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+            'статусом 200.'
+        )
+        assert isinstance(response.json(), list), (
+            f'Проверьте, что ответ на GET-запрос к `{url}` — список '
+            'произведений без пагинации.'
+        )
+        return [title['id'] for title in response.json()]
+
+    def test_01_top(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        single, popular = titles[0]['id'], titles[1]['id']
+        self.create_reviews(single, [10])
+        self.create_reviews(popular, [9] * 6)
+
+        assert self.get_ids(client, '/api/v1/titles/top/') == [
+            popular, single
+        ], (
+            'Проверьте, что произведение с одной высокой оценкой не '
+            'опережает произведение с множеством высоких оценок.'
+        )
+        assert self.get_ids(client, '/api/v1/titles/top/?limit=1') == [
+            popular
+        ]
+
+        Review.objects.filter(title_id=single).delete()
+        assert self.get_ids(client, '/api/v1/titles/top/') == [popular], (
+            'Проверьте, что произведения без отзывов не попадают '
+            'в подборку лучших.'
+        )
+        title = Title.objects.get(pk=single)
+        assert title.weighted_rating is None and title.rating is None
+
+    def test_02_trending(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        self.create_reviews(first, [5])
+        self.create_reviews(second, [5, 5])
+
+        assert self.get_ids(client, '/api/v1/titles/trending/') == [
+            second, first
+        ], (
+            'Проверьте, что популярность произведения растёт с числом '
+            'свежих отзывов.'
+        )
+
+        Review.objects.filter(title_id=second).update(
+            pub_date=timezone.now() - timedelta(days=30)
+        )
+        call_command('refresh_leaderboards')
+        assert self.get_ids(client, '/api/v1/titles/trending/') == [first], (
+            'Проверьте, что отзывы старше окна популярности не учитываются '
+            'после команды `refresh_leaderboards`.'
+        )
+
+        Review.objects.filter(title_id=first).delete()
+        assert Title.objects.get(pk=first).trending_score is None
+        assert self.get_ids(client, '/api/v1/titles/trending/') == []
+
+    def test_03_refresh_matches_incremental(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        self.create_reviews(titles[0]['id'], [3, 8, 10])
+        self.create_reviews(titles[1]['id'], [7])
+        expected = dict(Title.objects.values_list(
+            'id', 'trending_score'
+        ))
+        Title.objects.update(weighted_rating=None, trending_score=None)
+
+        call_command('refresh_leaderboards')
+        for title in Title.objects.all():
+            assert title.trending_score == pytest.approx(
+                expected[title.id]
+            ), (
+                'Проверьте, что `refresh_leaderboards` пересчитывает '
+                'популярность так же, как при записи отзывов.'
+            )
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert title.weighted_rating == pytest.approx((21 + 5 * 7) / 8)
+
+    def test_04_mean_score_shared_by_processes(self, admin_client, settings):
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        self.create_reviews(first, [10])
+        call_command('refresh_leaderboards')
+        self.create_reviews(second, [2])
+        # Процесс со своим пустым кешем.
+        for cache in caches.all():
+            cache.clear()
+
+        self.create_reviews(first, [4])
+        min_reviews = settings.LEADERBOARD_MIN_REVIEWS
+        assert Title.objects.get(pk=first).weighted_rating == pytest.approx(
+            (14 + min_reviews * 10) / (2 + min_reviews)
+        ), (
+            'Проверьте, что рейтинг при записи отзыва считается со средней '
+            'оценкой, рассчитанной командой `refresh_leaderboards`.'
+        )
@@ -0,0 +1,74 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth import get_user_model
+from reviews.models import Comment, Review
+
+from tests.utils import assert_query_budget, create_titles
+
+User = get_user_model()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test18ReviewCommentQueries:
+
+    def create_discussion(self, title_id, size):
+        User.objects.bulk_create(
+            User(username=f'author_{i}', email=f'author_{i}@yamdb.fake')
+            for i in range(size)
+        )
+        authors = list(User.objects.filter(username__startswith='author_'))
+        reviews = [
+            Review.objects.create(
+                title_id=title_id, author=author, text='text', score=5
+            )
+            for author in authors
+        ]
+        Comment.objects.bulk_create(
+            Comment(review=reviews[0], author=author, text='text')
+            for author in authors
+        )
+        return reviews[0]
+
+    @pytest.mark.parametrize('size', (1, 20))
+    def test_01_budget_does_not_depend_on_page_size(
+            self, client, admin_client, size):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review = self.create_discussion(title_id, size)
+        reviews_url = f'/api/v1/titles/{title_id}/reviews/'
+        comments_url = f'{reviews_url}{review.id}/comments/'
+
+        # Произведение, количество отзывов, страница с авторами.
+        with assert_query_budget(3, reviews_url):
+            response = client.get(reviews_url, {'limit': 100})
+        assert len(response.json()['results']) == size
+        assert all(row['author'] for row in response.json()['results'])
+
+        # Произведение и страница, без подсчёта количества.
+        with assert_query_budget(2, reviews_url):
+            response = client.get(reviews_url, {'cursor': '', 'limit': 100})
+        assert len(response.json()['results']) == size
+
+        with assert_query_budget(2, f'{reviews_url}{review.id}/'):
+            client.get(f'{reviews_url}{review.id}/')
+
+        # Отзыв, количество комментариев, страница с авторами.
+        with assert_query_budget(3, comments_url):
+            response = client.get(comments_url, {'limit': 100})
+        assert len(response.json()['results']) == size
+
+    def test_02_missing_parent(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        review = self.create_discussion(titles[0]['id'], 1)
+        urls = (
+            '/api/v1/titles/0/reviews/',
+            f'/api/v1/titles/{titles[1]["id"]}/reviews/{review.id}/comments/',
+            f'/api/v1/titles/{titles[0]["id"]}/reviews/0/comments/',
+        )
+        for url in urls:
+            response = client.get(url)
+            assert response.status_code == HTTPStatus.NOT_FOUND, (
+                f'Проверьте, что GET-запрос к `{url}` для несуществующего '
+                'произведения или отзыва возвращает ответ со статусом 404.'
+            )
@@ -0,0 +1,48 @@
+from http import HTTPStatus
+
+import pytest
+from reviews.models import Review, Title
+
+from tests.utils import assert_query_budget, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test19ReviewCreate:
+
+    def test_01_create_queries(self, admin_client, user_client,
+                               moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        moderator_client.post(url, data={'text': 'a', 'score': 7})
+        # Пользователь, произведение, BEGIN, INSERT, рейтинг,
+        # популярность (SELECT и UPDATE), гистограмма.
+        with assert_query_budget(8, url):
+            response = user_client.post(url, data={'text': 'a', 'score': 7})
+        assert response.status_code == HTTPStatus.CREATED
+
+    def test_02_duplicate(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        user_client.post(url, data={'text': 'a', 'score': 7})
+
+        response = user_client.post(url, data={'text': 'b', 'score': 1})
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что повторный отзыв пользователя на произведение '
+            'отклоняется со статусом 400.'
+        )
+        assert response.json() == {'non_field_errors': [
+            'Можно оставить только один отзыв на произведение.'
+        ]}
+        title = Title.objects.get(pk=titles[0]['id'])
+        assert (title.rating_sum, title.review_count) == (7, 1), (
+            'Проверьте, что отклонённый отзыв не меняет рейтинг произведения.'
+        )
+        assert Review.objects.count() == 1
+
+        response = user_client.post(
+            '/api/v1/titles/0/reviews/', data={'score': 100}
+        )
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что POST-запрос к отзывам несуществующего '
+            'произведения возвращает ответ со статусом 404.'
+        )
@@ -0,0 +1,76 @@
+from datetime import timedelta
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+from reviews.models import Review
+
+from tests.utils import assert_query_budget, create_titles
+
+User = get_user_model()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test20TitleExpand:
+
+    def create_reviews(self, title_id, count):
+        now = timezone.now()
+        reviews = []
+        for i in range(count):
+            author, _ = User.objects.get_or_create(
+                username=f'author_{i}', email=f'author_{i}@yamdb.fake'
+            )
+            review = Review.objects.create(
+                title_id=title_id, author=author, text=f'text {i}', score=5
+            )
+            Review.objects.filter(pk=review.pk).update(
+                pub_date=now - timedelta(hours=count - i)
+            )
+            reviews.append(review.id)
+        return reviews[::-1]
+
+    def test_01_expand_list(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        newest = self.create_reviews(titles[0]['id'], 5)
+        self.create_reviews(titles[1]['id'], 1)
+
+        url = '/api/v1/titles/'
+        # Количество, страница, жанры и один запрос на отзывы всех
+        # произведений страницы.
+        with assert_query_budget(4, url):
+            response = client.get(
+                url, {'expand': 'reviews', 'reviews_limit': 2}
+            )
+        results = {
+            title['id']: title for title in response.json()['results']
+        }
+        first = results[titles[0]['id']]['reviews']
+        assert [review['id'] for review in first] == newest[:2], (
+            'Проверьте, что с параметром `expand=reviews` в произведение '
+            'встраиваются `reviews_limit` новейших отзывов.'
+        )
+        assert first[0]['author'] == 'author_4'
+        assert set(first[0]) == {'id', 'text', 'author', 'score', 'pub_date'}
+        assert len(results[titles[1]['id']]['reviews']) == 1
+
+        response = client.get(url)
+        assert 'reviews' not in response.json()['results'][0], (
+            'Проверьте, что без параметра `expand` отзывы не встраиваются.'
+        )
+
+    def test_02_expand_retrieve(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        newest = self.create_reviews(titles[0]['id'], 4)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+
+        response = client.get(url, {'expand': 'reviews'})
+        assert [review['id'] for review in response.json()['reviews']] == (
+            newest[:3]
+        )
+        response = client.get(url, {'expand': 'reviews',
+                                    'reviews_limit': 'bad'})
+        assert len(response.json()['reviews']) == 3
+        response = client.get(
+            f'/api/v1/titles/{titles[1]["id"]}/', {'expand': 'reviews'}
+        )
+        assert response.json()['reviews'] == []
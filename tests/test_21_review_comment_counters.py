@@ -0,0 +1,99 @@
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from reviews.models import Review
+
+from tests.utils import (assert_query_budget, create_single_comment,
+                         create_single_review, create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test21ReviewCommentCounters:
+
+    def get_review(self, client, url, review_id):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        return next(
+            review for review in response.json()['results']
+            if review['id'] == review_id
+        )
+
+    def test_01_counters(self, client, admin_client, user_client,
+                         moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review_id = create_single_review(
+            user_client, title_id, 'text', 5
+        ).json()['id']
+        url = f'/api/v1/titles/{title_id}/reviews/'
+
+        review = self.get_review(client, url, review_id)
+        assert review['comments_count'] == 0
+        assert review['latest_comment'] is None
+        etag = client.get(url)['ETag']
+
+        first = create_single_comment(
+            user_client, title_id, review_id, 'первый'
+        ).json()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что создание комментария меняет ETag списка '
+            'отзывов: в отзыве показывается число комментариев.'
+        )
+        second = create_single_comment(
+            moderator_client, title_id, review_id, 'второй'
+        ).json()
+        with assert_query_budget(3, url):
+            review = self.get_review(client, url, review_id)
+        assert review['comments_count'] == 2, (
+            'Проверьте, что количество комментариев отзыва увеличивается '
+            'при создании комментария.'
+        )
+        assert review['latest_comment'] == second, (
+            'Проверьте, что в отзыве отображается последний комментарий.'
+        )
+
+        user_client.patch(f'{url}{review_id}/', data={'score': 7})
+        moderator_client.delete(f'{url}{review_id}/comments/{second["id"]}/')
+        review = self.get_review(client, url, review_id)
+        assert review['comments_count'] == 1, (
+            'Проверьте, что количество комментариев отзыва уменьшается '
+            'при удалении комментария и не перезаписывается при изменении '
+            'отзыва.'
+        )
+        assert review['latest_comment'] == first
+
+        etag = client.get(url)['ETag']
+        user_client.delete(f'{url}{review_id}/comments/{first["id"]}/')
+        assert client.get(
+            url, HTTP_IF_NONE_MATCH=etag
+        ).status_code == HTTPStatus.OK, (
+            'Проверьте, что удаление комментария меняет ETag списка отзывов.'
+        )
+        review = self.get_review(client, url, review_id)
+        assert (review['comments_count'], review['latest_comment']) == (
+            0, None
+        )
+
+    def test_02_recount_command(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        review_id = create_single_review(
+            user_client, title_id, 'text', 5
+        ).json()['id']
+        comment = create_single_comment(
+            user_client, title_id, review_id, 'text'
+        ).json()
+        Review.objects.update(comments_count=10, latest_comment=None)
+
+        call_command('recount_comments')
+        review = Review.objects.get(pk=review_id)
+        assert review.comments_count == 1, (
+            'Проверьте, что команда `recount_comments` пересчитывает '
+            'количество комментариев.'
+        )
+        assert review.latest_comment_id == comment['id']
+
+        user_client.delete(f'/api/v1/titles/{title_id}/reviews/{review_id}/')
+        assert not Review.objects.exists()
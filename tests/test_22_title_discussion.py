@@ -0,0 +1,80 @@
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth import get_user_model
+from reviews.models import Comment, Review
+
+from tests.utils import assert_query_budget, create_titles
+
+User = get_user_model()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test22TitleDiscussion:
+
+    def create_discussion(self, title_id, reviews_count, comments_count):
+        User.objects.bulk_create(
+            User(username=f'author_{i}', email=f'author_{i}@yamdb.fake')
+            for i in range(max(reviews_count, comments_count))
+        )
+        authors = list(User.objects.filter(username__startswith='author_'))
+        reviews = [
+            Review.objects.create(
+                title_id=title_id, author=author, text='text', score=5
+            )
+            for author in authors[:reviews_count]
+        ]
+        for review in reviews:
+            for author in authors[:comments_count]:
+                Comment.objects.create(
+                    review=review, author=author, text=author.username
+                )
+        return reviews
+
+    def test_01_discussion(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        title_id = titles[0]['id']
+        reviews = self.create_discussion(title_id, 3, 4)
+        url = f'/api/v1/titles/{title_id}/discussion/'
+
+        with assert_query_budget(2, url):
+            response = client.get(url, {'limit': 2, 'comments_limit': 3})
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос к `{url}` возвращает ответ со '
+            'статусом 200.'
+        )
+        data = response.json()
+        assert [review['id'] for review in data['results']] == [
+            reviews[0].id, reviews[1].id
+        ]
+        review = data['results'][0]
+        assert review['comments_count'] == 4
+        assert [comment['text'] for comment in review['comments']] == [
+            'author_0', 'author_1', 'author_2'
+        ], (
+            'Проверьте, что в отзыв встраиваются первые `comments_limit` '
+            'комментариев.'
+        )
+        assert review['comments'][0]['author'] == 'author_0'
+        assert review['latest_comment']['text'] == 'author_3'
+
+        with assert_query_budget(2, url):
+            response = client.get(data['next'])
+        next_page = response.json()
+        assert [review['id'] for review in next_page['results']] == [
+            reviews[2].id
+        ]
+        assert len(next_page['results'][0]['comments']) == 3
+        assert next_page['next'] is None
+
+    def test_02_empty_and_missing(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        response = client.get(f'/api/v1/titles/{titles[0]["id"]}/discussion/')
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['results'] == []
+
+        response = client.get('/api/v1/titles/0/discussion/')
+        assert response.status_code == HTTPStatus.NOT_FOUND, (
+            'Проверьте, что GET-запрос к обсуждению несуществующего '
+            'произведения возвращает ответ со статусом 404.'
+        )
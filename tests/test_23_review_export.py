@@ -0,0 +1,90 @@
+import json
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from reviews.models import Comment, Review
+
+from tests.utils import (create_single_comment, create_single_review,
+                         create_titles)
+
+
+@pytest.mark.django_db(transaction=True)
+class Test23ReviewExport:
+    url = '/api/v1/reviews/export/'
+
+    def create_corpus(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        first = create_single_review(
+            user_client, titles[0]['id'], 'первый', 5
+        ).json()
+        second = create_single_review(
+            user_client, titles[1]['id'], 'второй', 7
+        ).json()
+        create_single_comment(
+            user_client, titles[0]['id'], first['id'], 'комментарий'
+        )
+        return titles, first, second
+
+    def read(self, response):
+        assert response.status_code == HTTPStatus.OK, (
+            f'Проверьте, что GET-запрос администратора к `{self.url}` '
+            'возвращает ответ со статусом 200.'
+        )
+        assert response.streaming, (
+            f'Проверьте, что `{self.url}` отдаёт выгрузку потоком.'
+        )
+        content = b''.join(response.streaming_content).decode()
+        return [json.loads(line) for line in content.splitlines()]
+
+    def test_01_export(self, client, admin_client, user_client):
+        titles, first, second = self.create_corpus(admin_client, user_client)
+
+        assert client.get(self.url).status_code == HTTPStatus.UNAUTHORIZED
+        assert user_client.get(self.url).status_code == (
+            HTTPStatus.FORBIDDEN
+        ), (
+            f'Проверьте, что `{self.url}` доступен только администратору.'
+        )
+
+        records = self.read(admin_client.get(self.url))
+        assert [(record['type'], record['id']) for record in records] == [
+            ('review', first['id']), ('review', second['id']),
+            ('comment', Comment.objects.get().id),
+        ]
+        assert records[0]['author'] == first['author']
+        assert records[0]['text'] == 'первый'
+        assert records[2]['review_id'] == first['id']
+
+        records = self.read(
+            admin_client.get(self.url, {'title_id': titles[1]['id']})
+        )
+        assert [record['id'] for record in records] == [second['id']], (
+            'Проверьте, что выгрузку можно отфильтровать по `title_id`.'
+        )
+
+        Review.objects.filter(pk=first['id']).update(
+            pub_date=timezone.now() - timedelta(days=10)
+        )
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        records = self.read(admin_client.get(self.url, {'since': since}))
+        assert [record['type'] for record in records] == [
+            'review', 'comment'
+        ], 'Проверьте, что выгрузку можно отфильтровать по дате публикации.'
+
+        response = admin_client.get(self.url, {'since': 'вчера'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_command(self, admin_client, user_client, tmp_path):
+        self.create_corpus(admin_client, user_client)
+        output = StringIO()
+        call_command('export_reviews', chunk_size=1, stdout=output)
+        records = [json.loads(line) for line in output.getvalue().splitlines()]
+        assert len(records) == 3
+
+        path = tmp_path / 'reviews.ndjson'
+        call_command('export_reviews', output=str(path), until='2000-01-01')
+        assert path.read_text(encoding='utf-8') == ''
@@ -0,0 +1,142 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from api.cache import get_versions
+from django.contrib.auth import get_user_model
+from reviews.models import Comment, Review, ScoreBucket, Title
+from reviews.purge import purge_comments, purge_in_background
+
+from tests.utils import create_titles
+
+User = get_user_model()
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(settings):
+    settings.PURGE_CHUNK_SIZE = 2
+
+
+@pytest.mark.django_db(transaction=True)
+class Test24Purge:
+
+    def create_corpus(self, title_ids, users):
+        for title_id in title_ids:
+            for score, author in enumerate(users, start=3):
+                review = Review.objects.create(
+                    title_id=title_id, author=author, text='text',
+                    score=score,
+                )
+                for commenter in users:
+                    Comment.objects.create(
+                        review=review, author=commenter, text='text'
+                    )
+
+    def create_users(self, count):
+        return [
+            User.objects.create(
+                username=f'author_{i}', email=f'author_{i}@yamdb.fake'
+            )
+            for i in range(count)
+        ]
+
+    def snapshot(self):
+        titles = list(Title.objects.order_by('id').values_list(
+            'id', 'rating_sum', 'review_count', 'rating'
+        ))
+        reviews = list(Review.objects.order_by('id').values_list(
+            'id', 'comments_count', 'latest_comment'
+        ))
+        buckets = set(ScoreBucket.objects.filter(count__gt=0).values_list(
+            'title_id', 'score', 'count'
+        ))
+        return titles, reviews, buckets
+
+    def test_01_purge_title(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        users = self.create_users(3)
+        self.create_corpus([titles[0]['id'], titles[1]['id']], users)
+
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        response = admin_client.delete(url)
+        assert response.status_code == HTTPStatus.NO_CONTENT, (
+            f'Проверьте, что DELETE-запрос администратора к `{url}` '
+            'возвращает ответ со статусом 204.'
+        )
+        assert not Title.objects.filter(pk=titles[0]['id']).exists()
+        assert not Review.objects.filter(title_id=titles[0]['id']).exists()
+        assert Review.objects.count() == 3
+        assert Comment.objects.count() == 9, (
+            'Проверьте, что при удалении произведения удаляются только '
+            'его отзывы и комментарии к ним.'
+        )
+
+    def test_02_purge_user(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        users = self.create_users(3)
+        self.create_corpus([titles[0]['id'], titles[1]['id']], users)
+
+        response = admin_client.delete(f'/api/v1/users/{users[0].username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert not User.objects.filter(pk=users[0].pk).exists()
+        assert not Review.objects.filter(author=users[0]).exists()
+        assert not Comment.objects.filter(author=users[0]).exists()
+        assert Comment.objects.count() == 8
+
+        incremental = self.snapshot()
+        Title.objects.recompute_ratings()
+        Review.objects.recount_comments()
+        ScoreBucket.objects.rebuild()
+        assert self.snapshot() == incremental, (
+            'Проверьте, что после удаления пользователя рейтинги, '
+            'гистограммы и счётчики комментариев совпадают с пересчётом.'
+        )
+
+    def test_03_purge_async(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        self.create_corpus([titles[0]['id']], self.create_users(3))
+
+        response = admin_client.delete(
+            f'/api/v1/titles/{titles[0]["id"]}/?async=true'
+        )
+        assert response.status_code == HTTPStatus.ACCEPTED, (
+            'Проверьте, что с параметром `async=true` удаление выполняется '
+            'в фоне и возвращается ответ со статусом 202.'
+        )
+        deadline = time.monotonic() + 10
+        while Title.objects.filter(pk=titles[0]['id']).exists():
+            assert time.monotonic() < deadline, (
+                'Проверьте, что фоновое удаление произведения завершается.'
+            )
+            time.sleep(0.05)
+        assert not Review.objects.exists()
+        assert not Comment.objects.exists()
+
+    def test_04_purge_comments_bumps_reviews(self, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        users = self.create_users(2)
+        self.create_corpus([titles[0]['id']], users)
+        resources = [f'reviews:{title["id"]}' for title in titles[:2]]
+        versions = get_versions(resources)
+
+        purge_comments(Comment.objects.filter(author=users[0]), 2)
+        new_versions = get_versions(resources)
+        assert new_versions[0] != versions[0], (
+            'Проверьте, что удаление комментариев порциями меняет версию '
+            'отзывов произведения: в отзыве показывается число '
+            'комментариев.'
+        )
+        assert new_versions[1] == versions[1]
+
+    def test_05_background_failure_is_logged(self, admin_client, caplog):
+        titles, _, _ = create_titles(admin_client)
+        title = Title.objects.get(pk=titles[0]['id'])
+
+        def fail(instance):
+            raise RuntimeError('сбой удаления')
+
+        purge_in_background(fail, title).join(timeout=10)
+        assert 'сбой удаления' in caplog.text, (
+            'Проверьте, что ошибка фонового удаления записывается в журнал.'
+        )
+        assert str(title.pk) in caplog.text
@@ -0,0 +1,134 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from django.contrib.auth import get_user_model
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from reviews.models import HelpfulShard, HelpfulVote, Review
+
+from tests.utils import create_single_review, create_titles
+
+User = get_user_model()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test25HelpfulVotes:
+
+    def get_helpful_count(self, client, url):
+        response = client.get(url)
+        assert response.status_code == HTTPStatus.OK
+        return response.json()['helpful_count']
+
+    def test_01_vote(self, client, admin_client, user_client,
+                     moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        review = create_single_review(
+            user_client, titles[0]['id'], 'text', 5
+        ).json()
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/{review["id"]}/'
+        assert review['helpful_count'] == 0
+
+        assert client.post(f'{url}helpful/').status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+        response = moderator_client.post(f'{url}helpful/')
+        assert response.status_code == HTTPStatus.CREATED, (
+            f'Проверьте, что POST-запрос к `{url}helpful/` отмечает отзыв '
+            'как полезный и возвращает ответ со статусом 201.'
+        )
+        response = moderator_client.post(f'{url}helpful/')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что пользователь может отметить отзыв только '
+            'один раз.'
+        )
+        assert admin_client.post(f'{url}helpful/').status_code == (
+            HTTPStatus.CREATED
+        )
+        assert HelpfulVote.objects.count() == 2
+
+        call_command('compact_helpful_votes')
+        assert self.get_helpful_count(client, url) == 2, (
+            'Проверьте, что после сжатия счётчиков количество отметок '
+            'отображается в отзыве.'
+        )
+        assert not HelpfulShard.objects.exists()
+
+        assert admin_client.delete(f'{url}helpful/').status_code == (
+            HTTPStatus.NO_CONTENT
+        )
+        assert admin_client.delete(f'{url}helpful/').status_code == (
+            HTTPStatus.NOT_FOUND
+        )
+        call_command('compact_helpful_votes')
+        assert self.get_helpful_count(client, url) == 1
+
+        response = moderator_client.delete(url)
+        assert response.status_code == HTTPStatus.NO_CONTENT, (
+            'Проверьте, что отзыв с отметками «полезно» можно удалить.'
+        )
+        assert not HelpfulVote.objects.exists()
+        assert not HelpfulShard.objects.exists()
+
+    def test_02_shards(self, admin_client, user_client, settings):
+        settings.HELPFUL_SHARDS = 4
+        titles, _, _ = create_titles(admin_client)
+        review = Review.objects.get(pk=create_single_review(
+            user_client, titles[0]['id'], 'text', 5
+        ).json()['id'])
+        voters = [
+            User.objects.create(
+                username=f'voter_{i}', email=f'voter_{i}@yamdb.fake'
+            )
+            for i in range(40)
+        ]
+        for voter in voters:
+            HelpfulVote.objects.add(voter, review)
+        shards = HelpfulShard.objects.filter(review=review)
+        assert 1 < shards.count() <= 4, (
+            'Проверьте, что отметки распределяются по нескольким строкам '
+            'счётчика.'
+        )
+        assert sum(shard.count for shard in shards) == 40
+
+        HelpfulVote.objects.remove(voters[0], review)
+        HelpfulShard.objects.compact(batch_size=1)
+        review.refresh_from_db()
+        assert review.helpful_count == 39
+
+        voters[1].delete()
+        admin_client.delete(f'/api/v1/users/{voters[2].username}/')
+        HelpfulShard.objects.compact()
+        review.refresh_from_db()
+        assert review.helpful_count == 37, (
+            'Проверьте, что при удалении пользователя его отметки '
+            'вычитаются из счётчика.'
+        )
+
+    def test_03_compaction_in_other_process(self, client, admin_client,
+                                            user_client, settings,
+                                            monkeypatch):
+        titles, _, _ = create_titles(admin_client)
+        review = create_single_review(
+            user_client, titles[0]['id'], 'text', 5
+        ).json()
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        assert admin_client.post(
+            f'{url}{review["id"]}/helpful/'
+        ).status_code == HTTPStatus.CREATED
+        etag = client.get(url)['ETag']
+        # Команда запущена отдельным процессом со своим кешем.
+        with monkeypatch.context() as patch:
+            patch.setattr(
+                'api.cache.get_cache', lambda: LocMemCache('command', {})
+            )
+            call_command('compact_helpful_votes')
+
+        now = time.time() + settings.CATALOG_VERSION_TIMEOUT + 1
+        monkeypatch.setattr('time.time', lambda: now)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что перенос отметок командой из другого процесса '
+            'меняет ETag списка отзывов.'
+        )
+        assert response.json()['results'][0]['helpful_count'] == 1
@@ -0,0 +1,132 @@
+import logging
+import time
+from http import HTTPStatus
+
+import pytest
+from django.db import OperationalError
+from reviews.models import Title
+from reviews.view_counter import view_counter
+
+from tests.utils import create_titles
+
+
+@pytest.fixture(autouse=True)
+def manual_flush(settings):
+    settings.VIEW_COUNTER_FLUSH_INTERVAL = 60
+    settings.VIEW_COUNTER_MAX_PENDING = 1000
+
+
+@pytest.mark.django_db(transaction=True)
+class Test26TitleViews:
+
+    def view_counts(self):
+        return dict(Title.objects.values_list('id', 'view_count'))
+
+    def test_01_buffered_views(self, client, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        first, second = titles[0]['id'], titles[1]['id']
+        for _ in range(3):
+            assert client.get(f'/api/v1/titles/{first}/').status_code == (
+                HTTPStatus.OK
+            )
+        client.get(f'/api/v1/titles/{second}/')
+        client.get('/api/v1/titles/0/')
+        assert set(self.view_counts().values()) == {0}, (
+            'Проверьте, что просмотры не записываются в базу при каждом '
+            'запросе.'
+        )
+
+        assert view_counter.flush() == 4
+        assert self.view_counts() == {first: 3, second: 1}, (
+            'Проверьте, что накопленные просмотры записываются в базу '
+            'при переносе из буфера.'
+        )
+        response = user_client.get(f'/api/v1/titles/{first}/')
+        assert response.json()['view_count'] == 3, (
+            'Проверьте, что ответ на GET-запрос к `/api/v1/titles/{id}/` '
+            'содержит поле `view_count`.'
+        )
+
+        view_counter.flush()
+        response = client.get('/api/v1/titles/', {'ordering': '-view_count'})
+        assert [title['id'] for title in response.json()['results']] == [
+            first, second
+        ], 'Проверьте, что произведения можно сортировать по просмотрам.'
+        response = client.get('/api/v1/titles/', {'ordering': 'view_count'})
+        assert response.json()['results'][0]['id'] == second
+        response = client.get('/api/v1/titles/', {'ordering': 'bad'})
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+
+    def test_02_flush_triggers(self, client, admin_client, settings):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+
+        settings.VIEW_COUNTER_MAX_PENDING = 2
+        client.get(url)
+        client.get(url)
+        assert self.view_counts()[titles[0]['id']] == 2, (
+            'Проверьте, что просмотры записываются при заполнении буфера.'
+        )
+
+        settings.VIEW_COUNTER_FLUSH_INTERVAL = 0.1
+        client.get(url)
+        deadline = time.monotonic() + 5
+        while self.view_counts()[titles[0]['id']] != 3:
+            assert time.monotonic() < deadline, (
+                'Проверьте, что просмотры записываются по таймеру.'
+            )
+            time.sleep(0.05)
+
+    def test_03_flush_keeps_catalog_cache(self, client, admin_client):
+        titles, _, _ = create_titles(admin_client)
+        viewed = titles[0]['id']
+        urls = {
+            'list': ('/api/v1/titles/', {}),
+            'viewed': (f'/api/v1/titles/{viewed}/', {}),
+            'ordered': ('/api/v1/titles/', {'ordering': 'view_count'}),
+        }
+        view_counter.flush()
+        etags = {
+            name: client.get(url, params)['ETag']
+            for name, (url, params) in urls.items()
+        }
+        view_counter.flush()
+        statuses = {
+            name: client.get(url, params, HTTP_IF_NONE_MATCH=etags[name])
+            .status_code
+            for name, (url, params) in urls.items()
+        }
+        assert statuses['list'] == HTTPStatus.NOT_MODIFIED, (
+            'Проверьте, что перенос просмотров не сбрасывает кеш списков '
+            'произведений.'
+        )
+        assert statuses['viewed'] == statuses['ordered'] == HTTPStatus.OK, (
+            'Проверьте, что перенос просмотров обновляет просмотренное '
+            'произведение и список, отсортированный по просмотрам.'
+        )
+        response = client.get('/api/v1/titles/', {'ordering': '-view_count'})
+        assert response.json()['results'][0]['id'] == viewed
+
+    def test_04_flush_error_keeps_response(self, client, admin_client,
+                                           settings, monkeypatch, caplog):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/'
+        settings.VIEW_COUNTER_MAX_PENDING = 1
+
+        def locked(*args, **kwargs):
+            raise OperationalError('database is locked')
+
+        with monkeypatch.context() as patch:
+            patch.setattr(Title.objects, 'filter', locked)
+            with caplog.at_level(logging.ERROR, 'reviews.view_counter'):
+                response = client.get(url)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что ошибка переноса просмотров не меняет ответ '
+            'на GET-запрос к произведению.'
+        )
+        assert 'Просмотры не перенесены' in caplog.text
+        assert view_counter.flush() == 1
+        assert self.view_counts()[titles[0]['id']] == 1, (
+            'Проверьте, что просмотры остаются в буфере после ошибки '
+            'переноса.'
+        )
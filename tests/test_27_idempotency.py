@@ -0,0 +1,101 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+from reviews.models import Comment, IdempotencyKey, Review
+
+from tests.utils import create_single_review, create_titles
+
+
+@pytest.mark.django_db(transaction=True)
+class Test27Idempotency:
+
+    def post(self, client, url, data, key):
+        return client.post(url, data=data, HTTP_IDEMPOTENCY_KEY=key)
+
+    def test_01_review_replay(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        data = {'text': 'text', 'score': 7}
+
+        first = self.post(user_client, url, data, 'review-1')
+        assert first.status_code == HTTPStatus.CREATED
+        second = self.post(user_client, url, {'score': 100}, 'review-1')
+        assert second.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что повтор POST-запроса с тем же заголовком '
+            '`Idempotency-Key` возвращает сохранённый ответ.'
+        )
+        assert second.json() == first.json()
+        assert second['Idempotent-Replayed'] == 'true'
+        assert Review.objects.count() == 1
+
+        response = self.post(user_client, url, data, 'review-2')
+        assert response.status_code == HTTPStatus.BAD_REQUEST, (
+            'Проверьте, что запрос с новым ключом проверяется как обычно.'
+        )
+
+        other_url = f'/api/v1/titles/{titles[1]["id"]}/reviews/'
+        response = self.post(user_client, other_url, data, 'review-1')
+        assert response.status_code == HTTPStatus.UNPROCESSABLE_ENTITY, (
+            'Проверьте, что ключ нельзя использовать для другого запроса.'
+        )
+
+    def test_02_comment_replay(self, admin_client, user_client,
+                               moderator_client):
+        titles, _, _ = create_titles(admin_client)
+        review = create_single_review(
+            user_client, titles[0]['id'], 'text', 5
+        ).json()
+        url = (f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+               f'{review["id"]}/comments/')
+
+        for _ in range(3):
+            response = self.post(user_client, url, {'text': 'a'}, 'key')
+            assert response.status_code == HTTPStatus.CREATED
+        assert Comment.objects.count() == 1, (
+            'Проверьте, что повтор POST-запроса с тем же ключом не создаёт '
+            'новый комментарий.'
+        )
+
+        self.post(moderator_client, url, {'text': 'b'}, 'key')
+        assert Comment.objects.count() == 2, (
+            'Проверьте, что ключи разных пользователей не пересекаются.'
+        )
+
+        response = self.post(user_client, url, {}, 'invalid')
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        response = self.post(user_client, url, {'text': 'c'}, 'invalid')
+        assert response.status_code == HTTPStatus.CREATED, (
+            'Проверьте, что ответы с ошибками не сохраняются.'
+        )
+        assert self.post(user_client, url, {'text': 'd'}, 'k' * 256) \
+            .status_code == HTTPStatus.BAD_REQUEST
+
+        IdempotencyKey.objects.filter(key='key').update(
+            created=timezone.now() - timedelta(days=2)
+        )
+        self.post(user_client, url, {'text': 'a'}, 'key')
+        assert Comment.objects.count() == 4, (
+            'Проверьте, что просроченный ключ не используется.'
+        )
+
+    def test_03_sweep(self, admin_client, user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        self.post(user_client, url, {'text': 'a', 'score': 1}, 'old')
+        self.post(user_client, url.replace(
+            str(titles[0]['id']), str(titles[1]['id'])
+        ), {'text': 'a', 'score': 1}, 'new')
+        IdempotencyKey.objects.filter(key='old').update(
+            created=timezone.now() - timedelta(days=2)
+        )
+
+        call_command('sweep_idempotency_keys', batch_size=1)
+        assert list(IdempotencyKey.objects.values_list('key', flat=True)) == [
+            'new'
+        ], (
+            'Проверьте, что команда `sweep_idempotency_keys` удаляет только '
+            'просроченные ключи.'
+        )
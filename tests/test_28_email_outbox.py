@@ -0,0 +1,153 @@
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+from users.models import OutboxEmail
+
+
+@pytest.mark.django_db(transaction=True)
+class Test28EmailOutbox:
+    url_signup = '/api/v1/auth/signup/'
+
+    def signup(self, client, username):
+        return client.post(self.url_signup, data={
+            'username': username,
+            'email': f'{username}@yamdb.fake',
+        })
+
+    def test_01_signup_enqueues_email(self, client):
+        outbox_before_count = len(mail.outbox)
+        response = self.signup(client, 'outbox_user')
+        assert response.status_code == HTTPStatus.OK
+        assert len(mail.outbox) == outbox_before_count, (
+            f'Проверьте, что POST-запрос к `{self.url_signup}` только '
+            'ставит письмо в очередь, а не отправляет его.'
+        )
+        email = OutboxEmail.objects.get()
+        assert email.recipients == ['outbox_user@yamdb.fake']
+        assert email.sent_at is None
+
+        call_command('send_outbox')
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что команда `send_outbox` отправляет письма '
+            'из очереди.'
+        )
+        assert mail.outbox[-1].to == ['outbox_user@yamdb.fake']
+        email.refresh_from_db()
+        assert email.sent_at is not None
+
+        call_command('send_outbox')
+        assert len(mail.outbox) == outbox_before_count + 1, (
+            'Проверьте, что отправленное письмо не отправляется повторно.'
+        )
+
+    def test_02_failed_signup_enqueues_nothing(self, client,
+                                               django_user_model):
+        django_user_model.objects.create_user(
+            username='taken', email='taken@yamdb.fake'
+        )
+        response = client.post(self.url_signup, data={
+            'username': 'taken', 'email': 'other@yamdb.fake'
+        })
+        assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert not OutboxEmail.objects.exists(), (
+            'Проверьте, что при ошибке регистрации письмо не ставится '
+            'в очередь.'
+        )
+
+    def test_03_batch_uses_one_connection(self, client, monkeypatch):
+        opened = []
+        original_open = EmailBackend.open
+
+        def open_connection(backend):
+            opened.append(backend)
+            return original_open(backend)
+
+        monkeypatch.setattr(EmailBackend, 'open', open_connection)
+        for index in range(3):
+            self.signup(client, f'batch_user_{index}')
+        outbox_before_count = len(mail.outbox)
+
+        call_command('send_outbox')
+        assert len(mail.outbox) == outbox_before_count + 3
+        assert len(opened) == 1, (
+            'Проверьте, что порция писем отправляется через одно '
+            'соединение с почтовым сервером.'
+        )
+
+    def test_04_retry_with_backoff(self, client, monkeypatch, settings):
+        self.signup(client, 'retry_user')
+
+        def fail(backend, messages):
+            raise ConnectionError('SMTP недоступен')
+
+        with monkeypatch.context() as patch:
+            patch.setattr(EmailBackend, 'send_messages', fail)
+            call_command('send_outbox')
+        email = OutboxEmail.objects.get()
+        assert email.sent_at is None
+        assert email.attempts == 1
+        assert 'SMTP недоступен' in email.last_error
+        assert email.next_attempt_at > timezone.now(), (
+            'Проверьте, что неотправленное письмо получает следующую '
+            'попытку с задержкой.'
+        )
+        first_delay = email.next_attempt_at
+
+        outbox_before_count = len(mail.outbox)
+        call_command('send_outbox')
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что письмо не отправляется до времени следующей '
+            'попытки.'
+        )
+
+        OutboxEmail.objects.update(next_attempt_at=timezone.now())
+        with monkeypatch.context() as patch:
+            patch.setattr(EmailBackend, 'send_messages', fail)
+            call_command('send_outbox')
+        email.refresh_from_db()
+        assert email.attempts == 2
+        assert (
+            email.next_attempt_at - timezone.now()
+            > first_delay - email.created
+        ), 'Проверьте, что задержка растёт с каждой неудачной попыткой.'
+
+        OutboxEmail.objects.update(
+            next_attempt_at=timezone.now() - timedelta(seconds=1)
+        )
+        call_command('send_outbox')
+        email.refresh_from_db()
+        assert email.sent_at is not None
+        assert mail.outbox[-1].to == ['retry_user@yamdb.fake']
+
+        settings.OUTBOX_MAX_ATTEMPTS = 1
+        OutboxEmail.objects.update(
+            sent_at=None, attempts=1, next_attempt_at=timezone.now()
+        )
+        outbox_before_count = len(mail.outbox)
+        call_command('send_outbox')
+        assert len(mail.outbox) == outbox_before_count, (
+            'Проверьте, что после OUTBOX_MAX_ATTEMPTS неудачных попыток '
+            'письмо больше не отправляется.'
+        )
+
+    def test_05_failed_close(self, client, monkeypatch):
+        self.signup(client, 'close_user')
+
+        def fail(backend):
+            raise ConnectionError('QUIT не выполнен')
+
+        with monkeypatch.context() as patch:
+            patch.setattr(EmailBackend, 'close', fail)
+            call_command('send_outbox')
+        email = OutboxEmail.objects.get()
+        assert email.sent_at is None and email.attempts == 1, (
+            'Проверьте, что ошибка закрытия соединения записывается '
+            'как неудачная попытка отправки писем порции.'
+        )
+        assert 'QUIT не выполнен' in email.last_error
+        assert email.next_attempt_at > timezone.now()
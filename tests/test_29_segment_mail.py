@@ -0,0 +1,115 @@
+import json
+import os
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from users.backends import get_segment_paths, get_writer
+
+
+@pytest.fixture
+def segment_mail(settings, tmp_path):
+    settings.EMAIL_BACKEND = 'users.backends.SegmentEmailBackend'
+    settings.EMAIL_FILE_PATH = str(tmp_path)
+    settings.EMAIL_FLUSH_INTERVAL = 60
+    yield tmp_path
+    get_writer(str(tmp_path)).take()
+
+
+def read_segments(directory):
+    return [
+        [json.loads(line) for line in open(path, encoding='utf-8')]
+        for path in get_segment_paths(directory)
+    ]
+
+
+@pytest.mark.django_db(transaction=True)
+class Test29SegmentMail:
+    url_signup = '/api/v1/auth/signup/'
+
+    def test_01_messages_are_buffered(self, segment_mail):
+        for index in range(3):
+            mail.send_mail(
+                f'Тема {index}', 'Текст', None, [f'user{index}@yamdb.fake']
+            )
+        assert read_segments(segment_mail) == [], (
+            'Проверьте, что письма копятся в буфере, а не записываются '
+            'в файл по одному.'
+        )
+        assert get_writer(str(segment_mail)).flush() == 3
+        segments = read_segments(segment_mail)
+        assert len(segments) == 1, (
+            'Проверьте, что порция писем дописывается в один сегмент.'
+        )
+        assert [record['to'] for record in segments[0]] == [
+            ['user0@yamdb.fake'], ['user1@yamdb.fake'], ['user2@yamdb.fake']
+        ]
+        assert segments[0][0]['subject'] == 'Тема 0'
+
+    def test_02_flush_on_pending_limit_and_rotation(self, segment_mail,
+                                                    settings):
+        settings.EMAIL_MAX_PENDING = 2
+        mail.send_mail('Тема', 'Текст', None, ['first@yamdb.fake'])
+        assert read_segments(segment_mail) == []
+        mail.send_mail('Тема', 'Текст', None, ['second@yamdb.fake'])
+        assert len(read_segments(segment_mail)[0]) == 2, (
+            'Проверьте, что буфер записывается при накоплении '
+            'EMAIL_MAX_PENDING писем.'
+        )
+
+        settings.EMAIL_SEGMENT_MAX_BYTES = 1
+        connection = mail.get_connection()
+        connection.open()
+        mail.send_mail(
+            'Тема', 'Текст', None, ['third@yamdb.fake'], connection=connection
+        )
+        connection.close()
+        segments = read_segments(segment_mail)
+        assert len(segments) == 2, (
+            'Проверьте, что заполненный сегмент сменяется новым.'
+        )
+        assert segments[1][0]['to'] == ['third@yamdb.fake'], (
+            'Проверьте, что закрытие явно открытого соединения '
+            'записывает письма.'
+        )
+
+        settings.EMAIL_SEGMENT_MAX_BYTES = 1024 * 1024
+        settings.EMAIL_SEGMENT_MAX_AGE = timedelta(0)
+        mail.send_mail('Тема', 'Текст', None, ['fourth@yamdb.fake'])
+        get_writer(str(segment_mail)).flush()
+        assert len(read_segments(segment_mail)) == 3, (
+            'Проверьте, что устаревший сегмент сменяется новым.'
+        )
+
+    def test_03_latest_confirmation_code(self, client, segment_mail,
+                                         capsys):
+        data = {'username': 'segment_user', 'email': 'segment@yamdb.fake'}
+        client.post(self.url_signup, data=data)
+        call_command('send_outbox')
+        assert len(read_segments(segment_mail)) == 1, (
+            'Проверьте, что письма порции команды `send_outbox` '
+            'записываются при закрытии соединения.'
+        )
+
+        client.post(self.url_signup, data=data)
+        call_command('send_outbox')
+        records = read_segments(segment_mail)[0]
+        assert len(records) == 2
+        capsys.readouterr()
+        call_command('latest_confirmation_code', 'Segment@yamdb.fake')
+        code = capsys.readouterr().out.strip()
+        assert code and code in records[1]['body'], (
+            'Проверьте, что команда `latest_confirmation_code` выводит '
+            'последний код, отправленный на адрес.'
+        )
+
+        with open(os.path.join(segment_mail, os.listdir(segment_mail)[0]),
+                  'a', encoding='utf-8') as stream:
+            stream.write('{"to": ["segment@yamdb.fa')
+        call_command('latest_confirmation_code', 'segment@yamdb.fake')
+        assert capsys.readouterr().out.strip() == code
+
+        with pytest.raises(CommandError):
+            call_command('latest_confirmation_code', 'missing@yamdb.fake')
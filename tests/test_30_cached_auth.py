@@ -0,0 +1,95 @@
+from http import HTTPStatus
+
+import pytest
+from api.authentication import LRUCache, user_cache
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+User = get_user_model()
+
+
+@pytest.mark.django_db(transaction=True)
+class Test30CachedAuth:
+    url_me = '/api/v1/users/me/'
+    url_users = '/api/v1/users/'
+
+    def test_01_cache_hit_makes_no_queries(self, user_client, user):
+        response = user_client.get(self.url_me)
+        assert response.status_code == HTTPStatus.OK
+
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.get(self.url_me)
+        assert response.status_code == HTTPStatus.OK
+        assert response.json()['username'] == user.username
+        assert len(context.captured_queries) == 0, (
+            'Проверьте, что повторный запрос с тем же токеном не читает '
+            'пользователя из базы.'
+        )
+
+    def test_02_role_change_invalidates_cache(self, admin_client,
+                                              user_client, user):
+        response = user_client.get(self.url_users)
+        assert response.status_code == HTTPStatus.FORBIDDEN
+
+        response = admin_client.patch(
+            f'{self.url_users}{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        response = user_client.get(self.url_users)
+        assert response.status_code == HTTPStatus.OK, (
+            'Проверьте, что изменение роли пользователя сразу учитывается '
+            'при проверке прав.'
+        )
+
+        response = user_client.patch(self.url_me, data={'bio': 'новое'})
+        assert response.status_code == HTTPStatus.OK
+        assert user_client.get(self.url_me).json()['bio'] == 'новое'
+
+    def test_03_deleted_user_is_not_authenticated(self, admin_client,
+                                                  user_client, user):
+        assert user_client.get(self.url_me).status_code == HTTPStatus.OK
+        response = admin_client.delete(f'{self.url_users}{user.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        assert user.id not in user_cache.entries
+        response = user_client.get(self.url_me)
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токен удалённого пользователя перестаёт '
+            'действовать сразу после удаления.'
+        )
+
+    def test_04_lru_eviction_and_expiry(self, monkeypatch):
+        cache = LRUCache(lambda: 2)
+        now = 1000.0
+        monkeypatch.setattr('api.authentication.time.time', lambda: now)
+        cache.set('a', 1, now + 10)
+        cache.set('b', 2, now + 10)
+        assert cache.get('a') == 1
+        cache.set('c', 3, now + 10)
+        assert cache.get('b') is None, (
+            'Проверьте, что при переполнении вытесняется давно '
+            'не использованная запись.'
+        )
+        assert cache.get('a') == 1
+        cache.set('d', 4, now)
+        assert cache.get('d') is None
+
+    def test_05_profile_update_uses_fresh_row(self, user):
+        User.objects.filter(pk=user.pk).update(role=User.ADMIN)
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}'
+        )
+        assert client.get(self.url_me).json()['role'] == User.ADMIN
+
+        User.objects.filter(pk=user.pk).update(role=User.USER)
+        response = client.patch(self.url_me, data={'bio': 'новое'})
+        assert response.status_code == HTTPStatus.OK
+        user.refresh_from_db()
+        assert user.role == User.USER and user.bio == 'новое', (
+            'Проверьте, что изменение профиля сохраняется в свежую запись '
+            'пользователя и не возвращает поля из кеша.'
+        )
+        assert response.json()['role'] == User.USER
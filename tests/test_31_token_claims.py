@@ -0,0 +1,138 @@
+import time
+from http import HTTPStatus
+
+import pytest
+from api.authentication import get_token_version
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.tokens import default_token_generator
+from django.db import connection
+from django.db.models import F
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from tests.utils import create_titles
+
+User = get_user_model()
+
+
+def user_queries(context):
+    return [
+        query['sql'] for query in context.captured_queries
+        if 'FROM "users_user"' in query['sql']
+    ]
+
+
+def claims_client(user):
+    response = APIClient().post('/api/v1/auth/token/', data={
+        'username': user.username,
+        'confirmation_code': default_token_generator.make_token(user),
+    })
+    assert response.status_code == HTTPStatus.OK
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {response.json()["token"]}')
+    return client, AccessToken(response.json()['token'])
+
+
+@pytest.mark.django_db(transaction=True)
+class Test31TokenClaims:
+
+    def test_01_token_carries_claims(self, user, user_superuser):
+        _, token = claims_client(user)
+        assert token['role'] == 'user'
+        assert token['username'] == user.username
+        assert token['is_superuser'] is False
+        assert token['token_version'] == user.token_version
+        _, token = claims_client(user_superuser)
+        assert token['is_superuser'] is True
+
+    def test_02_no_user_lookups(self, admin_client, admin, user):
+        titles, _, _ = create_titles(admin_client)
+        client, _ = claims_client(user)
+        admin_claims_client, _ = claims_client(admin)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        assert client.get(url).status_code == HTTPStatus.OK
+
+        with CaptureQueriesContext(connection) as context:
+            response = client.post(url, data={'text': 'Текст', 'score': 7})
+            assert response.status_code == HTTPStatus.CREATED
+            assert response.json()['author'] == user.username
+            review_url = f'{url}{response.json()["id"]}/'
+            response = client.patch(review_url, data={'text': 'Новый'})
+            assert response.status_code == HTTPStatus.OK
+            response = client.post(
+                f'{review_url}comments/', data={'text': 'Комментарий'}
+            )
+            assert response.status_code == HTTPStatus.CREATED
+            response = admin_claims_client.post(
+                '/api/v1/categories/', data={'name': 'Тест', 'slug': 'test'}
+            )
+            assert response.status_code == HTTPStatus.CREATED
+        assert user_queries(context) == [], (
+            'Проверьте, что запросы с токеном, содержащим роль, не читают '
+            'пользователя из базы.'
+        )
+
+    def test_03_role_change_forces_reload(self, admin_client, moderator,
+                                          user, user_client):
+        titles, _, _ = create_titles(admin_client)
+        url = f'/api/v1/titles/{titles[0]["id"]}/reviews/'
+        response = user_client.post(url, data={'text': 'Текст', 'score': 7})
+        review_url = f'{url}{response.json()["id"]}/'
+        client, token = claims_client(moderator)
+        version = token['token_version']
+
+        response = admin_client.patch(
+            f'/api/v1/users/{moderator.username}/', data={'role': 'user'}
+        )
+        assert response.status_code == HTTPStatus.OK
+        moderator.refresh_from_db()
+        assert moderator.token_version == version + 1, (
+            'Проверьте, что изменение роли увеличивает версию токенов.'
+        )
+        response = client.delete(review_url)
+        assert response.status_code == HTTPStatus.FORBIDDEN, (
+            'Проверьте, что после смены роли роль из ранее выданного '
+            'токена не используется.'
+        )
+
+        response = client.patch('/api/v1/users/me/', data={'bio': 'Новое'})
+        assert response.status_code == HTTPStatus.OK
+        moderator.refresh_from_db()
+        assert moderator.token_version == version + 1, (
+            'Проверьте, что изменение других полей не меняет версию токенов.'
+        )
+
+        new_client, _ = claims_client(moderator)
+        response = new_client.get('/api/v1/users/me/')
+        assert response.json()['bio'] == 'Новое'
+        assert response.json()['role'] == 'user'
+
+    def test_04_deleted_user(self, admin_client, user):
+        client, _ = claims_client(user)
+        assert client.get('/api/v1/users/me/').status_code == HTTPStatus.OK
+        response = admin_client.delete(f'/api/v1/users/{user.username}/')
+        assert response.status_code == HTTPStatus.NO_CONTENT
+        response = client.get('/api/v1/users/me/')
+        assert response.status_code == HTTPStatus.UNAUTHORIZED, (
+            'Проверьте, что токен удалённого пользователя не действует.'
+        )
+
+    def test_05_version_expires_in_other_processes(self, user, monkeypatch):
+        client, token = claims_client(user)
+        assert client.get('/api/v1/users/me/').status_code == HTTPStatus.OK
+        # Роль сменил другой процесс: кеш этого процесса не очищен.
+        User.objects.filter(pk=user.pk).update(
+            role=User.MODERATOR, token_version=F('token_version') + 1
+        )
+        assert get_token_version(user.pk) == token['token_version']
+
+        now = time.time() + settings.AUTH_USER_CACHE_TTL.total_seconds() + 1
+        monkeypatch.setattr('time.time', lambda: now)
+        assert get_token_version(user.pk) == token['token_version'] + 1, (
+            'Проверьте, что версия токенов хранится в кеше не дольше '
+            '`AUTH_USER_CACHE_TTL`.'
+        )
+        response = client.get('/api/v1/users/me/')
+        assert response.json()['role'] == User.MODERATOR
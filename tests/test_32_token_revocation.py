@@ -0,0 +1,176 @@
+import time
+import uuid
+from datetime import timedelta
+from http import HTTPStatus
+
+import pytest
+from api.authentication import RoleAccessToken
+from api.revocation import REVISION_KEY, BloomFilter, RevocationList
+from django.core.cache import cache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+from users.models import RevokedToken
+
+
+def token_client(user):
+    token = AccessToken.for_user(user)
+    client = APIClient()
+    client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+    return client, token
+
+
+@pytest.mark.django_db(transaction=True)
+class Test32TokenRevocation:
+    url_revoke = '/api/v1/auth/revoke/'
+    url_me = '/api/v1/users/me/'
+
+    def test_01_revoke_by_jti(self, admin_client, user):
+        client, token = token_client(user)
+        other_client, _ = token_client(user)
+        assert client.get(self.url_me).status_code == HTTPStatus.OK
+
+        response = admin_client.post(self.url_revoke, data={
+            'jti': token['jti']
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        assert response.json() == {'jti': token['jti']}
+        assert client.get(self.url_me).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), 'Проверьте, что отозванный токен сразу перестаёт действовать.'
+        assert other_client.get(self.url_me).status_code == HTTPStatus.OK, (
+            'Проверьте, что отзыв по jti не затрагивает другие токены '
+            'пользователя.'
+        )
+
+    def test_02_revoke_by_user(self, admin_client, user, admin):
+        clients = [token_client(user)[0] for _ in range(2)]
+        admin_token_client, _ = token_client(admin)
+        response = admin_client.post(self.url_revoke, data={
+            'username': user.username
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        for client in clients:
+            assert client.get(self.url_me).status_code == (
+                HTTPStatus.UNAUTHORIZED
+            ), (
+                'Проверьте, что отзыв по пользователю отзывает все '
+                'выданные ему токены.'
+            )
+        assert admin_token_client.get(self.url_me).status_code == (
+            HTTPStatus.OK
+        )
+
+    def test_03_permissions_and_validation(self, admin_client, user_client,
+                                           client):
+        data = {'jti': uuid.uuid4().hex}
+        assert client.post(self.url_revoke, data=data).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+        assert user_client.post(self.url_revoke, data=data).status_code == (
+            HTTPStatus.FORBIDDEN
+        ), 'Проверьте, что отзывать токены может только администратор.'
+        for invalid_data in (
+            {},
+            {'jti': data['jti'], 'username': 'TestUser'},
+            {'username': 'missing'},
+        ):
+            response = admin_client.post(self.url_revoke, data=invalid_data)
+            assert response.status_code == HTTPStatus.BAD_REQUEST
+        assert not RevokedToken.objects.exists()
+
+    def test_04_check_is_in_memory(self, user, settings):
+        settings.REVOKED_TOKENS_REFRESH_INTERVAL = 60
+        client, token = token_client(user)
+        client.get(self.url_me)
+        with CaptureQueriesContext(connection) as context:
+            client.get(self.url_me)
+        assert not [
+            query for query in context.captured_queries
+            if 'users_revokedtoken' in query['sql']
+        ], 'Проверьте, что проверка отзыва не обращается к базе.'
+
+        # Отзыв, сделанный другим процессом: строка в таблице
+        # и удалённая из общего кеша ревизия.
+        RevokedToken.objects.revoke_jti(token['jti'])
+        cache.delete(REVISION_KEY)
+        assert client.get(self.url_me).status_code == HTTPStatus.OK
+        settings.REVOKED_TOKENS_REFRESH_INTERVAL = 0
+        assert client.get(self.url_me).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        ), (
+            'Проверьте, что процесс загружает отзывы при изменении ревизии.'
+        )
+
+    def test_05_sweep_and_bloom_filter(self, user):
+        RevokedToken.objects.revoke_jti('expired')
+        RevokedToken.objects.revoke_user(user)
+        RevokedToken.objects.filter(jti='expired').update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        call_command('sweep_revoked_tokens')
+        assert list(
+            RevokedToken.objects.values_list('user_id', flat=True)
+        ) == [user.id]
+
+        items = [uuid.uuid4().hex for _ in range(1000)]
+        bloom = BloomFilter(len(items), 0.01)
+        for item in items:
+            bloom.add(item)
+        assert all(item in bloom for item in items)
+        false_positives = sum(
+            uuid.uuid4().hex in bloom for _ in range(1000)
+        )
+        assert false_positives < 50
+
+    def test_06_other_process_with_own_cache(self, admin_client, user,
+                                             settings, monkeypatch):
+        settings.REVOKED_TOKENS_REFRESH_INTERVAL = 1
+        _, token = token_client(user)
+        other_cache = LocMemCache('other-process', {})
+        other_revocations = RevocationList()
+
+        def revoked_in_other_process():
+            with monkeypatch.context() as patch:
+                patch.setattr(
+                    'api.revocation.get_cache', lambda: other_cache
+                )
+                return other_revocations.is_revoked(token)
+
+        assert not revoked_in_other_process()
+        response = admin_client.post(self.url_revoke, data={
+            'jti': token['jti']
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        assert other_cache.get(REVISION_KEY) is not None
+
+        wall, monotonic = time.time(), time.monotonic()
+        monkeypatch.setattr('time.time', lambda: wall + 2)
+        monkeypatch.setattr('time.monotonic', lambda: monotonic + 2)
+        assert revoked_in_other_process(), (
+            'Проверьте, что ревизия отзывов хранится в кеше не дольше '
+            '`REVOKED_TOKENS_REFRESH_INTERVAL` и процесс со своим кешем '
+            'узнаёт об отзыве.'
+        )
+
+    def test_07_new_token_after_revoke_by_user(self, admin_client, user):
+        old_client, _ = token_client(user)
+        response = admin_client.post(self.url_revoke, data={
+            'username': user.username
+        })
+        assert response.status_code == HTTPStatus.CREATED
+        assert old_client.get(self.url_me).status_code == (
+            HTTPStatus.UNAUTHORIZED
+        )
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f'Bearer {RoleAccessToken.for_user(user)}'
+        )
+        assert client.get(self.url_me).status_code == HTTPStatus.OK, (
+            'Проверьте, что токен, выданный сразу после отзыва токенов '
+            'пользователя, действует.'
+        )
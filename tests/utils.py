@@ -1,5 +1,9 @@
+from contextlib import contextmanager
 from http import HTTPStatus
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 
 check_name_and_slug_patterns = (
     (
@@ -305,3 +309,18 @@ def check_fields(obj_type, url_pattern, obj, expected_data, detail=False):
         f'данные {obj_types[obj_type]}{results_in_msg}. Поле `id` не '
         'найдено или не является целым числом.'
     )
+
+
+@contextmanager
+def assert_query_budget(expected, url):
+    """
+    Проверяет, что код внутри блока выполняет ровно `expected`
+    запросов к базе. При несовпадении выводит выполненные запросы.
+    """
+    with CaptureQueriesContext(connection) as context:
+        yield context
+    executed = [query['sql'] for query in context.captured_queries]
+    assert len(executed) == expected, (
+        f'Проверьте, что запрос к `{url}` выполняет {expected} запросов к '
+        f'базе данных, а не {len(executed)}:\n' + '\n'.join(executed)
+    )